@@ -0,0 +1,76 @@
+"""
+Database configuration for settings.DATABASES.
+
+The connection is read from DATABASE_URL (SQLite by default) and tuned
+for the backend in use:
+
+PostgreSQL uses psycopg's native connection pool. Every worker process
+keeps its own pool, so size DB_POOL_MAX_SIZE * WEB_CONCURRENCY to stay
+under the server's max_connections. Set DB_POOL=False to fall back to
+persistent connections with health checks.
+
+SQLite gets WAL journaling, synchronous=NORMAL, a larger page cache and
+memory-mapped reads through the connection's init command, and starts
+write transactions immediately so concurrent writers wait on the busy
+timeout instead of failing on lock upgrades. Set SQLITE_TUNING=False to
+keep SQLite's defaults.
+"""
+import os
+
+import dj_database_url
+
+
+def _env_bool(name, default):
+    return os.environ.get(name, str(default)) == 'True'
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def _env_float(name, default):
+    return float(os.environ.get(name, default))
+
+
+def postgresql_pool_options():
+    return {
+        'min_size': _env_int('DB_POOL_MIN_SIZE', 2),
+        'max_size': _env_int('DB_POOL_MAX_SIZE', 10),
+        # Seconds a request waits for a free connection before failing
+        'timeout': _env_float('DB_POOL_TIMEOUT', 10),
+        # Idle connections above min_size are closed after this many seconds
+        'max_idle': _env_float('DB_POOL_MAX_IDLE', 300),
+        # Connections are recycled after this many seconds
+        'max_lifetime': _env_float('DB_POOL_MAX_LIFETIME', 3600),
+    }
+
+
+def sqlite_init_command():
+    pragmas = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        # Negative sizes are in KiB
+        'cache_size': -_env_int('SQLITE_CACHE_KIB', 64 * 1024),
+        'mmap_size': _env_int('SQLITE_MMAP_BYTES', 256 * 1024 * 1024),
+        'temp_store': 'MEMORY',
+    }
+    return ' '.join(f'PRAGMA {name}={value};' for name, value in pragmas.items())
+
+
+def database_config():
+    config = dj_database_url.config(default='sqlite:///db.sqlite3', conn_max_age=600)
+    engine = config['ENGINE']
+    options = config.setdefault('OPTIONS', {})
+
+    if engine == 'django.db.backends.postgresql':
+        # With a pool this makes Django check each connection before handing it out
+        config['CONN_HEALTH_CHECKS'] = True
+        if _env_bool('DB_POOL', True):
+            options['pool'] = postgresql_pool_options()
+            # The pool manages connection reuse; persistent connections must be off
+            config['CONN_MAX_AGE'] = 0
+    elif engine == 'django.db.backends.sqlite3' and _env_bool('SQLITE_TUNING', True):
+        options['init_command'] = sqlite_init_command()
+        options['transaction_mode'] = 'IMMEDIATE'
+        options['timeout'] = _env_float('SQLITE_BUSY_TIMEOUT', 20)
+    return config
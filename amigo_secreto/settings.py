@@ -10,9 +10,10 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 import os
-import dj_database_url
 from pathlib import Path
 
+from .database import database_config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -26,7 +27,9 @@ SECRET_KEY = os.environ.get('SECRET_KEY', 'django-insecure-3n+x_+)a88ic(z2o)jn86
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = os.environ.get('DEBUG', 'False') == 'True'
 
-ALLOWED_HOSTS = ['*']
+# Comma-separated. WebSocket connections must also come from a page on one of
+# these hosts (see amigo_secreto/asgi.py). Render sets RENDER_EXTERNAL_HOSTNAME
+ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', os.environ.get('RENDER_EXTERNAL_HOSTNAME', '*')).split(',')
 
 
 # Application definition
@@ -42,8 +45,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.AsyncWhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -56,7 +60,7 @@ ROOT_URLCONF = 'amigo_secreto.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -70,19 +74,78 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'amigo_secreto.wsgi.application'
+ASGI_APPLICATION = 'amigo_secreto.asgi.application'
+
+# Route the hot views to their async versions (core.async_views) when served over ASGI
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', 'False') == 'True'
+
+# Bearer token for /metrics (core.metrics). Without it the endpoint only answers with DEBUG=True
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+
+# Channel layers for live room updates
+# The in-memory layer only reaches sockets served by the same process, so
+# deployments with several workers or nodes set REDIS_URL (see render.yaml).
+
+if os.environ.get('REDIS_URL'):
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': [os.environ['REDIS_URL']],
+            },
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        },
+    }
 
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
+# Pooling and SQLite tuning are configured from the environment, see amigo_secreto/database.py
 
 DATABASES = {
-    'default': dj_database_url.config(
-        default='sqlite:///db.sqlite3',
-        conn_max_age=600,
-    )
+    'default': database_config(),
 }
 
 
+# Caches
+# Rendered result and admin fragments are keyed by room version; the
+# local-memory backend keeps them bounded per process.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'fragments',
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('FRAGMENT_CACHE_MAX_ENTRIES', 1000)),
+        },
+    },
+}
+
+
+# Sessions and messages
+# Sessions only carry the room code, participant id and admin flag, so by
+# default they live in a signed cookie (see core/sessions.py, which also
+# migrates existing database sessions). SESSION_BACKEND=db restores the
+# database-backed sessions.
+
+if os.environ.get('SESSION_BACKEND', 'signed_cookies') == 'db':
+    SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+else:
+    SESSION_ENGINE = 'core.sessions'
+
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -123,3 +186,25 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# In production (STATIC_MANIFEST=True, set in render.yaml) collectstatic
+# writes content-hashed copies of every file plus gzip and brotli variants,
+# and WhiteNoise serves the hashed names with far-future cache headers.
+# Templates then need the manifest written by collectstatic to resolve the
+# hashed names, so the manifest backend is off by default and local runs
+# work without collectstatic. static/vendor/ is built by `npm run build`
+# (see README.md).
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+if os.environ.get('STATIC_MANIFEST', 'False') != 'True':
+    STORAGES['staticfiles']['BACKEND'] = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+    # Serve the source files straight from STATICFILES_DIRS, even with DEBUG=False
+    WHITENOISE_USE_FINDERS = True
+
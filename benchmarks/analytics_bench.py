@@ -0,0 +1,72 @@
+"""
+Cost of the prediction heatmap as the room grows.
+
+For each size a room with a full prediction matrix is seeded in the
+configured storage (PREDICTION_STORAGE) and the analytics page and its
+binary matrix are requested as the admin:
+
+    cold     fragments cache cleared, so the count matrix is rebuilt
+    cached   the matrix comes from the cache (one version query)
+    matrix   the binary matrix the page draws its canvas from
+
+Each row shows the median and worst time, the SQL queries and the size
+of the response body.
+
+Usage:
+    python -m benchmarks.analytics_bench
+    DATABASE_URL=postgres://... python -m benchmarks.analytics_bench --sizes 1000 2000
+"""
+import argparse
+import random
+import statistics
+import time
+
+
+def measure(send, repeat, before=None):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    timings = []
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = send()
+            timings.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            raise RuntimeError(f"Request answered {response.status_code}")
+    return statistics.median(timings), max(timings), len(queries), len(response.content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 500, 1000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    from benchmarks.utils import setup_django
+    setup_django()
+    from benchmarks.lifecycle_bench import login, seed_room
+    from django.core.cache import caches
+    from django.test import Client
+
+    rng = random.Random(args.seed)
+    print(f"{'request':<10} {'n':>6} {'median':>10} {'max':>10} {'queries':>8} {'bytes':>10}")
+    for n in args.sizes:
+        room, ids = seed_room(n, rng)
+        client = Client()
+        login(client, room, ids[0], True)
+        cases = [
+            ('cold', lambda: client.get('/admin-panel/analytics/'), caches['fragments'].clear),
+            ('cached', lambda: client.get('/admin-panel/analytics/'), None),
+            ('matrix', lambda: client.get('/admin-panel/analytics/heatmap.bin'), None),
+        ]
+        for label, send, before in cases:
+            median, worst, queries, size = measure(send, args.repeat, before)
+            print(f"{label:<10} {n:>6} {median * 1000:>8.1f} ms {worst * 1000:>8.1f} ms {queries:>8} {size:>10}")
+
+
+if __name__ == '__main__':
+    main()
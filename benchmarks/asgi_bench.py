@@ -0,0 +1,198 @@
+"""
+Throughput of the hot views: sync under gunicorn against async under uvicorn.
+
+Seeds a room in the results stage, creates one session per simulated
+client and starts each server in turn on the same database: gunicorn
+serving the WSGI app with the sync views, then uvicorn serving the ASGI
+app with ASYNC_VIEWS enabled. A small asyncio HTTP/1.1 client keeps
+--concurrency connections busy for --duration seconds on each path and
+reports requests per second and latency percentiles.
+
+SQLite serializes writers, but the measured paths only read. Point
+DATABASE_URL at PostgreSQL to measure a production-like setup.
+
+Usage:
+    python -m benchmarks.asgi_bench
+    python -m benchmarks.asgi_bench --participants 500 --concurrency 256 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+from benchmarks.lifecycle_bench import percentile, seed_room
+from benchmarks.utils import setup_django
+
+HOST = '127.0.0.1'
+
+
+def prepare(participants, sessions, rng):
+    """
+    Seeds a room with results enabled and returns session keys (cookie
+    values) of its participants for the configured session engine.
+    """
+    from importlib import import_module
+
+    from django.conf import settings
+    from core import draw
+    from core.leaderboard import refresh_scores
+    from core.models import Room
+
+    room, ids = seed_room(participants, rng)
+    draw.save_assignments(room, draw.draw_assignments(list(room.participants.all())))
+    Room.objects.filter(pk=room.pk).update(status=Room.STATUS_RESULTS)
+    room.refresh_from_db()
+    refresh_scores(room)
+
+    SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
+    keys = []
+    for _ in range(sessions):
+        participant_id = rng.choice(ids)
+        session = SessionStore()
+        session['room_code'] = room.code
+        session['participant_id'] = participant_id
+        session['is_admin'] = participant_id == ids[0]
+        session.save()
+        keys.append(session.session_key)
+    return keys
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((HOST, port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+async def read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Connection closed")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    keep_alive = headers.get('connection', '').lower() != 'close'
+    return int(status_line.split()[1]), keep_alive
+
+
+async def client_loop(port, path, session_key, deadline, latencies, statuses):
+    request = (
+        f"GET {path} HTTP/1.1\r\nHost: {HOST}:{port}\r\n"
+        f"Cookie: sessionid={session_key}\r\nConnection: keep-alive\r\n\r\n"
+    ).encode()
+    connection = None
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            if connection is None:
+                connection = await asyncio.open_connection(HOST, port)
+            reader, writer = connection
+            writer.write(request)
+            await writer.drain()
+            status, keep_alive = await read_response(reader)
+        except (ConnectionError, asyncio.IncompleteReadError, OSError):
+            statuses['error'] = statuses.get('error', 0) + 1
+            connection = None
+            continue
+        latencies.append(time.perf_counter() - started)
+        statuses[status] = statuses.get(status, 0) + 1
+        if not keep_alive:
+            connection[1].close()
+            connection = None
+    if connection is not None:
+        connection[1].close()
+
+
+async def load(port, path, session_keys, concurrency, duration):
+    latencies = []
+    statuses = {}
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(
+        client_loop(port, path, session_keys[i % len(session_keys)], deadline, latencies, statuses)
+        for i in range(concurrency)
+    ))
+    return latencies, statuses
+
+
+def run_server(label, command, env, paths, session_keys, args):
+    port = free_port()
+    command = [part.replace('{port}', str(port)) for part in command]
+    server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+        for path in paths:
+            # Warm up the workers' caches and connections before measuring
+            asyncio.run(load(port, path, session_keys, args.concurrency, 1))
+            latencies, statuses = asyncio.run(load(port, path, session_keys, args.concurrency, args.duration))
+            if not latencies:
+                print(f"{label:<8} {path:<14} no successful requests {statuses}")
+                continue
+            print(
+                f"{label:<8} {path:<14} {len(latencies) / args.duration:>9.0f} req/s "
+                f"{percentile(latencies, 50) * 1000:>8.1f} ms {percentile(latencies, 99) * 1000:>8.1f} ms  {statuses}"
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--participants', type=int, default=200)
+    parser.add_argument('--sessions', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=128)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8, help="Threads per gunicorn worker.")
+    parser.add_argument('--paths', nargs='+', default=['/dashboard/', '/results/'])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    setup_django()
+    session_keys = prepare(args.participants, args.sessions, random.Random(args.seed))
+
+    base_env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'amigo_secreto.settings'))
+    servers = [
+        ('sync', [
+            sys.executable, '-m', 'gunicorn', 'amigo_secreto.wsgi:application',
+            '--workers', str(args.workers), '--threads', str(args.threads), '--bind', f'{HOST}:{{port}}',
+        ], dict(base_env, ASYNC_VIEWS='False')),
+        ('async', [
+            sys.executable, '-m', 'uvicorn', 'amigo_secreto.asgi:application',
+            '--workers', str(args.workers), '--host', HOST, '--port', '{port}', '--no-access-log',
+        ], dict(base_env, ASYNC_VIEWS='True')),
+    ]
+
+    print(f"{'server':<8} {'path':<14} {'throughput':>15} {'p50':>11} {'p99':>11}  statuses")
+    for label, command, env in servers:
+        run_server(label, command, env, args.paths, session_keys, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Write throughput of the prediction-save path per database profile.
+
+Each profile runs in its own process, because the database settings are
+read once at startup:
+
+    sqlite-default   SQLite with SQLITE_TUNING=False
+    sqlite-tuned     WAL, synchronous=NORMAL, IMMEDIATE transactions
+    pg-persistent    PostgreSQL with persistent connections (DB_POOL=False)
+    pg-pool          PostgreSQL with psycopg's connection pool
+
+The PostgreSQL profiles need DATABASE_URL to point at a PostgreSQL
+database. SQLite profiles always use a fresh temporary file. In each run,
+--threads threads save single changed predictions through
+core.predictions.save_predictions for --duration seconds, as the
+per-field autosave on the prediction page does.
+
+Usage:
+    python -m benchmarks.db_write_bench
+    DATABASE_URL=postgres://... python -m benchmarks.db_write_bench --profiles pg-persistent pg-pool --threads 32
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+PROFILES = {
+    'sqlite-default': {'SQLITE_TUNING': 'False'},
+    'sqlite-tuned': {'SQLITE_TUNING': 'True'},
+    'pg-persistent': {'DB_POOL': 'False'},
+    'pg-pool': {'DB_POOL': 'True'},
+}
+
+
+def writer(room, user, participants_by_id, deadline, rng, results):
+    from django.db import OperationalError, connection
+    from core.predictions import get_predictions_map, save_predictions
+
+    predictions_map = get_predictions_map(room, user)
+    ids = list(participants_by_id)
+    saves = errors = 0
+    while time.perf_counter() < deadline:
+        receiver_id, giver_id = rng.sample(ids, 2)
+        receiver = participants_by_id[receiver_id]
+        try:
+            save_predictions(room, user, {receiver: giver_id}, participants_by_id, predictions_map)
+        except OperationalError:
+            errors += 1
+            continue
+        predictions_map[receiver_id] = giver_id
+        saves += 1
+    connection.close()
+    results.append((saves, errors))
+
+
+def run_profile(args):
+    from benchmarks.utils import setup_django
+    setup_django()
+    from benchmarks.lifecycle_bench import seed_room
+    from django.db import connection
+
+    rng = random.Random(args.seed)
+    room, ids = seed_room(args.participants, rng)
+    participants_by_id = room.participants.in_bulk()
+    users = rng.sample(ids, min(args.threads, len(ids)))
+    connection.close()
+
+    results = []
+    deadline = time.perf_counter() + args.duration
+    threads = [
+        threading.Thread(target=writer, args=(room, participants_by_id[user_id], participants_by_id, deadline, random.Random(i), results))
+        for i, user_id in enumerate(users)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    saves = sum(saves for saves, _ in results)
+    errors = sum(errors for _, errors in results)
+    print(json.dumps({'saves_per_second': saves / args.duration, 'saves': saves, 'errors': errors}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', nargs='+', choices=list(PROFILES), default=['sqlite-default', 'sqlite-tuned'])
+    parser.add_argument('--participants', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--run', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_profile(args)
+        return
+
+    print(f"{'profile':<16} {'threads':>7} {'saves/s':>10} {'errors':>8}")
+    for profile in args.profiles:
+        env = dict(os.environ, **PROFILES[profile])
+        if profile.startswith('sqlite'):
+            path = os.path.join(tempfile.mkdtemp(prefix='amigo-bench-'), 'bench.sqlite3')
+            env['DATABASE_URL'] = f'sqlite:///{path}'
+        elif not os.environ.get('DATABASE_URL', '').startswith('postgres'):
+            print(f"{profile:<16} skipped: DATABASE_URL is not a PostgreSQL URL")
+            continue
+        command = [
+            sys.executable, '-m', 'benchmarks.db_write_bench', '--run',
+            '--participants', str(args.participants), '--threads', str(args.threads),
+            '--duration', str(args.duration), '--seed', str(args.seed),
+        ]
+        output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{profile:<16} {args.threads:>7} {result['saves_per_second']:>10.0f} {result['errors']:>8}")
+
+
+if __name__ == '__main__':
+    main()
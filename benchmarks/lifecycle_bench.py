@@ -0,0 +1,332 @@
+"""
+End-to-end benchmark of the room lifecycle views.
+
+For each room size a synthetic room is seeded with a full prediction
+matrix (every participant predicts a giver for every participant), and
+the views are then driven through the Django test client in lifecycle
+order: home, joining with a name, predicting, the admin panel and the
+results page. Every request records its latency and its exact number of
+SQL queries. The end state of each room is then checked: everybody gives
+and receives exactly once, the stored scores match a naive recount of the
+predictions and the results page renders, so a run that got faster by
+getting something wrong fails as well.
+
+Every other run is a gate against the baseline file, and fails (exit
+status 1) when the file is missing, was recorded for another prediction
+storage, has no entry for a measured room size, or when a view now runs
+more queries than recorded or its median latency grows past the allowed
+tolerance. The committed baseline (lifecycle_baseline.json) only holds
+query counts, which do not depend on the machine; latencies are only
+compared against baselines that recorded them. It covers the default
+sizes; a room of 5000 (25M predictions) needs more than 6 GB of memory
+and is only measured on request, with --sizes 5000.
+
+With --save-baseline the measurements of the measured sizes are written
+to the baseline file, keeping the entries of other sizes, so a size can
+be refreshed on its own. --queries-only leaves the latencies out, as for
+the committed baseline.
+
+Usage:
+    python -m benchmarks.lifecycle_bench
+    python -m benchmarks.lifecycle_bench --sizes 10 100 --repeat 20 --save-baseline --queries-only
+    python -m benchmarks.lifecycle_bench --baseline local.json --save-baseline
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+
+from benchmarks.utils import setup_django
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'lifecycle_baseline.json')
+SEED_BATCH_SIZE = 10000
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def seed_room(n, rng):
+    """
+    Creates a predicting room with `n` participants (the first one is the
+    admin) and a full prediction matrix in the configured storage. Rows are
+    inserted in bulk, so the ordinals and counters that signals and
+    core.predictions normally maintain are set explicitly.
+    """
+    from django.db import connection, transaction
+    from core import packing
+    from core.codes import create_room
+    from core.models import Participant, Prediction, PredictionVector, Room
+    from core.predictions import STORAGE, STORAGE_PACKED
+
+    room = create_room()
+    Participant.objects.bulk_create(
+        Participant(room=room, name=f"Participante {i}", is_admin=i == 0, ordinal=i) for i in range(n)
+    )
+    ids = list(room.participants.order_by('id').values_list('id', flat=True))
+
+    if STORAGE == STORAGE_PACKED:
+        ordinals = {participant_id: ordinal for ordinal, participant_id in enumerate(ids)}
+        vectors = []
+        for user_id in ids:
+            predictions = {}
+            for receiver_id in ids:
+                giver_id = rng.choice(ids)
+                while giver_id == receiver_id:
+                    giver_id = rng.choice(ids)
+                predictions[receiver_id] = giver_id
+            vectors.append(PredictionVector(room=room, user_id=user_id, givers=packing.encode(predictions, ordinals)))
+        PredictionVector.objects.bulk_create(vectors, batch_size=500)
+        Room.objects.filter(pk=room.pk).update(participant_count=n)
+        room.participants.update(predictions_count=n)
+        room.refresh_from_db()
+        return room, ids
+
+    table = Prediction._meta.db_table
+    sql = (
+        f"INSERT INTO {table} (room_id, user_id, predicted_giver_id, predicted_receiver_id) "
+        f"VALUES (%s, %s, %s, %s)"
+    )
+    rows = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for user_id in ids:
+            for receiver_id in ids:
+                giver_id = rng.choice(ids)
+                while giver_id == receiver_id:
+                    giver_id = rng.choice(ids)
+                rows.append((room.id, user_id, giver_id, receiver_id))
+                if len(rows) >= SEED_BATCH_SIZE:
+                    cursor.executemany(sql, rows)
+                    rows = []
+        if rows:
+            cursor.executemany(sql, rows)
+
+    Room.objects.filter(pk=room.pk).update(participant_count=n)
+    room.participants.update(predictions_count=n)
+    room.refresh_from_db()
+    return room, ids
+
+
+def login(client, room, participant_id, is_admin):
+    from django.conf import settings
+
+    session = client.session
+    session['room_code'] = room.code
+    session['participant_id'] = participant_id
+    session['is_admin'] = is_admin
+    session.save()
+    # Signed cookie sessions change their key whenever the data changes
+    client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+
+
+class Recorder:
+    """Collects latency and query counts per (room size, view)."""
+
+    def __init__(self):
+        self.samples = {}
+
+    def request(self, size, label, send, expected=(200, 302)):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = send()
+            elapsed = time.perf_counter() - started
+        if response.status_code not in expected:
+            raise RuntimeError(f"{label} answered {response.status_code} for a room of {size}")
+        entry = self.samples.setdefault(str(size), {}).setdefault(label, {'latencies': [], 'queries': []})
+        entry['latencies'].append(elapsed * 1000)
+        entry['queries'].append(len(queries))
+        return response
+
+    def summary(self):
+        result = {}
+        for size, views in self.samples.items():
+            for label, entry in views.items():
+                result.setdefault(size, {})[label] = {
+                    'p50_ms': round(percentile(entry['latencies'], 50), 3),
+                    'p95_ms': round(percentile(entry['latencies'], 95), 3),
+                    'p99_ms': round(percentile(entry['latencies'], 99), 3),
+                    'queries': max(entry['queries']),
+                }
+        return result
+
+
+def run_lifecycle(size, repeat, recorder, rng):
+    from django.test import Client
+
+    room, ids = seed_room(size, rng)
+    admin = Client()
+    login(admin, room, ids[0], True)
+    player = Client()
+    login(player, room, ids[-1], False)
+
+    # One client for every anonymous visit, as each new client builds the middleware again
+    visitor = Client()
+    for _ in range(repeat):
+        recorder.request(size, 'home:get', lambda: visitor.get('/'))
+
+    # Each join adds a participant, so the room ends up `repeat` people larger
+    for i in range(repeat):
+        newcomer = Client()
+        newcomer.post('/', {'action': 'join_room', 'room_code': room.code})
+        recorder.request(size, 'choose_name:post', lambda: newcomer.post('/name/', {'name': f"Invitado {i}"}))
+
+    for _ in range(repeat):
+        recorder.request(size, 'prediction:get', lambda: player.get('/predict/'))
+    for _ in range(repeat):
+        receiver, giver = rng.sample(ids, 2)
+        recorder.request(size, 'prediction:post', lambda: player.post('/predict/', {f'giver_for_{receiver}': giver}))
+
+    for _ in range(repeat):
+        recorder.request(size, 'admin_dashboard:get', lambda: admin.get('/admin-panel/'))
+    for _ in range(repeat):
+        recorder.request(size, 'admin_dashboard:generate', lambda: admin.post(
+            '/admin-panel/', {'action': 'generate_assignments', 'draw_mode': 'any'}
+        ))
+    recorder.request(size, 'admin_dashboard:enable_results', lambda: admin.post('/admin-panel/', {'action': 'enable_results'}))
+
+    for _ in range(repeat):
+        recorder.request(size, 'results:get', lambda: player.get('/results/'))
+    for _ in range(repeat):
+        recorder.request(size, 'results:get_admin', lambda: admin.get('/results/'))
+
+    check_end_state(room, admin, player)
+
+
+def check_end_state(room, admin, player):
+    """Raises RuntimeError if the room did not end the lifecycle in a correct state."""
+    from core.models import Room
+    from core.predictions import get_room_predictions
+
+    room.refresh_from_db()
+    if room.status != Room.STATUS_RESULTS:
+        raise RuntimeError(f"Room {room.code} ended in status {room.status}")
+
+    ids = set(room.participants.values_list('id', flat=True))
+    assignments = list(room.active_assignments().values_list('giver_id', 'receiver_id'))
+    givers = [giver_id for giver_id, _ in assignments]
+    receivers = [receiver_id for _, receiver_id in assignments]
+    if sorted(givers) != sorted(ids) or sorted(receivers) != sorted(ids):
+        raise RuntimeError(f"Room {room.code}: not every participant gives and receives exactly once")
+    if any(giver_id == receiver_id for giver_id, receiver_id in assignments):
+        raise RuntimeError(f"Room {room.code}: somebody gives to themselves")
+
+    receiver_of = dict(assignments)
+    expected = dict.fromkeys(ids, 0)
+    for user_id, giver_id, receiver_id in get_room_predictions(room):
+        if receiver_of.get(giver_id) == receiver_id:
+            expected[user_id] += 1
+    stored = dict(room.scores.values_list('participant_id', 'score'))
+    if stored != expected:
+        wrong = sum(stored.get(participant_id) != score for participant_id, score in expected.items())
+        raise RuntimeError(f"Room {room.code}: {wrong} stored scores differ from a naive recount")
+
+    for label, client in (('player', player), ('admin', admin)):
+        response = client.get('/results/')
+        if response.status_code != 200:
+            raise RuntimeError(f"Room {room.code}: results page answered {response.status_code} for the {label}")
+
+
+def compare(summary, baseline, tolerance):
+    """Returns a list of regressions of `summary` against `baseline`."""
+    regressions = []
+    for size, views in summary.items():
+        if size not in baseline:
+            regressions.append(f"no baseline for rooms of {size}")
+            continue
+        for label, current in views.items():
+            expected = baseline[size].get(label)
+            if expected is None:
+                regressions.append(f"{label} @ {size}: no baseline")
+                continue
+            if current['queries'] > expected['queries']:
+                regressions.append(f"{label} @ {size}: {current['queries']} queries (baseline {expected['queries']})")
+            if 'p50_ms' not in expected:
+                continue
+            limit = expected['p50_ms'] * (1 + tolerance)
+            if current['p50_ms'] > limit:
+                regressions.append(
+                    f"{label} @ {size}: p50 {current['p50_ms']:.1f} ms (baseline {expected['p50_ms']:.1f} ms, limit {limit:.1f} ms)"
+                )
+    return regressions
+
+
+def load_baseline(path):
+    """Returns the baseline stored at `path`, or None if there is none."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run as the new baseline.")
+    parser.add_argument('--queries-only', action='store_true', help="Store only the query counts with --save-baseline.")
+    parser.add_argument('--tolerance', type=float, default=0.5, help="Allowed relative growth of the median latency.")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test.utils import setup_test_environment
+    setup_test_environment()
+
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+    for size in args.sizes:
+        started = time.perf_counter()
+        run_lifecycle(size, args.repeat, recorder, rng)
+        print(f"Room of {size} done in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    summary = recorder.summary()
+    print(f"{'view':<32} {'n':>6} {'p50':>10} {'p95':>10} {'p99':>10} {'queries':>8}")
+    for size, views in summary.items():
+        for label, stats in views.items():
+            print(
+                f"{label:<32} {size:>6} {stats['p50_ms']:>7.1f} ms {stats['p95_ms']:>7.1f} ms "
+                f"{stats['p99_ms']:>7.1f} ms {stats['queries']:>8}"
+            )
+
+    from core.predictions import STORAGE
+
+    baseline = load_baseline(args.baseline)
+    if args.save_baseline:
+        if baseline is None or baseline['storage'] != STORAGE:
+            baseline = {'storage': STORAGE, 'sizes': {}}
+        for size, views in summary.items():
+            if args.queries_only:
+                views = {label: {'queries': stats['queries']} for label, stats in views.items()}
+            baseline['sizes'][size] = views
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; record one with --save-baseline.")
+        sys.exit(1)
+    if baseline['storage'] != STORAGE:
+        print(f"The baseline was recorded with PREDICTION_STORAGE={baseline['storage']!r}, not {STORAGE!r}.")
+        sys.exit(1)
+    regressions = compare(summary, baseline['sizes'], args.tolerance)
+    if regressions:
+        print("Regressions against the baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("No regressions against the baseline.")
+
+
+if __name__ == '__main__':
+    main()
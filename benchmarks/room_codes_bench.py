@@ -0,0 +1,74 @@
+"""
+Benchmark of room creation throughput with many existing rooms.
+
+Seeds the database with random room codes (as the old generator made
+them) and then compares creating rooms with the legacy probe-and-check
+generator against the collision-free allocator in core.codes.
+
+Usage:
+    python -m benchmarks.room_codes_bench
+    python -m benchmarks.room_codes_bench --existing 100000 --rooms 2000
+"""
+import argparse
+import random
+import time
+
+from benchmarks.utils import setup_django
+
+BATCH_SIZE = 5000
+
+
+def seed_rooms(count):
+    from core.codes import ALPHABET, CODE_LENGTH
+    from core.models import Room
+
+    codes = set()
+    while len(codes) < count:
+        codes.add(''.join(random.choices(ALPHABET, k=CODE_LENGTH)))
+    codes = list(codes)
+    for start in range(0, count, BATCH_SIZE):
+        Room.objects.bulk_create(Room(code=code) for code in codes[start:start + BATCH_SIZE])
+
+
+def legacy_create_room():
+    from core.codes import ALPHABET, CODE_LENGTH
+    from core.models import Room
+
+    while True:
+        code = ''.join(random.choices(ALPHABET, k=CODE_LENGTH))
+        if not Room.objects.filter(code=code).exists():
+            return Room.objects.create(code=code)
+
+
+def measure(label, create, rooms):
+    from django.db import connection, reset_queries
+    from django.test.utils import CaptureQueriesContext
+
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        for _ in range(rooms):
+            create()
+        elapsed = time.perf_counter() - started
+    print(f"{label:<12} {rooms / elapsed:>10.0f} rooms/s  {len(queries) / rooms:>6.2f} queries/room")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--existing', type=int, default=1_000_000)
+    parser.add_argument('--rooms', type=int, default=5000)
+    args = parser.parse_args()
+
+    setup_django()
+    from core.codes import create_room
+
+    started = time.perf_counter()
+    seed_rooms(args.existing)
+    print(f"Seeded {args.existing} rooms in {time.perf_counter() - started:.1f}s")
+
+    measure('legacy', legacy_create_room, args.rooms)
+    measure('allocator', create_room, args.rooms)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Request throughput with database sessions against signed cookie sessions.
+
+Each backend runs in its own process, because SESSION_ENGINE is read
+once at startup:
+
+    db               django.contrib.sessions.backends.db (SESSION_BACKEND=db)
+    signed_cookies   core.sessions (the default)
+
+In each run a room is seeded, --sessions participants are logged in and
+the test client requests every path in --paths round-robin across those
+sessions for --duration seconds. Joining a room is measured as well,
+because it is the request that writes a new session. The report shows
+requests per second and the average number of SQL queries per request,
+which includes the session reads and writes on the database backend.
+
+Usage:
+    python -m benchmarks.session_bench
+    DATABASE_URL=postgres://... python -m benchmarks.session_bench --duration 20
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+BACKENDS = ['db', 'signed_cookies']
+
+
+def measure(send, duration):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    requests = 0
+    with CaptureQueriesContext(connection) as queries:
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            response = send(requests)
+            if response.status_code not in (200, 302):
+                raise RuntimeError(f"Request answered {response.status_code}")
+            requests += 1
+    return {'requests_per_second': requests / duration, 'queries_per_request': len(queries) / max(requests, 1)}
+
+
+def run_backend(args):
+    from benchmarks.utils import setup_django
+    setup_django()
+    from benchmarks.lifecycle_bench import login, seed_room
+    from django.test import Client
+
+    rng = random.Random(args.seed)
+    room, ids = seed_room(args.participants, rng)
+    clients = []
+    for participant_id in rng.sample(ids, min(args.sessions, len(ids))):
+        client = Client()
+        login(client, room, participant_id, participant_id == ids[0])
+        clients.append(client)
+
+    results = {}
+    for path in args.paths:
+        results[path] = measure(lambda i: clients[i % len(clients)].get(path), args.duration)
+
+    def join(i):
+        client = Client()
+        return client.post('/', {'action': 'join_room', 'room_code': room.code})
+
+    results['join'] = measure(join, args.duration)
+    print(json.dumps(results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=BACKENDS)
+    parser.add_argument('--participants', type=int, default=200)
+    parser.add_argument('--sessions', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--paths', nargs='+', default=['/dashboard/', '/api/progress/'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--run', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_backend(args)
+        return
+
+    print(f"{'backend':<16} {'request':<16} {'req/s':>8} {'queries':>8}")
+    for backend in args.backends:
+        env = dict(os.environ, SESSION_BACKEND=backend)
+        command = [
+            sys.executable, '-m', 'benchmarks.session_bench', '--run',
+            '--participants', str(args.participants), '--sessions', str(args.sessions),
+            '--duration', str(args.duration), '--seed', str(args.seed), '--paths', *args.paths,
+        ]
+        output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+        for label, result in json.loads(output.strip().splitlines()[-1]).items():
+            print(f"{backend:<16} {label:<16} {result['requests_per_second']:>8.0f} {result['queries_per_request']:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
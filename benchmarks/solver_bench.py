@@ -0,0 +1,66 @@
+"""
+Benchmark for the constraint-aware draw solver (core.solver).
+
+Times core.solver.solve for growing rooms and exclusion densities, plus a
+"teams" layout where nobody can gift someone on their own team.
+
+Usage:
+    python -m benchmarks.solver_bench
+    python -m benchmarks.solver_bench --sizes 1000 5000 --densities 0.01 0.1
+"""
+import argparse
+import random
+import time
+
+from core.solver import InfeasibleError, solve
+
+
+def random_exclusions(n, density, rng):
+    """Each giver excludes `density * n` random receivers."""
+    k = int(n * density)
+    return {giver: set(rng.sample(range(n), k)) for giver in range(n)} if k else {}
+
+
+def team_exclusions(n, team_size):
+    """Nobody gifts someone from their own team."""
+    exclusions = {}
+    for giver in range(n):
+        start = giver - giver % team_size
+        exclusions[giver] = set(range(start, min(start + team_size, n)))
+    return exclusions
+
+
+def run(label, n, exclusions, repeat):
+    pairs = sum(len(receivers) for receivers in exclusions.values())
+    timings = []
+    result = 'ok'
+    for _ in range(repeat):
+        started = time.perf_counter()
+        try:
+            solve(n, exclusions, avoid_mutual=True)
+        except InfeasibleError:
+            result = 'infeasible'
+        timings.append(time.perf_counter() - started)
+    best = min(timings) * 1000
+    print(f"{label:<14} {n:>7} {pairs:>10} {best:>10.1f} ms  {result}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 2500, 5000])
+    parser.add_argument('--densities', type=float, nargs='+', default=[0.0, 0.01, 0.05, 0.2])
+    parser.add_argument('--team-size', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'case':<14} {'n':>7} {'exclusions':>10} {'best':>13}  result")
+    for n in args.sizes:
+        for density in args.densities:
+            run(f"random {density:.0%}", n, random_exclusions(n, density, rng), args.repeat)
+        run(f"teams of {args.team_size}", n, team_exclusions(n, args.team_size), args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,24 @@
+"""
+Shared helpers for the benchmarks that need a configured Django project.
+"""
+import os
+import tempfile
+
+
+def setup_django(migrate=True):
+    """
+    Configures Django against a throwaway SQLite database (unless
+    DATABASE_URL is already set) and applies the migrations.
+    """
+    if 'DATABASE_URL' not in os.environ:
+        path = os.path.join(tempfile.mkdtemp(prefix='amigo-bench-'), 'bench.sqlite3')
+        os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'amigo_secreto.settings')
+    # Benchmarks do not run collectstatic, so there is no manifest to resolve hashed names
+    os.environ.setdefault('STATIC_MANIFEST', 'False')
+
+    import django
+    django.setup()
+    if migrate:
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0)
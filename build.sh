@@ -3,12 +3,15 @@
 set -o errexit
 
 # Install Node.js dependencies
-# npm install
+npm install
 
-# # Build Tailwind CSS
-# npm run build:css
+# Build the purged Tailwind CSS and copy the self-hosted fonts into static/vendor
+npm run build
 
 pip install -r requirements.txt
 
+# Fail the build if a template uses a class the compiled CSS does not define
+python manage.py check_css_classes
+
 python manage.py collectstatic --no-input
 python manage.py migrate
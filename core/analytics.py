@@ -0,0 +1,166 @@
+"""
+Prediction heatmap: who the room collectively suspects gives to whom.
+
+The predictions are reduced to an n x n count matrix (receiver rows,
+giver columns, participants in name order) with one
+GROUP BY predicted_receiver, predicted_giver query, so no Prediction
+object is ever loaded. Packed vectors cannot be grouped in SQL; they are
+expanded with the scoring kernel and counted with numpy instead.
+
+Only the sparse (receiver, giver, votes) triples are cached, in the
+fragments cache keyed by room version, and the dense matrix is rebuilt
+from them on each request with one bincount. Entries expire after
+HEATMAP_CACHE_TIMEOUT seconds, or HEATMAP_LIVE_TIMEOUT while predictions
+are still open (they change without a version bump), and rooms with more
+than HEATMAP_CACHE_MAX_CELLS non-empty cells are not cached at all, so a
+few large rooms cannot pin the memory of every worker. The page renders
+the per-receiver consensus as HTML and draws the heatmap on a canvas
+from the raw matrix, which is served as a binary array instead of a
+million table cells.
+"""
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count
+from django.http import HttpResponse
+from django.shortcuts import render
+
+from .context import room_required
+from .models import Prediction, Room
+from .predictions import STORAGE, STORAGE_PACKED
+
+# Seconds the counts are reused while participants can still change their predictions
+HEATMAP_LIVE_TIMEOUT = getattr(settings, 'HEATMAP_LIVE_TIMEOUT', 30)
+# Seconds the counts are reused once predictions are locked
+HEATMAP_CACHE_TIMEOUT = getattr(settings, 'HEATMAP_CACHE_TIMEOUT', 3600)
+# Rooms with more non-empty cells than this (about 6 bytes each, so at most 6 MB for any room
+# of up to 1,000 people) are counted on every request
+HEATMAP_CACHE_MAX_CELLS = getattr(settings, 'HEATMAP_CACHE_MAX_CELLS', 1000000)
+
+
+class Heatmap:
+    """
+    A room's prediction counts as sparse triples: `votes[k]` predictions
+    that participant `givers[k]` gives to participant `receivers[k]`, as
+    positions in `names` (name order).
+    """
+
+    def __init__(self, participant_ids, names, receivers, givers, votes):
+        self.participant_ids = participant_ids
+        self.names = names
+        self.receivers = receivers
+        self.givers = givers
+        self.votes = votes
+
+    def counts(self):
+        """Returns the dense matrix where `counts[r, g]` is the votes for g giving to r."""
+        n = len(self.names)
+        flat = np.bincount(
+            self.receivers.astype(np.int64) * n + self.givers, weights=self.votes, minlength=n * n
+        )
+        return flat.astype(self.votes.dtype).reshape(n, n)
+
+    def consensus(self, counts):
+        """
+        Returns, for every receiver that got predictions, a dict with the
+        most predicted giver, their votes, the total votes and the share of
+        the votes they got, strongest consensus first.
+        """
+        if not self.names:
+            return []
+        totals = counts.sum(axis=1, dtype=np.int64)
+        top = counts.argmax(axis=1)
+        top_votes = counts[np.arange(len(self.names)), top]
+        rows = [
+            {
+                'receiver': self.names[receiver],
+                'giver': self.names[top[receiver]],
+                'votes': int(top_votes[receiver]),
+                'total': int(totals[receiver]),
+                'share': int(top_votes[receiver]) * 100 // int(totals[receiver]),
+            }
+            for receiver in np.flatnonzero(totals)
+        ]
+        rows.sort(key=lambda row: (-row['share'], -row['votes'], row['receiver']))
+        return rows
+
+
+def count_pairs(room):
+    """Builds the room's Heatmap from its stored predictions."""
+    participants = list(room.participants.order_by('name').values_list('id', 'name'))
+    ids = np.array([participant_id for participant_id, _ in participants], dtype=np.int64)
+    n = len(ids)
+
+    if STORAGE == STORAGE_PACKED:
+        from .scoring import load_packed_predictions
+        predictions = load_packed_predictions(room.id)
+        # Packed vectors hold one row per prediction, so pairs are counted here instead of in SQL
+        pairs, votes = np.unique(predictions[:, [2, 1]], axis=0, return_counts=True)
+        pairs = np.column_stack([pairs.reshape(-1, 2), votes])
+    else:
+        pairs = np.array(
+            list(
+                Prediction.objects.filter(room=room)
+                .values_list('predicted_receiver_id', 'predicted_giver_id')
+                .annotate(count=Count('id'))
+                .order_by()
+            ),
+            dtype=np.int64,
+        ).reshape(-1, 3)
+
+    # Participant id -> position in name order
+    by_id = np.argsort(ids)
+    sorted_ids = ids[by_id]
+    # Positions and counts never exceed the number of participants, so 16 bits are enough for any realistic room
+    dtype = np.uint16 if n <= np.iinfo(np.uint16).max else np.uint32
+    return Heatmap(
+        ids.tolist(),
+        [name for _, name in participants],
+        by_id[np.searchsorted(sorted_ids, pairs[:, 0])].astype(dtype),
+        by_id[np.searchsorted(sorted_ids, pairs[:, 1])].astype(dtype),
+        pairs[:, 2].astype(dtype),
+    )
+
+
+def get_heatmap(room):
+    """Returns the room's Heatmap, from the cache when it is still current."""
+    version, status = Room.objects.filter(pk=room.pk).values_list('version', 'status').get()
+    cache = caches['fragments']
+    key = f'heatmap-{room.id}-{version}'
+    heatmap = cache.get(key)
+    if heatmap is None:
+        heatmap = count_pairs(room)
+        if len(heatmap.votes) <= HEATMAP_CACHE_MAX_CELLS:
+            timeout = HEATMAP_LIVE_TIMEOUT if status == Room.STATUS_PREDICTING else HEATMAP_CACHE_TIMEOUT
+            cache.set(key, heatmap, timeout)
+    return heatmap
+
+
+@room_required(admin=True)
+def analytics_view(request):
+    """
+    Displays the prediction heatmap and the per-receiver consensus. Only
+    accessible by the room admin.
+    """
+    room = request.room
+    heatmap = get_heatmap(room)
+    counts = heatmap.counts()
+    context = {
+        'room': room,
+        'consensus': heatmap.consensus(counts),
+        'heatmap_names': heatmap.names,
+        'heatmap_max': int(counts.max()) if heatmap.names else 0,
+        'heatmap_dtype': counts.dtype.name,
+    }
+    return render(request, 'core/analytics.html', context)
+
+
+@room_required(admin=True)
+def heatmap_data_view(request):
+    """Serves the heatmap's count matrix as raw little-endian integers, row by row."""
+    heatmap = get_heatmap(request.room)
+    counts = heatmap.counts()
+    counts = counts.astype(counts.dtype.newbyteorder('<'), copy=False)
+    response = HttpResponse(counts.tobytes(), content_type='application/octet-stream')
+    response['X-Heatmap-Size'] = str(len(heatmap.names))
+    return response
@@ -0,0 +1,245 @@
+"""
+JSON endpoints for the prediction page and for clients polling room state.
+
+The prediction page fetches the roster once and renders the receiver
+cards incrementally in the browser, so its size grows with the number of
+participants instead of its square. Each changed field is saved on its
+own through `predictions_view`, which only writes what differs from the
+stored predictions.
+
+The read endpoints carry strong ETags derived from the room version and
+counters. Those are read with one small query, so a poll whose
+If-None-Match still matches is answered with 304 before any of the
+payload is built.
+"""
+import json
+
+from django.conf import settings
+from django.http import Http404, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_http_methods
+
+from .context import room_required
+from .leaderboard import get_ranking
+from .models import Participant, Room, Season
+from .predictions import PredictionsLockedError, get_predictions_map, save_predictions
+from .seasons import SEASON_LEADERBOARD_SIZE, get_standings
+from . import events
+
+# Upper bound for the `limit` of the season leaderboard
+SEASON_LEADERBOARD_MAX_SIZE = getattr(settings, 'SEASON_LEADERBOARD_MAX_SIZE', 500)
+
+
+def _progress(room, predictions_map):
+    # Expects a room refreshed by `_read_state`
+    return {'completed': len(predictions_map), 'total': room.participant_count}
+
+
+def _read_state(request):
+    """
+    Refreshes the request's room status, version and counters and the
+    caller's predictions_count with one joined query (the resolved room
+    may come from the per-process cache).
+    """
+    room = request.room
+    participant = request.participant
+    (
+        participant.predictions_count,
+        room.status,
+        room.version,
+        room.participant_count,
+    ) = Participant.objects.filter(pk=participant.pk).values_list(
+        'predictions_count', 'room__status', 'room__version', 'room__participant_count'
+    ).get()
+
+
+def _conditional_json(request, etag, build):
+    """
+    Answers with 304 when the client already holds `etag`, and otherwise
+    with the JSON object returned by `build()`. Clients must revalidate on
+    every use, so a stale copy is never shown.
+    """
+    etag = quote_etag(etag)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = JsonResponse(build())
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@require_http_methods(['GET'])
+@room_required(json=True)
+def room_status_view(request):
+    """Returns the room's status and participant count."""
+    room = request.room
+    _read_state(request)
+    return _conditional_json(
+        request,
+        f'room-{room.id}-{room.version}-{room.participant_count}',
+        lambda: {
+            'code': room.code,
+            'status': room.status,
+            'status_display': room.get_status_display(),
+            'version': room.version,
+            'participant_count': room.participant_count,
+        },
+    )
+
+
+@require_http_methods(['GET'])
+@room_required(json=True)
+def roster_view(request):
+    """Returns every participant of the room as [{'id', 'name'}], ordered by name."""
+    room = request.room
+    participant = request.participant
+    _read_state(request)
+    # Participants are only ever added, so the count identifies the roster
+    return _conditional_json(
+        request,
+        f'roster-{room.id}-{room.participant_count}-{participant.id}',
+        lambda: {
+            'participants': list(room.participants.order_by('name').values('id', 'name')),
+            'me': participant.id,
+        },
+    )
+
+
+@require_http_methods(['GET'])
+@room_required(json=True)
+def progress_view(request):
+    """Returns how many of the required predictions the caller has made."""
+    room = request.room
+    participant = request.participant
+    _read_state(request)
+    completed = participant.predictions_count
+    total = room.participant_count
+    return _conditional_json(
+        request,
+        f'progress-{participant.id}-{completed}-{total}',
+        lambda: {'completed': completed, 'total': total, 'sent': completed == total},
+    )
+
+
+@require_http_methods(['GET'])
+@room_required(json=True)
+def results_view(request):
+    """
+    Returns the ranking as [{'name', 'score', 'rank', 'is_winner'}] and, for
+    the admin, the actual assignments. Answers 409 until results are enabled.
+    """
+    room = request.room
+    is_admin = request.participant.is_admin
+    _read_state(request)
+    if room.status != Room.STATUS_RESULTS:
+        return JsonResponse({'error': "Los resultados aún no han sido habilitados."}, status=409)
+
+    def build():
+        ranking = [
+            {'name': score.participant.name, 'score': score.score, 'rank': score.rank, 'is_winner': score.is_winner}
+            for score in get_ranking(room)
+        ]
+        data = {'ranking': ranking, 'winners': [entry['name'] for entry in ranking if entry['is_winner']]}
+        if is_admin:
+            data['assignments'] = [
+                {'giver': giver, 'receiver': receiver}
+                for giver, receiver in room.active_assignments().values_list('giver__name', 'receiver__name')
+            ]
+        return data
+
+    # Scores and assignments only change together with the room version
+    return _conditional_json(request, f"results-{room.id}-{room.version}-{'admin' if is_admin else 'user'}", build)
+
+
+@require_http_methods(['GET'])
+def season_view(request, slug):
+    """
+    Returns the season leaderboard as [{'name', 'score', 'rank', 'rooms', 'wins'}],
+    limited to the top `limit` players (query parameter). Public, like the
+    season page.
+    """
+    try:
+        season = Season.objects.get(slug=slug)
+    except Season.DoesNotExist:
+        raise Http404("Temporada no encontrada.")
+    try:
+        limit = int(request.GET.get('limit', SEASON_LEADERBOARD_SIZE))
+    except ValueError:
+        return JsonResponse({'error': "El parámetro limit debe ser un número."}, status=400)
+    limit = max(1, min(limit, SEASON_LEADERBOARD_MAX_SIZE))
+
+    standings = [
+        {'name': standing.name, 'score': standing.score, 'rank': standing.rank, 'rooms': standing.rooms, 'wins': standing.wins}
+        for standing in get_standings(season, limit)
+    ]
+    return JsonResponse({'season': season.name, 'standings': standings})
+
+
+@require_http_methods(['GET', 'POST'])
+@room_required(json=True)
+def predictions_view(request):
+    """
+    GET returns the user's predictions as {receiver_id: giver_id}.
+
+    POST takes {"predictions": {receiver_id: giver_id}} and upserts only the
+    entries that changed. Invalid entries are reported per receiver in
+    `errors` and the rest are still saved.
+    """
+    room = request.room
+    current_participant = request.participant
+    # The status and the total of `_progress` come from the database, not the cached room
+    _read_state(request)
+    predictions_map = get_predictions_map(room, current_participant)
+
+    if request.method == 'GET':
+        return JsonResponse({
+            'predictions': predictions_map,
+            'editable': room.status == Room.STATUS_PREDICTING,
+            **_progress(room, predictions_map),
+        })
+
+    if room.status != Room.STATUS_PREDICTING:
+        return JsonResponse({'error': "Las predicciones están bloqueadas."}, status=409)
+
+    try:
+        submitted = json.loads(request.body)['predictions']
+        submitted = {int(receiver_id): giver_id for receiver_id, giver_id in submitted.items()}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return JsonResponse({'error': "Formato de predicciones inválido."}, status=400)
+
+    # Only the participants named in the request are loaded
+    ids = set(submitted)
+    for giver_id in submitted.values():
+        try:
+            ids.add(int(giver_id))
+        except (TypeError, ValueError):
+            pass
+    participants_by_id = room.participants.in_bulk(ids)
+
+    errors = {}
+    choices = {}
+    for receiver_id, giver_id in submitted.items():
+        receiver = participants_by_id.get(receiver_id)
+        if receiver is None:
+            errors[receiver_id] = "Participante desconocido."
+        else:
+            choices[receiver] = giver_id
+
+    try:
+        invalid_receivers = save_predictions(room, current_participant, choices, participants_by_id, predictions_map)
+    except PredictionsLockedError:
+        return JsonResponse({'error': "Las predicciones están bloqueadas."}, status=409)
+    for receiver in invalid_receivers:
+        if str(choices[receiver]) == str(receiver.id):
+            errors[receiver.id] = "Nadie puede regalarse a sí mismo."
+        else:
+            errors[receiver.id] = f"Error al procesar la predicción para {receiver.name}."
+
+    saved = {receiver.id: participants_by_id[int(giver_id)].id for receiver, giver_id in choices.items() if receiver.id not in errors}
+    added = saved.keys() - predictions_map.keys()
+    predictions_map.update(saved)
+    if added:
+        events.prediction_progress(room, current_participant, len(predictions_map), room.participant_count)
+
+    return JsonResponse({'errors': errors, **_progress(room, predictions_map)})
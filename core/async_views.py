@@ -0,0 +1,140 @@
+"""
+Async versions of the hottest views, for ASGI deployments.
+
+They render the same templates as their counterparts in core.views but
+read through the async ORM, so waiting on the database does not hold a
+worker thread. Async ORM calls of one request all run in the same sync
+thread, so the reads are awaited one after the other. Writes still run
+the sync helpers through sync_to_async, because transactions are not
+available to async code. core.urls routes to these views when
+ASYNC_VIEWS is enabled.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+from django.shortcuts import redirect, render
+from django.urls import reverse
+
+from . import events
+from .context import room_required
+from .leaderboard import get_results
+from .models import Participant, Room
+from .predictions import PredictionsLockedError, aget_predictions_map, parse_prediction_form, save_predictions
+from .views import FRAGMENT_CACHE_TIMEOUT
+
+
+@room_required
+async def dashboard_view(request):
+    """
+    Displays the main dashboard for a participant in a room.
+    """
+    room = request.room
+    participant = request.participant
+
+    completed_predictions_count, total_participants = await (
+        Participant.objects.filter(pk=participant.pk).values_list('predictions_count', 'room__participant_count').aget()
+    )
+    participants_list = [name async for name in room.participants.values_list('name', flat=True)]
+    is_admin = await request.session.aget('is_admin', False)
+    # A user makes a prediction for each participant, including themselves (who gifts to me?)
+    required_predictions_per_user = total_participants
+
+    context = {
+        'room': room,
+        'participant': participant,
+        'is_admin': is_admin,
+        'total_participants': total_participants,
+        'participants_list': participants_list,
+        'completed_predictions_count': completed_predictions_count,
+        'required_predictions_per_user': required_predictions_per_user,
+        'predictions_sent': completed_predictions_count == required_predictions_per_user,
+    }
+    return render(request, 'core/dashboard.html', context)
+
+
+@room_required
+async def prediction_view(request):
+    """
+    Allows a participant to make predictions for who gives gifts to whom.
+    """
+    room = request.room
+    current_participant = request.participant
+
+    if room.status != Room.STATUS_PREDICTING:
+        messages.warning(request, "Las predicciones están bloqueadas o los resultados ya han sido revelados.")
+        return redirect(reverse('core:dashboard'))
+
+    if request.method == 'POST':
+        if 'confirm_all' in request.POST:
+            messages.success(request, "¡Tus predicciones han sido enviadas!")
+            return redirect(reverse('core:dashboard'))
+
+        submitted = parse_prediction_form(request.POST)
+        participants_by_id = await room.participants.ain_bulk()
+        predictions_map = await aget_predictions_map(room, current_participant)
+        choices = {
+            participants_by_id[receiver_id]: predicted_giver_id
+            for receiver_id, predicted_giver_id in submitted.items()
+            if receiver_id in participants_by_id
+        }
+
+        try:
+            invalid_receivers = await sync_to_async(save_predictions)(
+                room, current_participant, choices, participants_by_id, predictions_map
+            )
+        except PredictionsLockedError:
+            messages.warning(request, "Las predicciones están bloqueadas o los resultados ya han sido revelados.")
+            return redirect(reverse('core:dashboard'))
+        for receiver in invalid_receivers:
+            messages.error(request, f"Error al procesar la predicción para {receiver.name}.")
+
+        completed = predictions_map.keys() | {receiver.id for receiver in choices if receiver not in invalid_receivers}
+        await sync_to_async(events.prediction_progress)(room, current_participant, len(completed), len(participants_by_id))
+        messages.success(request, "Predicciones guardadas.")
+        return redirect(reverse('core:prediction'))
+
+    # The roster and the current predictions are fetched from the JSON API by the page itself
+    context = {
+        'room': room,
+        'current_participant': current_participant,
+    }
+    return render(request, 'core/prediction.html', context)
+
+
+@room_required
+async def results_view(request):
+    """
+    Displays the results of the Secret Santa draw and the prediction ranking.
+    """
+    room = request.room
+    current_participant = request.participant
+
+    room.status, room.version = await Room.objects.filter(pk=room.pk).values_list('status', 'version').aget()
+
+    if room.status != Room.STATUS_RESULTS:
+        messages.warning(request, "Los resultados aún no han sido habilitados por el administrador.")
+        return redirect(reverse('core:dashboard'))
+
+    # Templates cannot await lazy queries, so the results are only built up
+    # front when one of the fragments this user sees is missing from the cache.
+    show_actual_assignments = current_participant.is_admin
+    fragment_keys = [make_template_fragment_key('results_ranking', [room.id, room.version])]
+    if show_actual_assignments:
+        fragment_keys.append(make_template_fragment_key('results_assignments', [room.id, room.version, True]))
+    cached = await caches['fragments'].aget_many(fragment_keys)
+    if len(cached) < len(fragment_keys):
+        results = await sync_to_async(get_results)(room)
+    else:
+        results = {'ranking': [], 'winners': [], 'assignments': []}
+
+    context = {
+        'room': room,
+        'current_participant': current_participant,
+        'ranking': results['ranking'],
+        'winners': results['winners'],
+        'actual_assignments': results['assignments'] if show_actual_assignments else [],
+        'show_actual_assignments': show_actual_assignments,
+        'fragment_cache_timeout': FRAGMENT_CACHE_TIMEOUT,
+    }
+    return render(request, 'core/results.html', context)
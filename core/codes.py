@@ -0,0 +1,107 @@
+"""
+Collision-free room code allocator.
+
+Room codes are 6 characters from A-Z0-9, a space of 36**6 codes. A keyed
+Feistel network turns that space into a pseudo-random permutation, so
+encoding consecutive counter values yields distinct, unguessable codes
+without checking the database. Counter values are reserved in blocks
+(one UPDATE per block) and handed out from memory.
+
+The unique constraint on Room.code stays as a safety net, e.g. against
+codes created randomly before this allocator existed.
+"""
+import hashlib
+import string
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import Room, RoomCodeCounter
+
+ALPHABET = string.ascii_uppercase + string.digits
+CODE_LENGTH = 6
+HALF_SPACE = len(ALPHABET) ** (CODE_LENGTH // 2)
+CODE_SPACE = HALF_SPACE * HALF_SPACE
+FEISTEL_ROUNDS = 4
+
+# Counter values reserved per database round trip.
+BLOCK_SIZE = getattr(settings, 'ROOM_CODE_BLOCK_SIZE', 100)
+
+# Attempts before giving up when codes keep hitting existing rooms.
+MAX_CREATE_ATTEMPTS = 10
+
+_lock = threading.Lock()
+_next_value = 0
+_block_end = 0
+
+
+def _round_key():
+    secret = getattr(settings, 'ROOM_CODE_KEY', settings.SECRET_KEY)
+    return hashlib.sha256(f"room-code:{secret}".encode()).digest()
+
+
+_KEY = _round_key()
+
+
+def _round(round_number, half):
+    digest = hashlib.blake2b(
+        round_number.to_bytes(1, 'big') + half.to_bytes(4, 'big'),
+        key=_KEY,
+        digest_size=8,
+    ).digest()
+    return int.from_bytes(digest, 'big') % HALF_SPACE
+
+
+def permute(value):
+    """Maps a counter value in [0, CODE_SPACE) to a unique value in the same range."""
+    left, right = divmod(value, HALF_SPACE)
+    for round_number in range(FEISTEL_ROUNDS):
+        left, right = right, (left + _round(round_number, right)) % HALF_SPACE
+    return left * HALF_SPACE + right
+
+
+def encode(value):
+    """Encodes a value in [0, CODE_SPACE) as a 6-character code."""
+    chars = []
+    for _ in range(CODE_LENGTH):
+        value, digit = divmod(value, len(ALPHABET))
+        chars.append(ALPHABET[digit])
+    return ''.join(reversed(chars))
+
+
+def _reserve_block(size):
+    """Reserves `size` counter values and returns the first one."""
+    with transaction.atomic():
+        if not RoomCodeCounter.objects.filter(pk=1).update(next_value=F('next_value') + size):
+            RoomCodeCounter.objects.get_or_create(pk=1)
+            RoomCodeCounter.objects.filter(pk=1).update(next_value=F('next_value') + size)
+        end = RoomCodeCounter.objects.values_list('next_value', flat=True).get(pk=1)
+    return end - size
+
+
+def next_room_code():
+    """Returns a room code that has never been handed out by this allocator."""
+    global _next_value, _block_end
+    with _lock:
+        if _next_value >= _block_end:
+            _next_value = _reserve_block(BLOCK_SIZE)
+            _block_end = _next_value + BLOCK_SIZE
+        value = _next_value
+        _next_value += 1
+    if value >= CODE_SPACE:
+        raise RuntimeError("The room code space is exhausted.")
+    return encode(permute(value))
+
+
+def create_room(**fields):
+    """Creates a Room with a freshly allocated code."""
+    for _ in range(MAX_CREATE_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                return Room.objects.create(code=next_room_code(), **fields)
+        except IntegrityError:
+            # Only hit when a pre-existing room already uses the code.
+            continue
+    raise RuntimeError("Could not allocate a free room code.")
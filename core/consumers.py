@@ -0,0 +1,37 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .events import room_group_name
+
+
+@database_sync_to_async
+def _session_room_code(session):
+    return session.get('room_code') if session is not None else None
+
+
+class RoomConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Pushes live events of a single room (joins, prediction progress,
+    status changes and results) to the participants of that room.
+    """
+
+    async def connect(self):
+        self.room_code = self.scope['url_route']['kwargs']['room_code']
+        # Only sockets whose session belongs to this room may listen in.
+        if await _session_room_code(self.scope.get('session')) != self.room_code:
+            await self.close()
+            return
+        self.group_name = room_group_name(self.room_code)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        # The socket is push-only; clients change state through the views.
+        pass
+
+    async def room_event(self, event):
+        await self.send_json(event['payload'])
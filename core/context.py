@@ -0,0 +1,237 @@
+"""
+Request-scoped room and participant context.
+
+The `room_required` decorator resolves the session's room and participant
+once per request with a single joined query and attaches them to the
+request as `request.room` and `request.participant`. Resolved rows are
+kept in a small per-process LRU cache with a TTL; the room entry is
+invalidated whenever the room is saved (see core.signals), and the TTL
+bounds how long other processes can serve a stale status.
+"""
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.contrib import messages
+from django.http import JsonResponse
+from django.shortcuts import redirect
+from django.urls import reverse
+
+from .models import Participant, Room
+
+SESSION_KEYS = ('room_code', 'participant_id', 'is_admin')
+PLAYER_SESSION_KEY = 'player_id'
+
+CACHE_SIZE = getattr(settings, 'ROOM_CACHE_SIZE', 1024)
+CACHE_TTL = getattr(settings, 'ROOM_CACHE_TTL', 5)
+
+
+class LRUCache:
+    """A thread-safe LRU cache whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_rooms = LRUCache(CACHE_SIZE, CACHE_TTL)
+_participants = LRUCache(CACHE_SIZE * 8, CACHE_TTL)
+
+
+def invalidate_room(code):
+    """Drops the cached room so the next request reads its current status."""
+    _rooms.delete(code)
+
+
+def invalidate_participant(participant_id):
+    _participants.delete(participant_id)
+
+
+def get_room(code):
+    """Returns the room with the given code. Raises Room.DoesNotExist."""
+    room = _rooms.get(code)
+    if room is None:
+        room = Room.objects.get(code=code)
+        _rooms.set(code, room)
+    return copy.copy(room)
+
+
+def resolve(room_code, participant_id):
+    """
+    Returns (room, participant) for the session values, reading both with
+    one joined query on a cache miss. Raises Participant.DoesNotExist if
+    the participant does not belong to that room.
+    """
+    room, participant = _cached(room_code, participant_id)
+    if room is None:
+        participant = Participant.objects.select_related('room').get(id=participant_id, room__code=room_code)
+        room = _remember(room_code, participant)
+    return _copies(room, participant)
+
+
+async def aresolve(room_code, participant_id):
+    """Async version of `resolve`, for async views."""
+    room, participant = _cached(room_code, participant_id)
+    if room is None:
+        participant = await Participant.objects.select_related('room').aget(id=participant_id, room__code=room_code)
+        room = _remember(room_code, participant)
+    return _copies(room, participant)
+
+
+def _cached(room_code, participant_id):
+    room = _rooms.get(room_code)
+    participant = _participants.get(participant_id)
+    if room is None or participant is None or participant.room_id != room.id:
+        return None, None
+    return room, participant
+
+
+def _remember(room_code, participant):
+    _rooms.set(room_code, participant.room)
+    _participants.set(participant.id, participant)
+    return participant.room
+
+
+def _copies(room, participant):
+    # Views may modify what they get, so each request works on its own copies.
+    room = copy.copy(room)
+    participant = copy.copy(participant)
+    participant.room = room
+    return room, participant
+
+
+def get_player_id(request):
+    """
+    Returns the player id of the request's browser, creating it on first
+    use. It is kept when the browser leaves a room, so every participant
+    the browser creates shares it (see core.seasons).
+    """
+    player_id = request.session.get(PLAYER_SESSION_KEY)
+    if player_id is None:
+        player_id = request.session[PLAYER_SESSION_KEY] = uuid.uuid4().hex
+    return player_id
+
+
+def clear_room_session(request):
+    """Removes the room keys from the session."""
+    for key in SESSION_KEYS:
+        if key in request.session:
+            del request.session[key]
+
+
+def room_required(view=None, *, admin=False, json=False):
+    """
+    Decorator for views that need the current room and participant. With
+    `admin=True` only the room admin is let through. With `json=True`
+    failures are answered with a 403 JSON error instead of a redirect.
+    Async views are resolved with the async ORM.
+    """
+    if view is None:
+        return lambda view: room_required(view, admin=admin, json=json)
+
+    def deny(request, message):
+        if json:
+            return JsonResponse({'error': message}, status=403)
+        messages.error(request, message)
+        return redirect(reverse('core:home'))
+
+    def check_session(request, room_code, participant_id, is_admin):
+        if admin and (not room_code or not participant_id or not is_admin):
+            return deny(request, "Acceso denegado. Solo los administradores pueden ver este panel.")
+        if not room_code or not participant_id:
+            return deny(request, "No estás en ninguna sala. Por favor, únete o crea una.")
+        # Sessions can outlive the code that wrote them, so values of an
+        # unexpected type are treated as an invalid session instead of a query error
+        if not isinstance(room_code, str) or type(participant_id) is not int:
+            return invalid_session(request)
+        return None
+
+    def invalid_session(request):
+        # Session data is invalid, clear it
+        clear_room_session(request)
+        if admin:
+            return deny(request, "Tu sesión ha expirado o no tienes permisos de administrador.")
+        return deny(request, "Tu sesión ha expirado o es inválida.")
+
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            room_code = await request.session.aget('room_code')
+            participant_id = await request.session.aget('participant_id')
+            is_admin = await request.session.aget('is_admin', False)
+            response = check_session(request, room_code, participant_id, is_admin)
+            if response is not None:
+                return response
+
+            try:
+                room, participant = await aresolve(room_code, participant_id)
+                # Ensure the participant is indeed the admin of this room
+                if admin and not participant.is_admin:
+                    raise Participant.DoesNotExist
+            except (Room.DoesNotExist, Participant.DoesNotExist):
+                return invalid_session(request)
+
+            request.room = room
+            request.participant = participant
+            return await view(request, *args, **kwargs)
+
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        room_code = request.session.get('room_code')
+        participant_id = request.session.get('participant_id')
+        response = check_session(request, room_code, participant_id, request.session.get('is_admin', False))
+        if response is not None:
+            return response
+
+        try:
+            room, participant = resolve(room_code, participant_id)
+            # Ensure the participant is indeed the admin of this room
+            if admin and not participant.is_admin:
+                raise Participant.DoesNotExist
+        except (Room.DoesNotExist, Participant.DoesNotExist):
+            return invalid_session(request)
+
+        request.room = room
+        request.participant = participant
+        return view(request, *args, **kwargs)
+
+    return wrapper
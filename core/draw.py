@@ -0,0 +1,390 @@
+"""
+Draw engine for the Secret Santa assignments.
+
+The whole draw is computed in memory as a permutation of participant
+indexes and persisted with a single bulk insert, so the cost grows
+linearly with the size of the room.
+
+Every saved draw, generated or manual, becomes a new immutable
+AssignmentSet, and the room's active_assignment_set pointer is swapped to
+it in the same transaction. Readers therefore see either the previous
+draw or the new one, never a mix, and older sets stay available for
+rollback with `activate_assignment_set`.
+"""
+import random
+import time
+
+from django.db import transaction
+from django.db.models import Max
+
+from .models import Assignment, AssignmentSet, Room
+from .solver import InfeasibleError, MutualPairsError, solve
+
+MODE_ANY = 'any'
+MODE_NO_MUTUAL = 'no_mutual'
+MODE_SINGLE_CYCLE = 'single_cycle'
+MODE_CHOICES = [
+    (MODE_ANY, 'Cualquier sorteo'),
+    (MODE_NO_MUTUAL, 'Sin intercambios mutuos'),
+    (MODE_SINGLE_CYCLE, 'Una sola cadena'),
+]
+
+# Seconds that merging the solver's cycles and the backtracking search may
+# spend, together, looking for a single chain under exclusions.
+MAX_CYCLE_SEARCH_SECONDS = 1.0
+
+# A uniform derangement has no 2-cycles with probability ~e^(-1/2), so this
+# many rejections in a row is practically impossible before falling back.
+MAX_MUTUAL_REJECTIONS = 32
+
+
+class DrawError(Exception):
+    """Raised when no valid draw exists for the room's constraints."""
+
+    def __init__(self, message, participant=None):
+        super().__init__(message)
+        self.participant = participant
+
+
+def _derangement_ratios(n):
+    """
+    Returns r where r[u] = (u - 1) * D(u - 2) / D(u) for 2 <= u <= n, D being
+    the derangement numbers. Computed through ratios to avoid huge integers.
+    """
+    ratios = [0.0] * (n + 1)
+    if n < 2:
+        return ratios
+    ratios[2] = 1.0
+    previous_q = 0.0  # q(2) = D(1) / D(2)
+    for u in range(3, n + 1):
+        q = 1.0 / ((u - 1) * (1.0 + previous_q))  # q(u) = D(u - 1) / D(u)
+        ratios[u] = (u - 1) * previous_q * q
+        previous_q = q
+    return ratios
+
+
+def random_derangement(n, rng=random):
+    """
+    Returns a uniformly random derangement of range(n) as a list where
+    perm[i] is the image of i (Martínez, Panholzer & Prodinger, 2008).
+    Runs in expected O(n) time.
+    """
+    perm = list(range(n))
+    marked = [False] * n
+    ratios = _derangement_ratios(n)
+    i = n - 1
+    unmarked = n
+    while unmarked >= 2:
+        if not marked[i]:
+            j = rng.randrange(i)
+            while marked[j]:
+                j = rng.randrange(i)
+            perm[i], perm[j] = perm[j], perm[i]
+            if rng.random() < ratios[unmarked]:
+                marked[j] = True
+                unmarked -= 1
+            unmarked -= 1
+        i -= 1
+    return perm
+
+
+def random_cycle(n, rng=random):
+    """
+    Returns a uniformly random cyclic permutation of range(n) using
+    Sattolo's algorithm, so everybody ends up in a single gift chain.
+    """
+    perm = list(range(n))
+    for i in range(n - 1, 0, -1):
+        j = rng.randrange(i)
+        perm[i], perm[j] = perm[j], perm[i]
+    return perm
+
+
+def has_mutual_pairs(perm):
+    """Returns True if the permutation contains a 2-cycle (A gives to B and B to A)."""
+    return any(perm[perm[i]] == i and perm[i] != i for i in range(len(perm)))
+
+
+def random_permutation(n, mode=MODE_NO_MUTUAL, rng=random):
+    """
+    Returns a valid draw over range(n) for the given mode. Mutual pairs are
+    only avoided with three or more participants, since the only possible
+    draw between two people is a swap.
+    """
+    if mode == MODE_SINGLE_CYCLE:
+        return random_cycle(n, rng)
+
+    perm = random_derangement(n, rng)
+    if mode == MODE_NO_MUTUAL and n > 2:
+        attempts = 0
+        while has_mutual_pairs(perm):
+            attempts += 1
+            if attempts > MAX_MUTUAL_REJECTIONS:
+                # A single cycle never contains mutual pairs for n >= 3.
+                return random_cycle(n, rng)
+            perm = random_derangement(n, rng)
+    return perm
+
+
+def _allowed(giver, receiver, exclusions):
+    return giver != receiver and receiver not in exclusions.get(giver, ())
+
+
+def _excluded_givers(n, exclusions):
+    """Returns the reverse of `exclusions`: receiver index -> set of givers excluding it."""
+    excluded_by = {}
+    for giver, receivers in exclusions.items():
+        for receiver in receivers:
+            if receiver != giver:
+                excluded_by.setdefault(receiver, set()).add(giver)
+    return excluded_by
+
+
+def _only_option(n, node, blocked):
+    """
+    Returns the single index other than `node` missing from `blocked`, or
+    None if there are more. Costs O(|blocked|) instead of scanning range(n).
+    """
+    blocks_itself = node in blocked
+    if len(blocked) - blocks_itself != n - 2:
+        return None
+    return n * (n - 1) // 2 - node - (sum(blocked) - node * blocks_itself)
+
+
+def _forced_mutual_pair(n, exclusions, excluded_by):
+    """
+    Returns a giver whose only possible receiver can only give back to them
+    (or who is the only possible giver of someone they must give to), so
+    every valid draw contains that mutual pair. Returns None otherwise.
+    """
+    forced = set()
+    for giver, receivers in exclusions.items():
+        receiver = _only_option(n, giver, receivers)
+        if receiver is not None:
+            forced.add((giver, receiver))
+    for receiver, givers in excluded_by.items():
+        giver = _only_option(n, receiver, givers)
+        if giver is not None:
+            forced.add((giver, receiver))
+    for giver, receiver in forced:
+        if (receiver, giver) in forced:
+            return giver
+    return None
+
+
+def _reaches_everyone(n, blocked_from):
+    """
+    Returns True if every index is reachable from index 0 following allowed
+    pairs, `blocked_from` mapping an index to those it cannot reach
+    directly. Each visit keeps only the unvisited indexes it is blocked
+    from, so the search costs O(n + |exclusions|) over the dense graph.
+    """
+    unvisited = list(range(1, n))
+    queue = [0]
+    while queue and unvisited:
+        node = queue.pop()
+        blocked = blocked_from.get(node, ())
+        remaining = []
+        for other in unvisited:
+            if other in blocked:
+                remaining.append(other)
+            else:
+                queue.append(other)
+        unvisited = remaining
+    return not unvisited
+
+
+def _strongly_connected(n, exclusions, excluded_by):
+    """A single chain needs every participant to reach, and be reached by, everybody else."""
+    return _reaches_everyone(n, exclusions) and _reaches_everyone(n, excluded_by)
+
+
+def _cycle_ids(perm):
+    """Returns (number of cycles, cycle id of every index) for a permutation."""
+    cycle_of = [-1] * len(perm)
+    count = 0
+    for start in range(len(perm)):
+        if cycle_of[start] != -1:
+            continue
+        i = start
+        while cycle_of[i] == -1:
+            cycle_of[i] = count
+            i = perm[i]
+        count += 1
+    return count, cycle_of
+
+
+def _merge_cycles(perm, exclusions, rng, deadline):
+    """
+    Joins the cycles of a valid draw into a single chain in place: swapping
+    the receivers of two givers on different cycles merges those cycles, so
+    each allowed swap removes one cycle. Merged cycles are tracked with a
+    union-find, so one pass over the givers can do every merge it finds.
+    Returns False if some cycles are left that no allowed swap can join, or
+    once `deadline` has passed.
+    """
+    n = len(perm)
+    count, cycle_of = _cycle_ids(perm)
+    parent = list(range(count))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    order = list(range(n))
+    while count > 1:
+        rng.shuffle(order)
+        merged = False
+        for a in order:
+            if time.monotonic() > deadline:
+                return False
+            for c in order:
+                cycle_a, cycle_c = find(cycle_of[a]), find(cycle_of[c])
+                if (
+                    cycle_a != cycle_c
+                    and _allowed(a, perm[c], exclusions)
+                    and _allowed(c, perm[a], exclusions)
+                ):
+                    perm[a], perm[c] = perm[c], perm[a]
+                    parent[cycle_c] = cycle_a
+                    count -= 1
+                    merged = True
+                    if count == 1:
+                        return True
+        if not merged:
+            return False
+    return True
+
+
+def _search_cycle(n, exclusions, rng, deadline):
+    """
+    Randomized depth-first search for a Hamiltonian cycle over the allowed
+    (giver, receiver) pairs. Returns the chain as a permutation, or None
+    when the search is exhausted or `deadline` has passed.
+    """
+    def options(giver):
+        receivers = [r for r in range(n) if not on_path[r] and _allowed(giver, r, exclusions)]
+        rng.shuffle(receivers)
+        return receivers
+
+    start = rng.randrange(n)
+    path = [start]
+    on_path = [False] * n
+    on_path[start] = True
+    stack = [options(start)]
+    while stack:
+        if len(path) == n and _allowed(path[-1], start, exclusions):
+            perm = [0] * n
+            for giver, receiver in zip(path, path[1:] + path[:1]):
+                perm[giver] = receiver
+            return perm
+        if stack[-1]:
+            # Each step scans every receiver, so the clock bounds the search, not a step count
+            if time.monotonic() > deadline:
+                return None
+            receiver = stack[-1].pop()
+            path.append(receiver)
+            on_path[receiver] = True
+            stack.append(options(receiver))
+        else:
+            stack.pop()
+            on_path[path.pop()] = False
+    return None
+
+
+def _single_chain(n, exclusions, excluded_by, perm, rng):
+    """Turns the valid draw `perm` into a single chain, or returns None if none was found."""
+    if not _strongly_connected(n, exclusions, excluded_by):
+        return None
+    deadline = time.monotonic() + MAX_CYCLE_SEARCH_SECONDS
+    if _merge_cycles(perm, exclusions, rng, deadline):
+        return perm
+    return _search_cycle(n, exclusions, rng, deadline)
+
+
+def constrained_permutation(n, exclusions, mode=MODE_NO_MUTUAL, rng=random):
+    """
+    Returns a valid draw over range(n) that respects `exclusions` (giver
+    index -> set of receiver indexes). Raises DrawError if none exists or,
+    for a single chain, if none was found within MAX_CYCLE_SEARCH_SECONDS.
+
+    Draws that are impossible for structural reasons, a forced mutual pair
+    or participants that cannot all reach each other in a single chain,
+    are rejected before any search.
+    """
+    excluded_by = _excluded_givers(n, exclusions)
+    if mode != MODE_ANY and n > 2:
+        giver = _forced_mutual_pair(n, exclusions, excluded_by)
+        if giver is not None:
+            raise DrawError("Every valid draw contains a mutual pair.", participant=giver)
+
+    try:
+        perm = solve(n, exclusions, avoid_mutual=(mode == MODE_NO_MUTUAL), rng=rng)
+    except MutualPairsError as e:
+        # A single chain never contains mutual pairs, so it is the last resort
+        chain = _single_chain(n, exclusions, excluded_by, solve(n, exclusions, rng=rng), rng)
+        if chain is None:
+            raise DrawError(str(e), participant=e.index) from e
+        return chain
+    except InfeasibleError as e:
+        raise DrawError(str(e), participant=e.index) from e
+
+    if mode == MODE_SINGLE_CYCLE:
+        # A single chain under exclusions is a Hamiltonian cycle problem: the
+        # solver's cycles are merged first and searched for only if that fails.
+        perm = _single_chain(n, exclusions, excluded_by, perm, rng)
+        if perm is None:
+            raise DrawError("Could not build a single chain that respects the exclusions.")
+    return perm
+
+
+def draw_assignments(participants, mode=MODE_NO_MUTUAL, exclusions=(), rng=random):
+    """
+    Returns a list of (giver, receiver) pairs covering every participant
+    exactly once as giver and once as receiver, nobody gifting themselves.
+    `exclusions` is an iterable of (giver_id, receiver_id) pairs that must
+    not be matched. Raises DrawError if the exclusions make the draw impossible.
+    """
+    participants = list(participants)
+    index = {participant.id: i for i, participant in enumerate(participants)}
+    excluded = {}
+    for giver_id, receiver_id in exclusions:
+        if giver_id in index and receiver_id in index:
+            excluded.setdefault(index[giver_id], set()).add(index[receiver_id])
+
+    if excluded:
+        try:
+            perm = constrained_permutation(len(participants), excluded, mode, rng)
+        except DrawError as e:
+            participant = participants[e.participant] if e.participant is not None else None
+            raise DrawError(str(e), participant=participant) from e
+    else:
+        perm = random_permutation(len(participants), mode, rng)
+    return [(participants[i], participants[j]) for i, j in enumerate(perm)]
+
+
+def save_assignments(room, pairs, source=AssignmentSet.SOURCE_DRAW):
+    """
+    Stores the given (giver, receiver) pairs as a new assignment set with a
+    single bulk insert and makes it the room's active draw, all in one
+    transaction. Returns the new set.
+    """
+    with transaction.atomic():
+        # Locking the room row serializes concurrent saves, which would otherwise race for the next number
+        Room.objects.select_for_update().filter(pk=room.pk).values_list('pk', flat=True).get()
+        last = room.assignment_sets.aggregate(last=Max('number'))['last'] or 0
+        assignment_set = AssignmentSet.objects.create(room=room, number=last + 1, source=source)
+        Assignment.objects.bulk_create(
+            Assignment(room=room, assignment_set=assignment_set, giver=giver, receiver=receiver)
+            for giver, receiver in pairs
+        )
+        activate_assignment_set(room, assignment_set)
+    return assignment_set
+
+
+def activate_assignment_set(room, assignment_set):
+    """Makes `assignment_set` the room's active draw with a single pointer update."""
+    Room.objects.filter(pk=room.pk).update(active_assignment_set=assignment_set)
+    room.active_assignment_set = assignment_set
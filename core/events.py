@@ -0,0 +1,59 @@
+"""
+Live room events pushed to the room's WebSocket group (see core.consumers).
+
+Events are sent after the current transaction commits, and silently
+skipped when no channel layer is configured.
+"""
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+from .models import Room
+
+
+def room_group_name(room_code):
+    return f'room_{room_code}'
+
+
+def broadcast(room_code, event_type, **payload):
+    """Sends `{'type': event_type, **payload}` to every socket of the room."""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    message = {'type': 'room.event', 'payload': {'type': event_type, **payload}}
+    transaction.on_commit(
+        lambda: async_to_sync(channel_layer.group_send)(room_group_name(room_code), message)
+    )
+
+
+def participant_joined(room, participant=None):
+    """
+    Announces the new participant and the room's new size. Pass no
+    participant when several joined at once; clients then fetch the roster
+    from /api/roster/ instead of receiving it with every join.
+    """
+    count = Room.objects.filter(pk=room.pk).values_list('participant_count', flat=True).get()
+    broadcast(
+        room.code,
+        'participant_update',
+        participant=participant.name if participant is not None else None,
+        count=count,
+    )
+
+
+def prediction_progress(room, participant, completed, total):
+    broadcast(
+        room.code,
+        'prediction_progress',
+        participant=participant.name,
+        completed=completed,
+        total=total,
+    )
+
+
+def status_changed(room):
+    broadcast(room.code, 'status_changed', status=room.status, status_display=room.get_status_display())
+
+
+def results_ready(room):
+    broadcast(room.code, 'results_ready')
@@ -0,0 +1,111 @@
+"""
+Streaming CSV and NDJSON exports of a room's draw, predictions and ranking.
+
+Rows are read with values_list(...).iterator(), so only one chunk of
+EXPORT_CHUNK_SIZE rows is in memory at a time, and participant ids are
+resolved against a single id -> name map built once per export. The
+response is streamed as it is produced, which keeps memory flat however
+many prediction rows the room has.
+"""
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, StreamingHttpResponse
+
+from .context import room_required
+from .predictions import iter_room_predictions
+
+EXPORT_CHUNK_SIZE = getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+FORMAT_CSV = 'csv'
+FORMAT_NDJSON = 'ndjson'
+CONTENT_TYPES = {
+    FORMAT_CSV: 'text/csv; charset=utf-8',
+    FORMAT_NDJSON: 'application/x-ndjson',
+}
+
+
+def _names(room):
+    return dict(room.participants.values_list('id', 'name'))
+
+
+def assignment_rows(room):
+    names = _names(room)
+    assignments = room.active_assignments().order_by('id').values_list('giver_id', 'receiver_id')
+    for giver_id, receiver_id in assignments.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield names.get(giver_id), names.get(receiver_id)
+
+
+def prediction_rows(room):
+    names = _names(room)
+    # Correctness is only known once the draw exists
+    assignment_map = dict(room.active_assignments().values_list('giver_id', 'receiver_id'))
+    for user_id, giver_id, receiver_id in iter_room_predictions(room, chunk_size=EXPORT_CHUNK_SIZE):
+        correct = assignment_map.get(giver_id) == receiver_id if assignment_map else None
+        yield names.get(user_id), names.get(giver_id), names.get(receiver_id), correct
+
+
+def ranking_rows(room):
+    # Only the stored scores are read: unlike get_ranking, an export never computes and saves
+    # missing ones, which would rescore the room and roll it up into its season
+    scores = room.scores.order_by('rank', 'participant__name').values_list('rank', 'participant__name', 'score', 'is_winner')
+    yield from scores.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+EXPORTS = {
+    'assignments': (['giver', 'receiver'], assignment_rows),
+    'predictions': (['participant', 'predicted_giver', 'predicted_receiver', 'correct'], prediction_rows),
+    'ranking': (['rank', 'participant', 'score', 'winner'], ranking_rows),
+}
+
+
+class _Echo:
+    """File-like object whose write() returns the line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(header, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), ensure_ascii=False) + '\n'
+
+
+async def _aiter(lines, batch_size=EXPORT_CHUNK_SIZE):
+    # Under ASGI a sync iterator would be consumed completely before sending
+    # anything, so it is advanced a batch at a time in the request's sync thread.
+    next_batch = sync_to_async(lambda: list(islice(lines, batch_size)))
+    while batch := await next_batch():
+        for line in batch:
+            yield line
+
+
+@room_required(admin=True)
+def export_view(request, kind, fmt):
+    """
+    Streams one of the room's datasets (assignments, predictions or
+    ranking) as CSV or NDJSON. Only accessible by the room admin.
+    """
+    if kind not in EXPORTS or fmt not in CONTENT_TYPES:
+        raise Http404("Exportación no encontrada.")
+    room = request.room
+    header, rows = EXPORTS[kind]
+    lines = (csv_lines if fmt == FORMAT_CSV else ndjson_lines)(header, rows(room))
+
+    response = StreamingHttpResponse(
+        _aiter(lines) if isinstance(request, ASGIRequest) else lines,
+        content_type=CONTENT_TYPES[fmt],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{room.code}-{kind}.{fmt}"'
+    return response
@@ -0,0 +1,116 @@
+"""
+Materialized prediction ranking.
+
+Scores are computed once with a single aggregate query when results are
+enabled or assignments change, and stored in the Score table so the
+results page only has to read them back in rank order. Rooms that belong
+to a season also roll their new scores up into its standings (see
+core.seasons) in the same transaction.
+"""
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef
+
+from .models import Prediction, Score
+from .predictions import STORAGE, STORAGE_PACKED, get_room_predictions
+from .seasons import roll_up_room
+
+
+def compute_scores(room):
+    """Returns {user_id: number of correct predictions} for the room."""
+    if STORAGE == STORAGE_PACKED:
+        # Packed vectors cannot be joined in SQL; the kernel reads one row per user
+        from .scoring import score_room
+        return score_room(room.id)[0]
+    matches_assignment = room.active_assignments().filter(
+        giver=OuterRef('predicted_giver'),
+        receiver=OuterRef('predicted_receiver'),
+    )
+    hits = (
+        Prediction.objects.filter(room=room)
+        .filter(Exists(matches_assignment))
+        .values('user')
+        .annotate(score=Count('id'))
+        .values_list('user', 'score')
+    )
+    return dict(hits)
+
+
+def refresh_scores(room, hits=None):
+    """
+    Recomputes and stores the ranking of every participant in the room.
+    Ties share the same rank (1, 2, 2, 4...) and everybody with the top
+    score is flagged as a winner. `hits` can carry precomputed
+    {user_id: score} counts, e.g. from core.scoring. Updates the season
+    standings and bumps the room version so cached result fragments are
+    rebuilt.
+    """
+    if hits is None:
+        hits = compute_scores(room)
+    participants = list(room.participants.order_by('id').values_list('id', flat=True))
+    ordered = sorted(participants, key=lambda participant_id: hits.get(participant_id, 0), reverse=True)
+
+    scores = []
+    max_score = hits.get(ordered[0], 0) if ordered else 0
+    previous_score = None
+    rank = 0
+    for position, participant_id in enumerate(ordered, start=1):
+        score = hits.get(participant_id, 0)
+        if score != previous_score:
+            rank = position
+            previous_score = score
+        scores.append(Score(
+            room=room,
+            participant_id=participant_id,
+            score=score,
+            rank=rank,
+            is_winner=score == max_score,
+        ))
+
+    with transaction.atomic():
+        room.scores.all().delete()
+        Score.objects.bulk_create(scores)
+        roll_up_room(room)
+        room.bump_version()
+    return scores
+
+
+def get_ranking(room):
+    """Returns the room's stored scores in rank order, computing them if missing."""
+    scores = list(room.scores.select_related('participant').order_by('rank', 'participant__name'))
+    if not scores:
+        refresh_scores(room)
+        scores = list(room.scores.select_related('participant').order_by('rank', 'participant__name'))
+    return scores
+
+
+def get_results(room):
+    """
+    Returns the data shown on the results page: the ranking as
+    [(name, {'score', 'predictions'})], the winners' names and the actual
+    assignments as [{'giver', 'receiver'}].
+    """
+    scores = get_ranking(room)
+    names = {score.participant_id: score.participant.name for score in scores}
+
+    # Build a map of actual assignments: {giver_id: receiver_id}
+    assignment_map = dict(room.active_assignments().values_list('giver_id', 'receiver_id'))
+
+    # Per-user prediction details, resolved against the in-memory name map
+    predictions_by_user = {}
+    for user_id, predicted_giver_id, predicted_receiver_id in get_room_predictions(room):
+        predictions_by_user.setdefault(user_id, []).append({
+            'predicted_giver': names.get(predicted_giver_id),
+            'predicted_receiver': names.get(predicted_receiver_id),
+            'is_correct': assignment_map.get(predicted_giver_id) == predicted_receiver_id,
+        })
+
+    ranking = [
+        (score.participant.name, {'score': score.score, 'predictions': predictions_by_user.get(score.participant_id, [])})
+        for score in scores
+    ]
+    winners = [score.participant.name for score in scores if score.is_winner]
+    assignments = [
+        {'giver': names.get(giver_id), 'receiver': names.get(receiver_id)}
+        for giver_id, receiver_id in assignment_map.items()
+    ]
+    return {'ranking': ranking, 'winners': winners, 'assignments': assignments}
@@ -0,0 +1,77 @@
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+from django.template.utils import get_app_template_dirs
+
+STYLESHEETS = ['core/css/output.css', 'vendor/bootstrap-icons/bootstrap-icons.min.css']
+
+# Marker classes and script hooks that have no rules of their own
+IGNORED_CLASSES = {'group', 'peer', 'toggle-icon', 'user-prediction-toggle', 'user-predictions-list'}
+
+CLASS_ATTRIBUTE_RE = re.compile(r'class(?:Name)?\s*=\s*(["\'`])(.*?)\1', re.S)
+CLASS_LIST_RE = re.compile(r'classList\.(?:add|remove|toggle|replace)\(([^)]*)\)')
+STRING_RE = re.compile(r'["\']([^"\']+)["\']')
+# Template tags, variables and JS template literal placeholders inside attributes
+PLACEHOLDER_RE = re.compile(r'\{%.*?%\}|\{\{.*?\}\}|\$\{.*?\}', re.S)
+SELECTOR_CLASS_RE = re.compile(r'\.((?:\\[0-9a-fA-F]{1,6} ?|\\.|[\w-])+)')
+HEX_ESCAPE_RE = re.compile(r'\\([0-9a-fA-F]{1,6}) ?')
+CHAR_ESCAPE_RE = re.compile(r'\\(.)')
+
+
+def _unescape(selector):
+    # Tailwind escapes variants and fractions, e.g. `.hover\:bg-red-500` or `.w-1\/2`
+    selector = HEX_ESCAPE_RE.sub(lambda match: chr(int(match.group(1), 16)), selector)
+    return CHAR_ESCAPE_RE.sub(r'\1', selector)
+
+
+def defined_classes(css):
+    return {_unescape(name) for name in SELECTOR_CLASS_RE.findall(css)}
+
+
+def used_classes(template):
+    """Yields the classes a template sets in class attributes and through classList calls."""
+    for match in CLASS_ATTRIBUTE_RE.finditer(template):
+        yield from PLACEHOLDER_RE.sub(' ', match.group(2)).split()
+    for match in CLASS_LIST_RE.finditer(template):
+        for value in STRING_RE.findall(match.group(1)):
+            yield from value.split()
+
+
+def project_template_dirs():
+    base_dir = Path(settings.BASE_DIR)
+    dirs = [Path(directory) for engine in settings.TEMPLATES for directory in engine.get('DIRS', [])]
+    dirs += [Path(directory) for directory in get_app_template_dirs('templates')]
+    # Templates of installed third-party apps (e.g. the admin) are styled by their own CSS
+    return [directory for directory in dirs if directory.is_relative_to(base_dir)]
+
+
+class Command(BaseCommand):
+    help = "Fails when a project template uses a CSS class that the compiled stylesheets do not define."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--css', nargs='+', default=STYLESHEETS, help="Static paths of the stylesheets to check against.")
+        parser.add_argument('--ignore', nargs='*', default=[], help="Additional classes that need no CSS rules.")
+
+    def handle(self, *args, **options):
+        defined = IGNORED_CLASSES | set(options['ignore'])
+        for stylesheet in options['css']:
+            path = finders.find(stylesheet)
+            if path is None:
+                raise CommandError(f"Stylesheet {stylesheet} not found. Run `npm run build` first.")
+            defined |= defined_classes(Path(path).read_text(encoding='utf-8'))
+
+        missing = {}
+        for directory in project_template_dirs():
+            for template in sorted(directory.rglob('*.html')):
+                for name in used_classes(template.read_text(encoding='utf-8')):
+                    if name not in defined:
+                        missing.setdefault(name, set()).add(str(template.relative_to(settings.BASE_DIR)))
+
+        if missing:
+            for name in sorted(missing):
+                self.stderr.write(f"{name}: {', '.join(sorted(missing[name]))}")
+            raise CommandError(f"{len(missing)} classes used in templates are missing from the compiled CSS.")
+        self.stdout.write(self.style.SUCCESS("Every class used in the templates is defined in the compiled CSS."))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Room
+from core.predictions import STORAGE_PACKED, pack_room_predictions
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves stored Prediction rows into one packed vector per participant. "
+        "Set PREDICTION_STORAGE = 'packed' once it has run."
+    )
+    storage = STORAGE_PACKED
+    unit = "vectors"
+
+    def add_arguments(self, parser):
+        parser.add_argument('codes', nargs='*', help="Room codes to convert. Defaults to every room.")
+
+    def convert(self, room):
+        return pack_room_predictions(room)
+
+    def handle(self, *args, **options):
+        rooms = Room.objects.order_by('id')
+        if options['codes']:
+            rooms = rooms.filter(code__in=[code.upper() for code in options['codes']])
+
+        total = 0
+        for room in rooms.iterator():
+            converted = self.convert(room)
+            total += converted
+            if converted:
+                self.stdout.write(f"Room {room.code}: {converted}")
+        self.stdout.write(self.style.SUCCESS(f"Converted predictions to {self.storage} storage ({total} {self.unit} written)."))
@@ -0,0 +1,103 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from core.context import invalidate_room
+from core.models import Assignment, AssignmentSet, Exclusion, Participant, Prediction, PredictionVector, Room, Score, SeasonEntry
+
+# Children before their parents, so no statement ever has to cascade
+PURGE_ORDER = [Prediction, PredictionVector, Score, Assignment, AssignmentSet, Exclusion, Participant]
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes rooms matching a retention policy with chunked raw SQL deletes, child tables first, "
+        "instead of the ORM cascade that loads every related row to send signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, metavar='DAYS', help="Purge rooms created more than DAYS days ago.")
+        parser.add_argument('--status', nargs='+', choices=[value for value, _ in Room.STATUS_CHOICES], help="Purge only rooms in these statuses.")
+        parser.add_argument('--chunk-size', type=int, default=5000, help="Rows deleted per statement (default: 5000).")
+        parser.add_argument('--pause', type=float, default=0.05, help="Seconds to sleep between statements, to leave room for live traffic (default: 0.05).")
+        parser.add_argument('--dry-run', action='store_true', help="Only list the rooms that would be purged.")
+
+    def handle(self, *args, **options):
+        if options['older_than'] is None and not options['status']:
+            raise CommandError("Give a retention policy with --older-than and/or --status.")
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be positive.")
+
+        rooms = Room.objects.order_by('id')
+        if options['older_than'] is not None:
+            rooms = rooms.filter(created_at__lt=timezone.now() - timedelta(days=options['older_than']))
+        if options['status']:
+            rooms = rooms.filter(status__in=options['status'])
+        rooms = list(rooms.values_list('id', 'code', 'participant_count'))
+        if not rooms:
+            self.stdout.write("No rooms to purge.")
+            return
+
+        if options['dry_run']:
+            for _, code, participant_count in rooms:
+                self.stdout.write(f"Room {code}: {participant_count} participants")
+            self.stdout.write(f"{len(rooms)} rooms would be purged.")
+            return
+
+        started = time.perf_counter()
+        total = 0
+        for room_id, code, _ in rooms:
+            room_started = time.perf_counter()
+            self.detach_room(room_id)
+            deleted = sum(
+                self.delete_chunked(model, room_id, options['chunk_size'], options['pause'])
+                for model in PURGE_ORDER
+            )
+            deleted += self.delete_chunked(Room, room_id, options['chunk_size'], options['pause'], column='id')
+            invalidate_room(code)
+            total += deleted
+            elapsed = time.perf_counter() - room_started
+            self.stdout.write(f"Room {code}: {deleted} rows in {elapsed:.2f}s")
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Purged {len(rooms)} rooms ({total} rows) in {elapsed:.2f}s: {total / elapsed:.0f} rows/s"
+        ))
+
+    def detach_room(self, room_id):
+        """
+        Clears the references that must not be deleted with the room: its own
+        pointer to the active assignment set, which would block deleting the
+        sets, and the season entries, which keep counting in the season.
+        """
+        room_table = connection.ops.quote_name(Room._meta.db_table)
+        active_set = connection.ops.quote_name(Room._meta.get_field('active_assignment_set').column)
+        entry_table = connection.ops.quote_name(SeasonEntry._meta.db_table)
+        entry_room = connection.ops.quote_name(SeasonEntry._meta.get_field('room').column)
+        with connection.cursor() as cursor:
+            cursor.execute(f"UPDATE {room_table} SET {active_set} = NULL WHERE {connection.ops.quote_name('id')} = %s", [room_id])
+            cursor.execute(f"UPDATE {entry_table} SET {entry_room} = NULL WHERE {entry_room} = %s", [room_id])
+
+    def delete_chunked(self, model, room_id, chunk_size, pause, column='room_id'):
+        """
+        Deletes the model's rows for the room at most `chunk_size` at a time,
+        each chunk in its own short transaction, and returns the row count.
+        """
+        table = connection.ops.quote_name(model._meta.db_table)
+        pk = connection.ops.quote_name(model._meta.pk.column)
+        sql = (
+            f"DELETE FROM {table} WHERE {pk} IN "
+            f"(SELECT {pk} FROM {table} WHERE {connection.ops.quote_name(column)} = %s LIMIT %s)"
+        )
+        deleted = 0
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [room_id, chunk_size])
+                count = cursor.rowcount
+            deleted += count
+            if count < chunk_size:
+                return deleted
+            time.sleep(pause)
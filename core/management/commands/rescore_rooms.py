@@ -0,0 +1,63 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.leaderboard import refresh_scores
+from core.models import Room
+from core.scoring import score_room
+
+
+def _init_worker():
+    django.setup()
+    # Never reuse a connection inherited from the parent process.
+    connections.close_all()
+
+
+def _score_room(room_id):
+    hits, prediction_count = score_room(room_id)
+    connections.close_all()
+    return room_id, hits, prediction_count
+
+
+class Command(BaseCommand):
+    help = "Recomputes the stored ranking of many rooms with the vectorized scoring kernel."
+
+    def add_arguments(self, parser):
+        parser.add_argument('codes', nargs='*', help="Room codes to rescore. Defaults to every room with results enabled.")
+        parser.add_argument('--all', action='store_true', help="Rescore every room, whatever its status.")
+        parser.add_argument('--workers', type=int, default=None, help="Number of worker processes (default: CPU count).")
+        parser.add_argument('--dry-run', action='store_true', help="Compute the scores without saving them.")
+
+    def handle(self, *args, **options):
+        rooms = Room.objects.all()
+        if options['codes']:
+            rooms = rooms.filter(code__in=[code.upper() for code in options['codes']])
+        elif not options['all']:
+            rooms = rooms.filter(status=Room.STATUS_RESULTS)
+        rooms_by_id = rooms.in_bulk()
+        if not rooms_by_id:
+            self.stdout.write("No rooms to rescore.")
+            return
+
+        # Workers open their own connections; close ours before forking.
+        connections.close_all()
+
+        started = time.perf_counter()
+        total_predictions = 0
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+            # Scoring runs in parallel; scores are saved here one room at a
+            # time so the workers never compete for write locks.
+            for room_id, hits, prediction_count in pool.map(_score_room, rooms_by_id):
+                if not options['dry_run']:
+                    refresh_scores(rooms_by_id[room_id], hits)
+                total_predictions += prediction_count
+                self.stdout.write(f"Room {rooms_by_id[room_id].code}: {prediction_count} predictions")
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rescored {len(rooms_by_id)} rooms ({total_predictions} predictions) in {elapsed:.2f}s: "
+            f"{len(rooms_by_id) / elapsed:.1f} rooms/s, {total_predictions / elapsed:.0f} predictions/s"
+        ))
@@ -0,0 +1,15 @@
+from core.predictions import STORAGE_ROWS, unpack_room_predictions
+
+from .pack_predictions import Command as PackCommand
+
+
+class Command(PackCommand):
+    help = (
+        "Moves packed prediction vectors back into one Prediction row per prediction. "
+        "Set PREDICTION_STORAGE = 'rows' (the default) once it has run."
+    )
+    storage = STORAGE_ROWS
+    unit = "rows"
+
+    def convert(self, room):
+        return unpack_room_predictions(room)
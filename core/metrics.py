@@ -0,0 +1,91 @@
+"""
+In-process request metrics exposed in the Prometheus text format.
+
+RequestMetricsMiddleware (see core.middleware) feeds one observation per
+request into the histograms below, labelled by the resolved view name.
+Each worker process keeps its own numbers; Prometheus sums them when it
+scrapes every worker.
+"""
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+# Token required as "Authorization: Bearer <token>" to read /metrics. Without one,
+# /metrics is only served with DEBUG=True, so production never exposes it by accident.
+METRICS_TOKEN = getattr(settings, 'METRICS_TOKEN', None)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class Histogram:
+    """A cumulative histogram with one series per label value."""
+
+    def __init__(self, name, help_text, buckets, label='view'):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.label = label
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, value):
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for label_value, series in sorted(self._series.items()):
+                label = f'{self.label}="{_escape(label_value)}"'
+                for bound, count in zip(self.buckets, series['buckets']):
+                    lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {series["count"]}')
+                lines.append(f'{self.name}_sum{{{label}}} {series["sum"]}')
+                lines.append(f'{self.name}_count{{{label}}} {series["count"]}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+request_duration = Histogram('amigo_request_duration_seconds', 'Total request latency.', LATENCY_BUCKETS)
+db_duration = Histogram('amigo_request_db_duration_seconds', 'Time spent running SQL per request.', LATENCY_BUCKETS)
+template_duration = Histogram('amigo_request_template_duration_seconds', 'Time spent rendering templates per request.', LATENCY_BUCKETS)
+query_count = Histogram('amigo_request_queries', 'SQL queries run per request.', QUERY_BUCKETS)
+
+HISTOGRAMS = (request_duration, db_duration, template_duration, query_count)
+
+
+def observe_request(view_name, duration, db_time, template_time, queries):
+    request_duration.observe(view_name, duration)
+    db_duration.observe(view_name, db_time)
+    template_duration.observe(view_name, template_time)
+    query_count.observe(view_name, queries)
+
+
+def render_metrics():
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """Serves every histogram in the Prometheus text exposition format."""
+    if METRICS_TOKEN:
+        if not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {METRICS_TOKEN}'):
+            return HttpResponseForbidden()
+    elif not settings.DEBUG:
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,148 @@
+"""
+Project middleware.
+
+RequestMetricsMiddleware counts the queries each request runs and the
+time spent in the database and in template rendering, reports them in a
+Server-Timing header, and records them in core.metrics under the
+resolved view name. Requests running more than QUERY_COUNT_WARNING_THRESHOLD
+queries are logged as warnings, which makes N+1 patterns easy to spot.
+Template time is reported by the core.template_backends.TimedDjangoTemplates
+backend, so it stays at zero with any other template backend.
+
+Both middlewares here support sync and async requests, so under ASGI the
+async views in core.async_views run without being adapted to a thread.
+"""
+import contextvars
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_WARNING_THRESHOLD = getattr(settings, 'QUERY_COUNT_WARNING_THRESHOLD', 50)
+
+_template_time = contextvars.ContextVar('template_time', default=None)
+
+
+def record_template_time(duration):
+    """Adds `duration` seconds of rendering to the current request, if it is being measured."""
+    total = _template_time.get()
+    if total is not None:
+        total[0] += duration
+
+
+class _QueryTimer:
+    """execute_wrapper that counts queries and accumulates their duration."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+def _wrap_connections(queries):
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(queries))
+    return stack
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        queries = _QueryTimer()
+        template_time = [0.0]
+        token = _template_time.set(template_time)
+        started = time.perf_counter()
+        try:
+            with _wrap_connections(queries):
+                response = self.get_response(request)
+        finally:
+            _template_time.reset(token)
+        return self.record(request, response, started, queries, template_time[0])
+
+    async def __acall__(self, request):
+        queries = _QueryTimer()
+        template_time = [0.0]
+        token = _template_time.set(template_time)
+        started = time.perf_counter()
+        # Connections are per thread, and async ORM calls run in the request's
+        # sync thread, so the wrappers have to be installed from that thread.
+        wrappers = await sync_to_async(_wrap_connections)(queries)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(wrappers.close)()
+            _template_time.reset(token)
+        return self.record(request, response, started, queries, template_time[0])
+
+    def record(self, request, response, started, queries, template_time):
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+        metrics.observe_request(view_name, duration, queries.duration, template_time, queries.count)
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={queries.duration * 1000:.1f};desc="{queries.count} queries"',
+            f'tpl;dur={template_time * 1000:.1f}',
+            f'total;dur={duration * 1000:.1f}',
+        ])
+        if queries.count > QUERY_COUNT_WARNING_THRESHOLD:
+            logger.warning(
+                "%s ran %d SQL queries (threshold %d) for %s %s",
+                view_name, queries.count, QUERY_COUNT_WARNING_THRESHOLD, request.method, request.path,
+            )
+        return response
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware that also runs natively on async requests. The
+    stock middleware is sync-only, which makes Django run the whole view
+    chain in a thread under ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
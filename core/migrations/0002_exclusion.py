@@ -0,0 +1,26 @@
+# Generated by Django 6.0 on 2026-10-17 06:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Exclusion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('giver', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='excluded_receivers', to='core.participant')),
+                ('receiver', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='excluded_givers', to='core.participant')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exclusions', to='core.room')),
+            ],
+            options={
+                'unique_together': {('room', 'giver', 'receiver')},
+            },
+        ),
+    ]
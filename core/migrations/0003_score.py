@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-17 07:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_exclusion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Score',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveIntegerField(default=0)),
+                ('rank', models.PositiveIntegerField(default=1)),
+                ('is_winner', models.BooleanField(default=False)),
+                ('participant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='core.participant')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='core.room')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['room', 'rank'], name='core_score_room_id_53e922_idx')],
+                'unique_together': {('room', 'participant')},
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0 on 2026-10-17 07:02
+
+from django.db import migrations, models
+
+
+def create_counter(apps, schema_editor):
+    RoomCodeCounter = apps.get_model('core', 'RoomCodeCounter')
+    RoomCodeCounter.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomCodeCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('next_value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_counter, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 6.0 on 2026-10-17 07:05
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Room = apps.get_model('core', 'Room')
+    Participant = apps.get_model('core', 'Participant')
+    Prediction = apps.get_model('core', 'Prediction')
+
+    participants = (
+        Participant.objects.filter(room=OuterRef('pk'))
+        .values('room').annotate(total=Count('id')).values('total')
+    )
+    Room.objects.update(participant_count=Coalesce(Subquery(participants), Value(0)))
+
+    predictions = (
+        Prediction.objects.filter(user=OuterRef('pk'))
+        .values('user').annotate(total=Count('id')).values('total')
+    )
+    Participant.objects.update(predictions_count=Coalesce(Subquery(predictions), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_room_code_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participant',
+            name='predictions_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='participant_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-17 07:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_progress_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 6.0 on 2026-10-17 08:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_ordinals(apps, schema_editor):
+    Participant = apps.get_model('core', 'Participant')
+
+    participants = []
+    room_id, ordinal = None, 0
+    for participant in Participant.objects.order_by('room_id', 'id').only('id', 'room_id'):
+        if participant.room_id != room_id:
+            room_id, ordinal = participant.room_id, 0
+        participant.ordinal = ordinal
+        ordinal += 1
+        participants.append(participant)
+    Participant.objects.bulk_update(participants, ['ordinal'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_room_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participant',
+            name='ordinal',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_ordinals, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='participant',
+            unique_together={('room', 'name'), ('room', 'ordinal')},
+        ),
+        migrations.CreateModel(
+            name='PredictionVector',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('givers', models.BinaryField(default=bytes)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prediction_vectors', to='core.room')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='prediction_vector', to='core.participant')),
+            ],
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 6.0 on 2026-10-17 07:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_prediction_vector'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='assignment',
+            unique_together=set(),
+        ),
+        migrations.CreateModel(
+            name='AssignmentSet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('source', models.CharField(choices=[('draw', 'Sorteo'), ('manual', 'Manual')], default='draw', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assignment_sets', to='core.room')),
+            ],
+            options={
+                'unique_together': {('room', 'number')},
+            },
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='assignment_set',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='assignments', to='core.assignmentset'),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='active_assignment_set',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='active_for', to='core.assignmentset'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-17 07:55
+
+from django.db import migrations
+
+
+def backfill_assignment_sets(apps, schema_editor):
+    """Moves each room's existing draw into version 1 and makes it the active set."""
+    Assignment = apps.get_model('core', 'Assignment')
+    AssignmentSet = apps.get_model('core', 'AssignmentSet')
+    Room = apps.get_model('core', 'Room')
+
+    room_ids = Assignment.objects.order_by().values_list('room_id', flat=True).distinct()
+    for room_id in room_ids.iterator():
+        assignment_set = AssignmentSet.objects.create(room_id=room_id, number=1)
+        Assignment.objects.filter(room_id=room_id).update(assignment_set=assignment_set)
+        Room.objects.filter(pk=room_id).update(active_assignment_set=assignment_set)
+
+
+def unlink_assignment_sets(apps, schema_editor):
+    """Keeps only the active version of each draw, as the schema before sets allowed one per room."""
+    Assignment = apps.get_model('core', 'Assignment')
+    AssignmentSet = apps.get_model('core', 'AssignmentSet')
+    Room = apps.get_model('core', 'Room')
+
+    Assignment.objects.exclude(assignment_set__active_for__isnull=False).delete()
+    Room.objects.update(active_assignment_set=None)
+    Assignment.objects.update(assignment_set=None)
+    AssignmentSet.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_assignment_sets'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_assignment_sets, unlink_assignment_sets),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-17 07:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_backfill_assignment_sets'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='assignment',
+            name='assignment_set',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assignments', to='core.assignmentset'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='assignment',
+            unique_together={('assignment_set', 'giver')},
+        ),
+    ]
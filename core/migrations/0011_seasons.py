@@ -0,0 +1,55 @@
+# Generated by Django 6.0 on 2026-10-17 07:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_assignment_set_required'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Season',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('slug', models.SlugField(unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='season',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='rooms', to='core.season'),
+        ),
+        migrations.CreateModel(
+            name='SeasonEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('player_key', models.CharField(max_length=50)),
+                ('score', models.PositiveIntegerField(default=0)),
+                ('is_winner', models.BooleanField(default=False)),
+                ('room', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='season_entries', to='core.room')),
+                ('season', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='core.season')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SeasonStanding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('player_key', models.CharField(max_length=50)),
+                ('name', models.CharField(max_length=50)),
+                ('score', models.PositiveIntegerField(default=0)),
+                ('rooms', models.PositiveIntegerField(default=0)),
+                ('wins', models.PositiveIntegerField(default=0)),
+                ('season', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='core.season')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['season', '-score', '-wins', 'player_key'], name='core_season_season__eab0ce_idx')],
+                'unique_together': {('season', 'player_key')},
+            },
+        ),
+    ]
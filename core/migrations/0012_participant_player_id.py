@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_seasons'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participant',
+            name='player_id',
+            field=models.UUIDField(null=True),
+        ),
+    ]
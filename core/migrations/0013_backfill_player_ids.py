@@ -0,0 +1,71 @@
+# Generated by Django 6.0 on 2026-10-17 09:13
+
+import uuid
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def backfill_player_ids(apps, schema_editor):
+    """
+    Gives every existing participant their own player id and re-keys the
+    season entries of existing rooms by it. Entries of deleted rooms keep
+    their name keys. The standings are rebuilt from the entries.
+    """
+    Participant = apps.get_model('core', 'Participant')
+    Room = apps.get_model('core', 'Room')
+    Score = apps.get_model('core', 'Score')
+    SeasonEntry = apps.get_model('core', 'SeasonEntry')
+    SeasonStanding = apps.get_model('core', 'SeasonStanding')
+
+    for participant_id in Participant.objects.filter(player_id__isnull=True).values_list('pk', flat=True).iterator():
+        Participant.objects.filter(pk=participant_id).update(player_id=uuid.uuid4())
+
+    names = {
+        (season_id, key): name
+        for season_id, key, name in SeasonStanding.objects.values_list('season_id', 'player_key', 'name')
+    }
+    SeasonEntry.objects.filter(room__isnull=False).delete()
+    entries = []
+    for room_id, season_id in Room.objects.filter(season__isnull=False, status='results').values_list('pk', 'season_id'):
+        results = {}
+        scores = Score.objects.filter(room_id=room_id).values_list('participant__player_id', 'participant__name', 'score', 'is_winner')
+        for player_id, name, score, is_winner in scores:
+            key = player_id.hex
+            if key not in results or score > results[key][1]:
+                results[key] = (name, score, is_winner)
+        for key, (name, score, is_winner) in results.items():
+            names[(season_id, key)] = name
+            entries.append(SeasonEntry(season_id=season_id, room_id=room_id, player_key=key, score=score, is_winner=is_winner))
+    SeasonEntry.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+
+    totals = {}
+    for season_id, key, score, is_winner in SeasonEntry.objects.values_list('season_id', 'player_key', 'score', 'is_winner'):
+        total = totals.setdefault((season_id, key), [0, 0, 0])
+        total[0] += score
+        total[1] += 1
+        total[2] += is_winner
+    SeasonStanding.objects.all().delete()
+    SeasonStanding.objects.bulk_create(
+        (
+            SeasonStanding(
+                season_id=season_id, player_key=key, name=names.get((season_id, key), key),
+                score=score, rooms=rooms, wins=wins,
+            )
+            for (season_id, key), (score, rooms, wins) in totals.items()
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_participant_player_id'),
+    ]
+
+    operations = [
+        # Going back needs nothing: roll-ups replace a room's entries whatever their keys
+        migrations.RunPython(backfill_player_ids, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-17 09:14
+
+import uuid
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_backfill_player_ids'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='participant',
+            name='player_id',
+            field=models.UUIDField(default=uuid.uuid4),
+        ),
+    ]
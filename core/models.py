@@ -1,13 +1,27 @@
-import random
-import string
+import uuid
+
 from django.db import models
 
 def generate_room_code():
-    """Generates a unique random 6-character room code."""
-    while True:
-        code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-        if not Room.objects.filter(code=code).exists():
-            return code
+    """Returns a unique 6-character room code from the collision-free allocator."""
+    from .codes import next_room_code
+    return next_room_code()
+
+class RoomCodeCounter(models.Model):
+    """Single-row counter from which room code values are reserved in blocks."""
+    next_value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Siguiente código #{self.next_value}"
+
+class Season(models.Model):
+    """Groups rooms (e.g. one per office) whose results add up to a shared leaderboard."""
+    name = models.CharField(max_length=50)
+    slug = models.SlugField(max_length=50, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Temporada {self.name}"
 
 class Room(models.Model):
     """Represents a game room."""
@@ -22,36 +36,91 @@ class Room(models.Model):
 
     code = models.CharField(max_length=6, unique=True, default=generate_room_code)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PREDICTING)
+    participant_count = models.PositiveIntegerField(default=0) # Maintained by core.signals
+    version = models.PositiveIntegerField(default=0) # Bumped on every assignment or status change
+    active_assignment_set = models.ForeignKey(
+        'AssignmentSet', on_delete=models.SET_NULL, null=True, blank=True, related_name='active_for'
+    ) # Swapped by core.draw to publish a new draw at once
+    season = models.ForeignKey(Season, on_delete=models.SET_NULL, null=True, blank=True, related_name='rooms')
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"Sala {self.code}"
 
+    def active_assignments(self):
+        """
+        Returns the assignments of the room's active set. The pointer is read
+        in the same query, so a room loaded earlier still sees the current draw.
+        """
+        return Assignment.objects.filter(assignment_set__active_for=self.pk)
+
+    def bump_version(self):
+        """Invalidates every cached fragment of this room by moving to a new version."""
+        from .context import invalidate_room
+        Room.objects.filter(pk=self.pk).update(version=models.F('version') + 1)
+        invalidate_room(self.code)
+
 class Participant(models.Model):
     """Represents a user in a room."""
     room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='participants')
     name = models.CharField(max_length=50)
     is_admin = models.BooleanField(default=False)
+    predictions_count = models.PositiveIntegerField(default=0) # Maintained by core.predictions
+    ordinal = models.PositiveIntegerField(null=True, blank=True) # Position in the room, assigned by core.signals
+    player_id = models.UUIDField(default=uuid.uuid4) # Shared by the participants of one browser, see core.context.get_player_id
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        unique_together = ('room', 'name')
+        unique_together = [('room', 'name'), ('room', 'ordinal')]
 
     def __str__(self):
         return f"{self.name} en {self.room.code}"
 
+class AssignmentSet(models.Model):
+    """An immutable version of a room's draw. Older versions are kept for rollback."""
+    SOURCE_DRAW = 'draw'
+    SOURCE_MANUAL = 'manual'
+    SOURCE_CHOICES = [
+        (SOURCE_DRAW, 'Sorteo'),
+        (SOURCE_MANUAL, 'Manual'),
+    ]
+
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='assignment_sets')
+    number = models.PositiveIntegerField()
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES, default=SOURCE_DRAW)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('room', 'number')
+
+    def __str__(self):
+        return f"Sorteo #{self.number} de {self.room.code}"
+
 class Assignment(models.Model):
     """Represents the actual secret santa assignments."""
     room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='assignments')
+    assignment_set = models.ForeignKey(AssignmentSet, on_delete=models.CASCADE, related_name='assignments')
     giver = models.ForeignKey(Participant, on_delete=models.CASCADE, related_name='giving_to')
     receiver = models.ForeignKey(Participant, on_delete=models.CASCADE, related_name='receiving_from')
 
     class Meta:
-        unique_together = ('room', 'giver')
+        unique_together = ('assignment_set', 'giver')
 
     def __str__(self):
         return f"{self.giver.name} -> {self.receiver.name} ({self.room.code})"
 
+class Exclusion(models.Model):
+    """Represents a pair that must not be matched in the draw (giver -> receiver)."""
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='exclusions')
+    giver = models.ForeignKey(Participant, on_delete=models.CASCADE, related_name='excluded_receivers')
+    receiver = models.ForeignKey(Participant, on_delete=models.CASCADE, related_name='excluded_givers')
+
+    class Meta:
+        unique_together = ('room', 'giver', 'receiver')
+
+    def __str__(self):
+        return f"{self.giver.name} -/-> {self.receiver.name} ({self.room.code})"
+
 class Prediction(models.Model):
     """Represents a user's prediction."""
     room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='predictions')
@@ -63,4 +132,65 @@ class Prediction(models.Model):
         unique_together = ('user', 'predicted_receiver')
 
     def __str__(self):
-        return f"Predicción de {self.user.name}: {self.predicted_giver.name} -> {self.predicted_receiver.name}"
\ No newline at end of file
+        return f"Predicción de {self.user.name}: {self.predicted_giver.name} -> {self.predicted_receiver.name}"
+
+class PredictionVector(models.Model):
+    """
+    Represents all of a user's predictions packed in one row (see core.packing):
+    entry i holds the ordinal of the giver predicted for the participant with ordinal i.
+    """
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='prediction_vectors')
+    user = models.OneToOneField(Participant, on_delete=models.CASCADE, related_name='prediction_vector')
+    givers = models.BinaryField(default=bytes)
+
+    def __str__(self):
+        return f"Predicciones de {self.user.name}"
+
+class Score(models.Model):
+    """Represents a participant's materialized position in the room's prediction ranking."""
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='scores')
+    participant = models.ForeignKey(Participant, on_delete=models.CASCADE, related_name='scores')
+    score = models.PositiveIntegerField(default=0)
+    rank = models.PositiveIntegerField(default=1)
+    is_winner = models.BooleanField(default=False)
+
+    class Meta:
+        unique_together = ('room', 'participant')
+        indexes = [
+            models.Index(fields=['room', 'rank']),
+        ]
+
+    def __str__(self):
+        return f"#{self.rank} {self.participant.name}: {self.score} ({self.room.code})"
+
+class SeasonEntry(models.Model):
+    """
+    A player's result in one room of a season, as last rolled up into the
+    season standings by core.seasons. Kept when the room is deleted.
+    """
+    season = models.ForeignKey(Season, on_delete=models.CASCADE, related_name='entries')
+    room = models.ForeignKey(Room, on_delete=models.SET_NULL, null=True, related_name='season_entries')
+    player_key = models.CharField(max_length=50)
+    score = models.PositiveIntegerField(default=0)
+    is_winner = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"{self.player_key}: {self.score} ({self.season.name})"
+
+class SeasonStanding(models.Model):
+    """Represents a player's running totals over every room of a season, maintained by core.seasons."""
+    season = models.ForeignKey(Season, on_delete=models.CASCADE, related_name='standings')
+    player_key = models.CharField(max_length=50) # Participant.player_id, see core.seasons.player_key
+    name = models.CharField(max_length=50)
+    score = models.PositiveIntegerField(default=0)
+    rooms = models.PositiveIntegerField(default=0)
+    wins = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('season', 'player_key')
+        indexes = [
+            models.Index(fields=['season', '-score', '-wins', 'player_key']),
+        ]
+
+    def __str__(self):
+        return f"{self.name}: {self.score} ({self.season.name})"
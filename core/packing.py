@@ -0,0 +1,57 @@
+"""
+Packed prediction vectors.
+
+A user's predictions are stored as one little-endian uint32 array indexed
+by receiver ordinal (Participant.ordinal). Each entry holds the predicted
+giver's ordinal plus one, and 0 means no prediction yet. Vectors are
+only as long as needed, so missing trailing entries also mean no
+prediction, and participants joining later never force a rewrite.
+"""
+import sys
+from array import array
+
+NO_PREDICTION = 0
+
+
+def unpack(data):
+    """Returns the entries of a packed vector as an array('I')."""
+    entries = array('I')
+    entries.frombytes(bytes(data))
+    if sys.byteorder == 'big':
+        entries.byteswap()
+    return entries
+
+
+def pack(entries):
+    """Packs an array('I') of entries, dropping trailing empty ones."""
+    end = len(entries)
+    while end and entries[end - 1] == NO_PREDICTION:
+        end -= 1
+    entries = entries[:end]
+    if sys.byteorder == 'big':
+        entries.byteswap()
+    return entries.tobytes()
+
+
+def decode(data, ids_by_ordinal):
+    """
+    Returns a packed vector as {receiver_id: giver_id}. Entries pointing at
+    ordinals missing from `ids_by_ordinal` (deleted participants) are skipped.
+    """
+    predictions = {}
+    for receiver_ordinal, entry in enumerate(unpack(data)):
+        if entry == NO_PREDICTION:
+            continue
+        receiver_id = ids_by_ordinal.get(receiver_ordinal)
+        giver_id = ids_by_ordinal.get(entry - 1)
+        if receiver_id is not None and giver_id is not None:
+            predictions[receiver_id] = giver_id
+    return predictions
+
+
+def encode(predictions, ordinals_by_id):
+    """Packs {receiver_id: giver_id} into a vector."""
+    entries = array('I', [NO_PREDICTION]) * (max(ordinals_by_id.values(), default=-1) + 1)
+    for receiver_id, giver_id in predictions.items():
+        entries[ordinals_by_id[receiver_id]] = ordinals_by_id[giver_id] + 1
+    return pack(entries)
@@ -0,0 +1,222 @@
+"""
+Batched write path for participant predictions.
+
+All submitted choices are validated against one in-memory participant map
+and every changed prediction is written with a single statement.
+
+Predictions are stored either as one Prediction row per (user, receiver)
+or, with PREDICTION_STORAGE = 'packed', as one PredictionVector row per
+user (see core.packing), which keeps the table at n rows instead of n².
+Migrations never move predictions between the two; the pack_predictions
+and unpack_predictions management commands do, before switching the
+setting.
+Everything reading or writing predictions goes through these helpers, so
+the rest of the app does not depend on the storage mode.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+
+from . import packing
+from .models import Participant, Prediction, PredictionVector, Room
+
+STORAGE_ROWS = 'rows'
+STORAGE_PACKED = 'packed'
+STORAGE = getattr(settings, 'PREDICTION_STORAGE', STORAGE_ROWS)
+
+
+class PredictionsLockedError(Exception):
+    """Raised when predictions are saved for a room that no longer accepts them."""
+
+
+def _ids_by_ordinal(room):
+    return dict(room.participants.values_list('ordinal', 'id'))
+
+
+def get_predictions_map(room, user):
+    """Returns the user's current predictions as {receiver_id: giver_id}."""
+    if STORAGE == STORAGE_PACKED:
+        data = PredictionVector.objects.filter(user=user).values_list('givers', flat=True).first()
+        return packing.decode(data, _ids_by_ordinal(room)) if data else {}
+    return dict(
+        Prediction.objects.filter(room=room, user=user)
+        .values_list('predicted_receiver_id', 'predicted_giver_id')
+    )
+
+
+async def aget_predictions_map(room, user):
+    """Async version of `get_predictions_map`, for async views."""
+    if STORAGE == STORAGE_PACKED:
+        data = await PredictionVector.objects.filter(user=user).values_list('givers', flat=True).afirst()
+        if not data:
+            return {}
+        ids_by_ordinal = {ordinal: participant_id async for ordinal, participant_id in room.participants.values_list('ordinal', 'id')}
+        return packing.decode(data, ids_by_ordinal)
+    return {
+        receiver_id: giver_id
+        async for receiver_id, giver_id in Prediction.objects.filter(room=room, user=user)
+        .values_list('predicted_receiver_id', 'predicted_giver_id')
+    }
+
+
+def iter_room_predictions(room, chunk_size=2000):
+    """
+    Yields every prediction of the room as (user_id, giver_id, receiver_id)
+    tuples, reading the rows in chunks of `chunk_size`.
+    """
+    if STORAGE == STORAGE_PACKED:
+        ids_by_ordinal = _ids_by_ordinal(room)
+        vectors = room.prediction_vectors.values_list('user_id', 'givers').iterator(chunk_size=chunk_size)
+        for user_id, data in vectors:
+            for receiver_id, giver_id in packing.decode(data, ids_by_ordinal).items():
+                yield user_id, giver_id, receiver_id
+        return
+    yield from (
+        Prediction.objects.filter(room=room)
+        .values_list('user_id', 'predicted_giver_id', 'predicted_receiver_id')
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def get_room_predictions(room):
+    """Returns every prediction of the room as (user_id, giver_id, receiver_id) tuples."""
+    if STORAGE == STORAGE_PACKED:
+        return list(iter_room_predictions(room))
+    return list(
+        Prediction.objects.filter(room=room)
+        .values_list('user_id', 'predicted_giver_id', 'predicted_receiver_id')
+    )
+
+
+def parse_prediction_form(data):
+    """
+    Returns the non-empty `giver_for_<receiver_id>` fields of a submitted
+    prediction form as {receiver_id: raw giver id}.
+    """
+    submitted = {}
+    for key, giver_id in data.items():
+        if key.startswith('giver_for_') and giver_id:
+            try:
+                submitted[int(key[len('giver_for_'):])] = giver_id
+            except ValueError:
+                continue
+    return submitted
+
+
+def save_predictions(room, user, choices, participants_by_id, predictions_map=None):
+    """
+    Upserts the user's predictions.
+
+    `choices` maps each receiver to the raw giver id submitted for it, and
+    `participants_by_id` holds every participant of the room. Only choices
+    that differ from `predictions_map` are written, and the user's
+    predictions_count is refreshed when new ones appear. Returns the list of
+    receivers whose submitted giver was not a valid participant or was the
+    receiver themselves.
+
+    The room's status is read again in the write transaction, as the
+    caller's room may be a cached copy, and PredictionsLockedError is raised
+    once the room is no longer predicting.
+    """
+    if predictions_map is None:
+        predictions_map = get_predictions_map(room, user)
+
+    invalid = []
+    changed = []
+    added = 0
+    for receiver, giver_id in choices.items():
+        try:
+            giver = participants_by_id[int(giver_id)]
+        except (KeyError, TypeError, ValueError):
+            invalid.append(receiver)
+            continue
+        if giver.id == receiver.id:
+            # Nobody gives a gift to themselves
+            invalid.append(receiver)
+            continue
+        if predictions_map.get(receiver.id) == giver.id:
+            continue
+        if receiver.id not in predictions_map:
+            added += 1
+        changed.append((receiver, giver))
+
+    if changed:
+        with transaction.atomic():
+            if STORAGE == STORAGE_PACKED:
+                still_open = _write_vector(room, user, changed)
+            else:
+                still_open = _write_rows(room, user, changed, added)
+            if not still_open:
+                # Raised inside the transaction, so the writes are rolled back
+                raise PredictionsLockedError(room.code)
+    return invalid
+
+
+# The writers return whether the room is still predicting, checked after writing (SQLite then
+# already holds the write lock) and folded into the counter update where there is one
+def _write_rows(room, user, changed, added):
+    Prediction.objects.bulk_create(
+        [
+            Prediction(room=room, user=user, predicted_giver=giver, predicted_receiver=receiver)
+            for receiver, giver in changed
+        ],
+        update_conflicts=True,
+        unique_fields=['user', 'predicted_receiver'],
+        update_fields=['predicted_giver'],
+    )
+    still_open = Participant.objects.filter(pk=user.pk, room__status=Room.STATUS_PREDICTING)
+    if added:
+        # Recounted in the same statement so concurrent saves cannot drift the counter.
+        user_total = (
+            Prediction.objects.filter(user=OuterRef('pk'))
+            .values('user').annotate(total=Count('id')).values('total')
+        )
+        return bool(still_open.update(predictions_count=Subquery(user_total)))
+    return still_open.exists()
+
+
+def _write_vector(room, user, changed):
+    # Locked so two saves of the same user cannot overwrite each other's entries
+    vector, _ = PredictionVector.objects.select_for_update().get_or_create(user=user, defaults={'room': room})
+    entries = packing.unpack(vector.givers)
+    for receiver, giver in changed:
+        if receiver.ordinal >= len(entries):
+            entries.extend([packing.NO_PREDICTION] * (receiver.ordinal + 1 - len(entries)))
+        entries[receiver.ordinal] = giver.ordinal + 1
+    vector.givers = packing.pack(entries)
+    vector.save(update_fields=['givers'])
+    completed = sum(1 for entry in entries if entry != packing.NO_PREDICTION)
+    return bool(
+        Participant.objects.filter(pk=user.pk, room__status=Room.STATUS_PREDICTING).update(predictions_count=completed)
+    )
+
+
+def pack_room_predictions(room):
+    """Moves the room's Prediction rows into packed vectors. Returns the number of vectors written."""
+    ordinals_by_id = {participant_id: ordinal for ordinal, participant_id in _ids_by_ordinal(room).items()}
+    by_user = {}
+    for user_id, giver_id, receiver_id in room.predictions.values_list('user_id', 'predicted_giver_id', 'predicted_receiver_id'):
+        by_user.setdefault(user_id, {})[receiver_id] = giver_id
+    with transaction.atomic():
+        room.prediction_vectors.all().delete()
+        PredictionVector.objects.bulk_create(
+            PredictionVector(room=room, user_id=user_id, givers=packing.encode(predictions, ordinals_by_id))
+            for user_id, predictions in by_user.items()
+        )
+        room.predictions.all().delete()
+    return len(by_user)
+
+
+def unpack_room_predictions(room):
+    """Moves the room's packed vectors back into Prediction rows. Returns the number of rows written."""
+    ids_by_ordinal = _ids_by_ordinal(room)
+    rows = [
+        Prediction(room=room, user_id=user_id, predicted_giver_id=giver_id, predicted_receiver_id=receiver_id)
+        for user_id, data in room.prediction_vectors.values_list('user_id', 'givers')
+        for receiver_id, giver_id in packing.decode(data, ids_by_ordinal).items()
+    ]
+    with transaction.atomic():
+        room.predictions.all().delete()
+        Prediction.objects.bulk_create(rows, batch_size=5000)
+        room.prediction_vectors.all().delete()
+    return len(rows)
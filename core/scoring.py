@@ -0,0 +1,98 @@
+"""
+Vectorized scoring kernel for large or historic rooms.
+
+Predictions and assignments are loaded as integer arrays with values_list
+and participant ids are mapped to dense ordinals, so every correct
+prediction is found with array indexing instead of a Python loop.
+"""
+import numpy as np
+
+from .models import Assignment, Participant, Prediction, PredictionVector
+from .predictions import STORAGE, STORAGE_PACKED
+
+
+def load_packed_predictions(room_id):
+    """Expands the room's packed vectors into an (m, 3) id array, one row read per user."""
+    ids_by_ordinal = dict(Participant.objects.filter(room_id=room_id).values_list('ordinal', 'id'))
+    if not ids_by_ordinal:
+        return np.empty((0, 3), dtype=np.int64)
+    # Ordinal -> id lookup table; -1 marks gaps left by deleted participants.
+    lookup = np.full(max(ids_by_ordinal) + 2, -1, dtype=np.int64)
+    for ordinal, participant_id in ids_by_ordinal.items():
+        lookup[ordinal + 1] = participant_id
+
+    chunks = []
+    for user_id, data in PredictionVector.objects.filter(room_id=room_id).values_list('user_id', 'givers'):
+        entries = np.frombuffer(bytes(data), dtype='<u4').astype(np.int64)
+        entries = entries[:len(lookup) - 1]
+        receivers = np.flatnonzero(entries)
+        givers = entries[receivers]
+        givers[givers >= len(lookup)] = 0
+        givers = lookup[givers]
+        receivers = lookup[receivers + 1]
+        valid = (givers >= 0) & (receivers >= 0)
+        chunk = np.empty((int(valid.sum()), 3), dtype=np.int64)
+        chunk[:, 0] = user_id
+        chunk[:, 1] = givers[valid]
+        chunk[:, 2] = receivers[valid]
+        chunks.append(chunk)
+    return np.concatenate(chunks) if chunks else np.empty((0, 3), dtype=np.int64)
+
+
+def load_room_arrays(room_id):
+    """
+    Returns (participant_ids, predictions, assignments) for a room:
+    a sorted int64 array of ids, an (m, 3) array of
+    (user, predicted_giver, predicted_receiver) ids and an (n, 2) array of
+    (giver, receiver) ids.
+    """
+    participant_ids = np.fromiter(
+        Participant.objects.filter(room_id=room_id).order_by('id').values_list('id', flat=True),
+        dtype=np.int64,
+    )
+    if STORAGE == STORAGE_PACKED:
+        predictions = load_packed_predictions(room_id)
+    else:
+        predictions = np.array(
+            list(Prediction.objects.filter(room_id=room_id)
+                 .values_list('user_id', 'predicted_giver_id', 'predicted_receiver_id')),
+            dtype=np.int64,
+        ).reshape(-1, 3)
+    assignments = np.array(
+        list(Assignment.objects.filter(assignment_set__active_for=room_id).values_list('giver_id', 'receiver_id')),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    return participant_ids, predictions, assignments
+
+
+def score_arrays(participant_ids, predictions, assignments):
+    """
+    Returns an int64 array with the number of correct predictions of each
+    participant, aligned with `participant_ids` (which must be sorted).
+    """
+    n = len(participant_ids)
+    if n == 0 or len(predictions) == 0 or len(assignments) == 0:
+        return np.zeros(n, dtype=np.int64)
+
+    # Dense giver ordinal -> receiver ordinal, -1 where there is no assignment.
+    receiver_of = np.full(n, -1, dtype=np.int64)
+    givers = np.searchsorted(participant_ids, assignments[:, 0])
+    receiver_of[givers] = np.searchsorted(participant_ids, assignments[:, 1])
+
+    users = np.searchsorted(participant_ids, predictions[:, 0])
+    predicted_givers = np.searchsorted(participant_ids, predictions[:, 1])
+    predicted_receivers = np.searchsorted(participant_ids, predictions[:, 2])
+
+    hits = receiver_of[predicted_givers] == predicted_receivers
+    return np.bincount(users[hits], minlength=n)
+
+
+def score_room(room_id):
+    """
+    Scores a room from the database. Returns (hits, prediction_count) where
+    hits maps each participant id to their number of correct predictions.
+    """
+    participant_ids, predictions, assignments = load_room_arrays(room_id)
+    counts = score_arrays(participant_ids, predictions, assignments)
+    hits = dict(zip(participant_ids.tolist(), counts.tolist()))
+    return hits, len(predictions)
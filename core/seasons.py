@@ -0,0 +1,157 @@
+"""
+Cross-room leaderboards for seasons.
+
+A season links rooms, e.g. one per office, and ranks players over all of
+them. Players are matched across rooms by the player id that every
+participant records from its browser session (see
+core.context.get_player_id), so namesakes in different rooms stay apart
+and a player keeps their results under a new name. The id belongs to the
+browser: the same person joining from another device, or participants
+imported by the admin, count as separate players.
+
+Each room's contribution is kept as SeasonEntry rows and the running
+totals as one SeasonStanding row per player. Whenever a room's scores
+are stored (see core.leaderboard.refresh_scores), `roll_up_room` diffs
+the room's previous entries against its current scores and applies only
+the difference to the standings. The cost of an update therefore grows
+with the size of the room, not with the number of rooms in the season,
+and reading the leaderboard is an index scan of its first rows.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils.text import slugify
+
+from .models import Room, Season, SeasonEntry, SeasonStanding
+
+SEASON_LEADERBOARD_SIZE = getattr(settings, 'SEASON_LEADERBOARD_SIZE', 50)
+SEASON_BATCH_SIZE = getattr(settings, 'SEASON_BATCH_SIZE', 1000)
+
+NAME_MAX_LENGTH = Season._meta.get_field('name').max_length
+
+
+class SeasonError(ValueError):
+    """Raised for a season name that is too long or cannot be turned into a slug."""
+
+
+def player_key(player_id):
+    """Identifies a player across rooms by their Participant.player_id."""
+    return player_id.hex
+
+
+def get_or_create_season(name):
+    """Returns the season for `name`, matched by slug, creating it if needed."""
+    name = ' '.join(name.split())
+    slug = slugify(name)
+    if not slug or len(name) > NAME_MAX_LENGTH:
+        raise SeasonError(name)
+    season, _ = Season.objects.get_or_create(slug=slug, defaults={'name': name})
+    return season
+
+
+def set_room_season(room, season):
+    """Moves the room to `season` (or out of any season with None) and updates both standings."""
+    with transaction.atomic():
+        Room.objects.filter(pk=room.pk).update(season=season)
+        room.season = season
+        roll_up_room(room)
+
+
+def _room_results(room):
+    """Returns {player_key: (name, score, is_winner)} from the room's stored scores."""
+    results = {}
+    scores = room.scores.values_list('participant__player_id', 'participant__name', 'score', 'is_winner')
+    for player_id, name, score, is_winner in scores:
+        key = player_key(player_id)
+        # A browser that joined the room twice counts as one player, with their best result
+        if key not in results or score > results[key][1]:
+            results[key] = (name, score, is_winner)
+    return results
+
+
+def roll_up_room(room):
+    """
+    Brings the season standings up to date with the room's stored scores.
+    Rooms only count once their results are enabled. Must be called after
+    every change to the room's scores, status or season.
+    """
+    with transaction.atomic():
+        status, season_id = Room.objects.filter(pk=room.pk).values_list('status', 'season').get()
+        new = _room_results(room) if season_id is not None and status == Room.STATUS_RESULTS else {}
+        old = list(room.season_entries.values_list('season_id', 'player_key', 'score', 'is_winner'))
+        if not new and not old:
+            return
+
+        # {(season_id, player_key): [name, score, rooms, wins]} to add to the standings
+        deltas = {}
+        for entry_season_id, key, score, is_winner in old:
+            delta = deltas.setdefault((entry_season_id, key), [None, 0, 0, 0])
+            delta[1] -= score
+            delta[2] -= 1
+            delta[3] -= is_winner
+        for key, (name, score, is_winner) in new.items():
+            delta = deltas.setdefault((season_id, key), [None, 0, 0, 0])
+            delta[0] = name
+            delta[1] += score
+            delta[2] += 1
+            delta[3] += is_winner
+        deltas = {pair: delta for pair, delta in deltas.items() if delta[0] is not None or any(delta[1:])}
+
+        # Locking the seasons serializes roll-ups of rooms that share a season
+        season_ids = sorted({entry_season_id for entry_season_id, _ in deltas})
+        list(Season.objects.select_for_update().filter(pk__in=season_ids).order_by('pk').values_list('pk', flat=True))
+
+        keys_by_season = {}
+        for entry_season_id, key in deltas:
+            keys_by_season.setdefault(entry_season_id, []).append(key)
+        standings = {}
+        for entry_season_id, keys in keys_by_season.items():
+            for start in range(0, len(keys), SEASON_BATCH_SIZE):
+                batch = SeasonStanding.objects.filter(season_id=entry_season_id, player_key__in=keys[start:start + SEASON_BATCH_SIZE])
+                standings.update({(standing.season_id, standing.player_key): standing for standing in batch})
+
+        # Changed rows are replaced rather than updated: deleting and bulk inserting them
+        # costs two statements, where bulk_update builds a CASE expression per row and field
+        to_delete, to_create = [], []
+        for (entry_season_id, key), (name, score, rooms, wins) in deltas.items():
+            standing = standings.get((entry_season_id, key))
+            if standing is None:
+                standing = SeasonStanding(season_id=entry_season_id, player_key=key, name=name)
+            else:
+                to_delete.append(standing.pk)
+                standing.pk = None
+            standing.score += score
+            standing.rooms += rooms
+            standing.wins += wins
+            if name is not None:
+                standing.name = name
+            if standing.rooms:
+                to_create.append(standing)
+
+        for start in range(0, len(to_delete), SEASON_BATCH_SIZE):
+            SeasonStanding.objects.filter(pk__in=to_delete[start:start + SEASON_BATCH_SIZE]).delete()
+        SeasonStanding.objects.bulk_create(to_create, batch_size=SEASON_BATCH_SIZE)
+
+        room.season_entries.all().delete()
+        SeasonEntry.objects.bulk_create(
+            (
+                SeasonEntry(season_id=season_id, room=room, player_key=key, score=score, is_winner=is_winner)
+                for key, (_, score, is_winner) in new.items()
+            ),
+            batch_size=SEASON_BATCH_SIZE,
+        )
+
+
+def get_standings(season, limit=SEASON_LEADERBOARD_SIZE):
+    """
+    Returns the season's top `limit` players as SeasonStanding objects
+    with a `rank` attribute. Ties on score share the same rank.
+    """
+    standings = list(season.standings.order_by('-score', '-wins', 'player_key')[:limit])
+    previous_score = None
+    rank = 0
+    for position, standing in enumerate(standings, start=1):
+        if standing.score != previous_score:
+            rank = position
+            previous_score = standing.score
+        standing.rank = rank
+    return standings
@@ -0,0 +1,46 @@
+"""
+Signed-cookie session engine that adopts existing database sessions.
+
+The session only holds `room_code`, `participant_id`, `is_admin` and
+`player_id`, so it lives in a signed cookie and requests no longer read
+or write the django_session table. The signature prevents clients from
+editing the values. room_required checks the participant and their admin
+flag against the database, through the per-process cache of core.context:
+a process that cached them keeps serving a removed room or participant
+for up to ROOM_CACHE_TTL seconds (5 by default), while the process that
+removed them drops its entry at once.
+
+Browsers that still carry the key of a database session are migrated on
+their next request: the session is read from the database once, reissued
+as a signed cookie and its row deleted.
+"""
+from django.contrib.sessions.backends import db, signed_cookies
+
+
+def _is_database_key(session_key):
+    # Signed cookie values always contain the ':' separator of the signature.
+    return bool(session_key) and ':' not in session_key
+
+
+class SessionStore(signed_cookies.SessionStore):
+    def load(self):
+        session_key = self.session_key
+        data = super().load()
+        if not data and _is_database_key(session_key):
+            legacy = db.SessionStore(session_key)
+            data = legacy.load()
+            if data:
+                legacy.delete(session_key)
+                self.modified = True
+        return data
+
+    async def aload(self):
+        session_key = self.session_key
+        data = super().load()
+        if not data and _is_database_key(session_key):
+            legacy = db.SessionStore(session_key)
+            data = await legacy.aload()
+            if data:
+                await legacy.adelete(session_key)
+                self.modified = True
+        return data
@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models import F, Max
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .context import invalidate_participant, invalidate_room
+from .models import Participant, Room
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def room_changed(sender, instance, **kwargs):
+    invalidate_room(instance.code)
+
+
+@receiver(post_save, sender=Participant)
+@receiver(post_delete, sender=Participant)
+def participant_changed(sender, instance, **kwargs):
+    invalidate_participant(instance.id)
+
+
+@receiver(post_save, sender=Participant)
+def participant_created(sender, instance, created, **kwargs):
+    if not created:
+        return
+    with transaction.atomic():
+        # The room row stays locked until commit, so concurrent joins get distinct ordinals
+        Room.objects.filter(pk=instance.room_id).update(participant_count=F('participant_count') + 1)
+        if instance.ordinal is None:
+            last = Participant.objects.filter(room_id=instance.room_id).aggregate(last=Max('ordinal'))['last']
+            instance.ordinal = 0 if last is None else last + 1
+            Participant.objects.filter(pk=instance.pk).update(ordinal=instance.ordinal)
+
+
+@receiver(post_delete, sender=Participant)
+def participant_deleted(sender, instance, **kwargs):
+    Room.objects.filter(pk=instance.room_id, participant_count__gt=0).update(participant_count=F('participant_count') - 1)
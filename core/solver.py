@@ -0,0 +1,188 @@
+"""
+Constraint-aware solver for the Secret Santa draw.
+
+Finds a permutation of range(n) where nobody gifts themselves and no
+giver is paired with one of their excluded receivers. The problem is a
+perfect matching in the bipartite graph givers x receivers minus the
+exclusions, so the solver works on the (sparse) exclusion sets instead
+of the (dense) allowed edges:
+
+1. A randomized greedy pass builds a maximal matching, most constrained
+   givers first, in O(n + |exclusions|).
+2. The few givers left are matched through augmenting paths, searched
+   with a BFS over the complement graph that also costs O(n + |exclusions|).
+
+If an augmenting path does not exist the draw is infeasible, which is
+reported right away instead of after a number of retries.
+"""
+import random
+from collections import deque
+
+# Random receivers tried per giver during the greedy pass before falling
+# back to scanning the pool.
+GREEDY_TRIES = 8
+
+
+class InfeasibleError(Exception):
+    """Raised when no valid assignment exists for the given exclusions."""
+
+    def __init__(self, message, index=None):
+        super().__init__(message)
+        self.index = index
+
+
+class MutualPairsError(InfeasibleError):
+    """Raised when a valid assignment was found but some mutual pair could not be merged away."""
+
+
+def _allowed(giver, receiver, exclusions):
+    return giver != receiver and receiver not in exclusions.get(giver, ())
+
+
+def _check_degrees(n, exclusions):
+    """Fails fast on givers or receivers that have nobody left to pair with."""
+    excluded_from = [0] * n
+    for giver, receivers in exclusions.items():
+        blocked = len(receivers) + (giver not in receivers)
+        if blocked >= n:
+            raise InfeasibleError("Giver has no possible receivers.", index=giver)
+        for receiver in receivers:
+            if receiver != giver:
+                excluded_from[receiver] += 1
+    for receiver, count in enumerate(excluded_from):
+        if count + 1 >= n:
+            raise InfeasibleError("Receiver has no possible givers.", index=receiver)
+
+
+def _greedy_match(n, exclusions, rng):
+    """
+    Returns (match_giver, match_receiver) holding a maximal matching. Givers
+    with more exclusions pick first; each one tries a few random receivers
+    and then scans the pool, skipping only receivers it excludes, so the
+    pass costs O(n + |exclusions|).
+    """
+    match_giver = [-1] * n
+    match_receiver = [-1] * n
+    pool = list(range(n))
+    givers = list(range(n))
+    rng.shuffle(givers)
+    givers.sort(key=lambda giver: len(exclusions.get(giver, ())), reverse=True)
+    for giver in givers:
+        size = len(pool)
+        if not size:
+            break
+        k = -1
+        for _ in range(min(GREEDY_TRIES, size)):
+            candidate = rng.randrange(size)
+            if _allowed(giver, pool[candidate], exclusions):
+                k = candidate
+                break
+        if k == -1:
+            offset = rng.randrange(size)
+            for step in range(size):
+                candidate = (offset + step) % size
+                if _allowed(giver, pool[candidate], exclusions):
+                    k = candidate
+                    break
+        if k == -1:
+            continue
+        receiver = pool[k]
+        pool[k] = pool[size - 1]
+        pool.pop()
+        match_giver[giver] = receiver
+        match_receiver[receiver] = giver
+    return match_giver, match_receiver
+
+
+def _augment(start, n, exclusions, match_giver, match_receiver, rng):
+    """
+    Searches an augmenting path from the unmatched giver `start` and flips
+    it. Returns False if no path exists, meaning no perfect matching does.
+    """
+    unvisited = list(range(n))
+    rng.shuffle(unvisited)
+    parent = {}  # receiver -> giver that reached it
+    queue = deque([start])
+    while queue:
+        giver = queue.popleft()
+        blocked = exclusions.get(giver, ())
+        remaining = []
+        for receiver in unvisited:
+            if receiver == giver or receiver in blocked:
+                remaining.append(receiver)
+                continue
+            parent[receiver] = giver
+            if match_receiver[receiver] == -1:
+                # Flip the alternating path back to the start.
+                while receiver != -1:
+                    owner = parent[receiver]
+                    previous = match_giver[owner]
+                    match_giver[owner] = receiver
+                    match_receiver[receiver] = owner
+                    receiver = previous
+                return True
+            queue.append(match_receiver[receiver])
+        unvisited = remaining
+    return False
+
+
+def _repair_mutual_pairs(perm, exclusions, rng):
+    """
+    Merges every 2-cycle into another cycle by swapping receivers with some
+    other giver c, trying every candidate c (in random order) and both
+    members of the pair. A merge only ever produces cycles of length >= 4,
+    so it never creates a new 2-cycle. Returns the givers whose pair could
+    not be merged.
+    """
+    n = len(perm)
+    if n < 3:
+        return []
+    candidates = list(range(n))
+    rng.shuffle(candidates)
+    leftover = []
+    for a in range(n):
+        b = perm[a]
+        if perm[b] != a or a > b:
+            continue
+        for c in candidates:
+            if c in (a, b):
+                continue
+            d = perm[c]
+            # x -> d and c -> y joins both cycles into one of length >= 4.
+            if _allowed(a, d, exclusions) and _allowed(c, b, exclusions):
+                perm[a], perm[c] = d, b
+                break
+            if _allowed(b, d, exclusions) and _allowed(c, a, exclusions):
+                perm[b], perm[c] = d, a
+                break
+        else:
+            leftover.append(a)
+    return leftover
+
+
+def solve(n, exclusions=None, avoid_mutual=False, rng=random):
+    """
+    Returns a permutation of range(n) (perm[giver] = receiver) with no fixed
+    points that respects `exclusions`, a dict mapping a giver index to the
+    set of receiver indexes it must not be paired with.
+
+    Raises InfeasibleError if no such permutation exists. With
+    `avoid_mutual` (and three or more participants) the result has no
+    2-cycles, or MutualPairsError is raised.
+    """
+    exclusions = exclusions or {}
+    if n < 2:
+        raise InfeasibleError("At least two participants are needed.")
+    _check_degrees(n, exclusions)
+
+    match_giver, match_receiver = _greedy_match(n, exclusions, rng)
+    for giver in range(n):
+        if match_giver[giver] == -1:
+            if not _augment(giver, n, exclusions, match_giver, match_receiver, rng):
+                raise InfeasibleError("No valid assignment exists.", index=giver)
+
+    if avoid_mutual:
+        leftover = _repair_mutual_pairs(match_giver, exclusions, rng)
+        if leftover:
+            raise MutualPairsError("Could not avoid every mutual pair.", index=leftover[0])
+    return match_giver
@@ -0,0 +1,36 @@
+"""
+Template backend that reports its rendering time to
+RequestMetricsMiddleware (see core.middleware).
+
+Only top-level renders go through the backend's Template, so included
+and extended templates are not counted twice. Outside a measured request
+the timing is simply dropped.
+"""
+import time
+
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+from .middleware import record_template_time
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            record_template_time(time.perf_counter() - started)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates whose templates time their own rendering."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
@@ -0,0 +1,84 @@
+from unittest import mock
+
+import numpy as np
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+
+from core import analytics
+from core.models import Room
+
+from .utils import RoomTestMixin
+
+
+class HeatmapTests(RoomTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        # Created out of name order, so positions in the matrix differ from the ids
+        self.room, (self.carla, self.ana, self.beto) = self.make_room(['Carla', 'Ana', 'Beto'])
+        self.predict(self.room, self.ana, {self.beto: self.carla, self.carla: self.ana})
+        self.predict(self.room, self.beto, {self.carla: self.ana, self.ana: self.carla})
+        self.predict(self.room, self.carla, {self.beto: self.ana})
+
+    def test_counts_are_indexed_by_name(self):
+        heatmap = analytics.count_pairs(self.room)
+        self.assertEqual(heatmap.names, ['Ana', 'Beto', 'Carla'])
+        self.assertEqual(heatmap.counts().tolist(), [
+            [0, 0, 1],
+            [1, 0, 1],
+            [2, 0, 0],
+        ])
+
+    def test_consensus_puts_the_strongest_first(self):
+        heatmap = analytics.count_pairs(self.room)
+        self.assertEqual(heatmap.consensus(heatmap.counts()), [
+            {'receiver': 'Carla', 'giver': 'Ana', 'votes': 2, 'total': 2, 'share': 100},
+            {'receiver': 'Ana', 'giver': 'Carla', 'votes': 1, 'total': 1, 'share': 100},
+            {'receiver': 'Beto', 'giver': 'Ana', 'votes': 1, 'total': 2, 'share': 50},
+        ])
+
+    def test_empty_rooms_have_no_consensus(self):
+        room, _ = self.make_room([])
+        heatmap = analytics.count_pairs(room)
+        self.assertEqual(heatmap.counts().shape, (0, 0))
+        self.assertEqual(heatmap.consensus(heatmap.counts()), [])
+
+    def test_counts_are_cached_per_version(self):
+        analytics.get_heatmap(self.room)
+        self.predict(self.room, self.beto, {self.beto: self.carla})
+        self.assertEqual(analytics.get_heatmap(self.room).counts()[1].tolist(), [1, 0, 1])
+
+        self.room.bump_version()
+        self.assertEqual(analytics.get_heatmap(self.room).counts()[1].tolist(), [1, 0, 2])
+
+    def test_large_heatmaps_are_not_cached(self):
+        with mock.patch.object(analytics, 'HEATMAP_CACHE_MAX_CELLS', 1):
+            analytics.get_heatmap(self.room)
+        version = Room.objects.get(pk=self.room.pk).version
+        self.assertIsNone(caches['fragments'].get(f'heatmap-{self.room.id}-{version}'))
+
+
+class AnalyticsViewTests(RoomTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.room, (self.admin, self.guest) = self.make_room(['Ana', 'Beto'])
+        self.predict(self.room, self.guest, {self.guest: self.admin})
+
+    def test_admin_sees_the_consensus(self):
+        response = self.client_for(self.admin).get(reverse('core:analytics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['consensus'], [
+            {'receiver': 'Beto', 'giver': 'Ana', 'votes': 1, 'total': 1, 'share': 100},
+        ])
+
+    def test_heatmap_is_served_as_little_endian_counts(self):
+        response = self.client_for(self.admin).get(reverse('core:analytics_heatmap'))
+        self.assertEqual(response['Content-Type'], 'application/octet-stream')
+        self.assertEqual(response['X-Heatmap-Size'], '2')
+        self.assertEqual(np.frombuffer(response.content, dtype='<u2').tolist(), [0, 0, 1, 0])
+
+    def test_only_the_admin_gets_in(self):
+        for url in (reverse('core:analytics'), reverse('core:analytics_heatmap')):
+            for client in (self.client_for(self.guest), self.client):
+                response = client.get(url)
+                self.assertRedirects(response, reverse('core:home'), fetch_redirect_response=False)
@@ -0,0 +1,134 @@
+import json
+
+from django.test import TestCase
+from django.urls import reverse
+
+from core import draw
+from core.leaderboard import refresh_scores
+from core.models import Room
+from core.predictions import get_predictions_map
+
+from .utils import RoomTestMixin
+
+
+class PredictionsApiTests(RoomTestMixin, TestCase):
+    def post(self, client, predictions):
+        return client.post(
+            reverse('core:api_predictions'), json.dumps({'predictions': predictions}), content_type='application/json',
+        )
+
+    def test_get_returns_the_caller_predictions(self):
+        room, (ana, beto, carla) = self.make_room(['Ana', 'Beto', 'Carla'])
+        self.predict(room, ana, {beto: carla})
+        response = self.client_for(ana).get(reverse('core:api_predictions'))
+        self.assertEqual(response.json(), {
+            'predictions': {str(beto.id): carla.id}, 'editable': True, 'completed': 1, 'total': 3,
+        })
+
+    def test_post_saves_valid_entries_and_reports_the_rest(self):
+        room, (ana, beto, carla) = self.make_room(['Ana', 'Beto', 'Carla'])
+        response = self.post(self.client_for(ana), {beto.id: carla.id, carla.id: carla.id, ana.id: 'nadie', 999999: ana.id})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'errors': {
+                str(carla.id): "Nadie puede regalarse a sí mismo.",
+                str(ana.id): "Error al procesar la predicción para Ana.",
+                '999999': "Participante desconocido.",
+            },
+            'completed': 1,
+            'total': 3,
+        })
+        self.assertEqual(get_predictions_map(room, ana), {beto.id: carla.id})
+
+    def test_post_rejects_malformed_bodies(self):
+        room, (ana, beto) = self.make_room(['Ana', 'Beto'])
+        response = self.client_for(ana).post(reverse('core:api_predictions'), '[1, 2]', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_locked_predictions_answer_409(self):
+        room, (ana, beto) = self.make_room(['Ana', 'Beto'])
+        client = self.client_for(ana)
+        # The first request caches the predicting room in this process
+        self.assertEqual(client.get(reverse('core:api_predictions')).json()['editable'], True)
+        Room.objects.filter(pk=room.pk).update(status=Room.STATUS_LOCKED)
+
+        response = self.post(client, {beto.id: ana.id})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json(), {'error': "Las predicciones están bloqueadas."})
+        self.assertEqual(get_predictions_map(room, ana), {})
+
+    def test_other_rooms_are_out_of_reach(self):
+        room, (ana, beto) = self.make_room(['Ana', 'Beto'])
+        other, (carla, dani) = self.make_room(['Carla', 'Dani'])
+        response = self.post(self.client_for(ana), {carla.id: dani.id, beto.id: dani.id})
+        self.assertEqual(set(response.json()['errors']), {str(carla.id), str(beto.id)})
+        self.assertEqual(get_predictions_map(room, ana), {})
+
+    def test_requests_without_a_room_get_403(self):
+        response = self.client.get(reverse('core:api_predictions'))
+        self.assertEqual(response.status_code, 403)
+
+
+class PredictionPageTests(RoomTestMixin, TestCase):
+    def test_page_does_not_embed_the_roster(self):
+        room, (ana, beto) = self.make_room(['Ana', 'Beto Roster'])
+        response = self.client_for(ana).get(reverse('core:prediction'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Beto Roster')
+
+
+class ConditionalApiTests(RoomTestMixin, TestCase):
+    def assertRevalidates(self, client, url):
+        """Returns the ETag of `url` after checking a matching If-None-Match gets a 304 without a body."""
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        cached = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b'')
+        return etag
+
+    def test_read_endpoints_answer_304_while_unchanged(self):
+        room, (ana, beto) = self.make_room(['Ana', 'Beto'])
+        client = self.client_for(ana)
+        for name in ('core:api_room', 'core:api_roster', 'core:api_progress'):
+            self.assertRevalidates(client, reverse(name))
+
+    def test_etags_change_with_the_room(self):
+        room, (ana, beto) = self.make_room(['Ana', 'Beto'])
+        client = self.client_for(ana)
+        etags = {name: self.assertRevalidates(client, reverse(name)) for name in ('core:api_room', 'core:api_roster')}
+
+        # Joins in another process leave this process's cached room untouched
+        room.participants.create(name='Carla')
+        for name, etag in etags.items():
+            response = client.get(reverse(name), HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(client.get(reverse('core:api_room')).json()['participant_count'], 3)
+
+    def test_progress_total_is_read_from_the_database(self):
+        room, (ana, beto) = self.make_room(['Ana', 'Beto'])
+        client = self.client_for(ana)
+        self.assertEqual(client.get(reverse('core:api_predictions')).json()['total'], 2)
+        room.participants.create(name='Carla')
+        self.assertEqual(client.get(reverse('core:api_predictions')).json()['total'], 3)
+        self.assertEqual(client.get(reverse('core:api_progress')).json(), {'completed': 0, 'total': 3, 'sent': False})
+
+    def test_results_wait_for_the_admin(self):
+        room, (ana, beto) = self.make_room(['Ana', 'Beto'])
+        client = self.client_for(beto)
+        self.assertEqual(client.get(reverse('core:api_results')).status_code, 409)
+
+        self.predict(room, beto, {beto: ana})
+        self.publish(room, [(ana, beto), (beto, ana)])
+        etag = self.assertRevalidates(client, reverse('core:api_results'))
+        data = client.get(reverse('core:api_results')).json()
+        self.assertEqual(data['winners'], ['Beto'])
+        self.assertNotIn('assignments', data)
+        self.assertIn('assignments', self.client_for(ana).get(reverse('core:api_results')).json())
+
+        draw.save_assignments(room, [(beto, ana), (ana, beto)])
+        refresh_scores(room)
+        self.assertEqual(client.get(reverse('core:api_results'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
@@ -0,0 +1,103 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from core import draw
+from core.models import AssignmentSet, Room
+
+from .utils import RoomTestMixin
+
+
+def active_pairs(room):
+    return set(room.active_assignments().values_list('giver_id', 'receiver_id'))
+
+
+class AssignmentSetTests(RoomTestMixin, TestCase):
+    def test_every_draw_is_kept_as_a_new_version(self):
+        room, (ana, beto, carla) = self.make_room(['Ana', 'Beto', 'Carla'])
+        first = draw.save_assignments(room, [(ana, beto), (beto, carla), (carla, ana)])
+        second = draw.save_assignments(room, [(ana, carla), (carla, beto), (beto, ana)], source=AssignmentSet.SOURCE_MANUAL)
+
+        self.assertEqual((first.number, second.number), (1, 2))
+        self.assertEqual(second.source, AssignmentSet.SOURCE_MANUAL)
+        self.assertEqual(Room.objects.get(pk=room.pk).active_assignment_set, second)
+        self.assertEqual(first.assignments.count(), 3)
+
+    def test_readers_only_see_the_active_set(self):
+        room, (ana, beto, carla) = self.make_room(['Ana', 'Beto', 'Carla'])
+        stale = Room.objects.get(pk=room.pk)
+        draw.save_assignments(room, [(ana, beto), (beto, carla), (carla, ana)])
+        draw.save_assignments(room, [(ana, carla), (carla, beto), (beto, ana)])
+
+        # The pointer is read with the assignments, so a room loaded before the draw is not stale
+        self.assertEqual(active_pairs(stale), {(ana.id, carla.id), (carla.id, beto.id), (beto.id, ana.id)})
+
+
+class RestoreAssignmentSetTests(RoomTestMixin, TestCase):
+    def restore(self, participant, assignment_set_id):
+        return self.client_for(participant).post(
+            reverse('core:admin_dashboard'), {'action': 'activate_assignment_set', 'assignment_set_id': assignment_set_id},
+        )
+
+    def test_admin_restores_an_earlier_draw(self):
+        room, (ana, beto, carla) = self.make_room(['Ana', 'Beto', 'Carla'])
+        self.predict(room, beto, {beto: ana, carla: beto, ana: carla})
+        first_pairs = [(ana, beto), (beto, carla), (carla, ana)]
+        self.publish(room, first_pairs)
+        first = room.active_assignment_set
+        self.publish(room, [(ana, carla), (carla, beto), (beto, ana)])
+
+        self.restore(ana, first.id)
+
+        self.assertEqual(Room.objects.get(pk=room.pk).active_assignment_set, first)
+        self.assertEqual(active_pairs(room), {(giver.id, receiver.id) for giver, receiver in first_pairs})
+        # The ranking follows the restored draw
+        self.assertEqual(room.scores.get(participant=beto).score, 3)
+
+    def test_sets_of_other_rooms_cannot_be_restored(self):
+        room, (ana, beto) = self.make_room(['Ana', 'Beto'])
+        other, (carla, dani) = self.make_room(['Carla', 'Dani'])
+        current = draw.save_assignments(room, [(ana, beto), (beto, ana)])
+        foreign = draw.save_assignments(other, [(carla, dani), (dani, carla)])
+
+        for assignment_set_id in (foreign.id, 'nada'):
+            self.restore(ana, assignment_set_id)
+            self.assertEqual(Room.objects.get(pk=room.pk).active_assignment_set, current)
+
+    def test_only_the_admin_can_restore(self):
+        room, (ana, beto) = self.make_room(['Ana', 'Beto'])
+        first = draw.save_assignments(room, [(ana, beto), (beto, ana)])
+        second = draw.save_assignments(room, [(beto, ana), (ana, beto)])
+
+        self.restore(beto, first.id)
+        self.assertEqual(Room.objects.get(pk=room.pk).active_assignment_set, second)
+
+
+class ManualAssignmentTests(RoomTestMixin, TestCase):
+    def test_manual_draw_is_published_as_a_new_set(self):
+        room, (ana, beto, carla) = self.make_room(['Ana', 'Beto', 'Carla'])
+        draw.save_assignments(room, [(ana, beto), (beto, carla), (carla, ana)])
+
+        self.client_for(ana).post(reverse('core:admin_dashboard'), {
+            'action': 'manual_assign_givers',
+            f'giver_for_manual_{ana.id}': beto.id,
+            f'giver_for_manual_{beto.id}': carla.id,
+            f'giver_for_manual_{carla.id}': ana.id,
+        })
+
+        room.refresh_from_db()
+        self.assertEqual(room.status, Room.STATUS_RESULTS)
+        self.assertEqual((room.active_assignment_set.number, room.active_assignment_set.source), (2, AssignmentSet.SOURCE_MANUAL))
+        self.assertEqual(active_pairs(room), {(beto.id, ana.id), (carla.id, beto.id), (ana.id, carla.id)})
+
+    def test_incomplete_manual_draw_keeps_the_current_one(self):
+        room, (ana, beto, carla) = self.make_room(['Ana', 'Beto', 'Carla'])
+        current = draw.save_assignments(room, [(ana, beto), (beto, carla), (carla, ana)])
+
+        self.client_for(ana).post(reverse('core:admin_dashboard'), {
+            'action': 'manual_assign_givers',
+            f'giver_for_manual_{ana.id}': beto.id,
+            f'giver_for_manual_{beto.id}': beto.id,
+        })
+
+        self.assertEqual(Room.objects.get(pk=room.pk).active_assignment_set, current)
+        self.assertEqual(room.assignment_sets.count(), 1)
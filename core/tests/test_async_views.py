@@ -0,0 +1,55 @@
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import include, path, reverse
+
+from core import async_views, urls as core_urls
+from core.models import Room
+from core.predictions import get_predictions_map
+
+from .utils import RoomTestMixin
+
+# core.urls picks the hot views once, from ASYNC_VIEWS, so these tests route to the async ones themselves
+async_patterns = [
+    path('dashboard/', async_views.dashboard_view, name='dashboard'),
+    path('predict/', async_views.prediction_view, name='prediction'),
+    path('results/', async_views.results_view, name='results'),
+]
+urlpatterns = [path('', include((async_patterns + core_urls.urlpatterns, 'core')))]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncViewTests(RoomTestMixin, TestCase):
+    def async_client_for(self, participant):
+        client = AsyncClient()
+        client.cookies = self.client_for(participant).cookies
+        return client
+
+    async def test_dashboard_matches_the_sync_view(self):
+        room, (ana, beto) = await self.amake_room(['Ana', 'Beto'])
+        response = await self.async_client_for(beto).get(reverse('core:dashboard'))
+        self.assertIs(response.resolver_match.func, async_views.dashboard_view)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['participants_list'], ['Ana', 'Beto'])
+        self.assertEqual(response.context['total_participants'], 2)
+        self.assertFalse(response.context['is_admin'])
+
+    async def test_predictions_are_saved_until_the_room_is_locked(self):
+        room, (ana, beto) = await self.amake_room(['Ana', 'Beto'])
+        client = self.async_client_for(ana)
+        response = await client.post(reverse('core:prediction'), {f'giver_for_{beto.id}': ana.id})
+        self.assertRedirects(response, reverse('core:prediction'), fetch_redirect_response=False)
+
+        await Room.objects.filter(pk=room.pk).aupdate(status=Room.STATUS_LOCKED)
+        response = await client.post(reverse('core:prediction'), {f'giver_for_{ana.id}': beto.id})
+        self.assertRedirects(response, reverse('core:dashboard'), fetch_redirect_response=False)
+        self.assertEqual(await sync_to_async(get_predictions_map)(room, ana), {beto.id: ana.id})
+
+    async def test_results_wait_for_the_admin(self):
+        room, (ana, beto) = await self.amake_room(['Ana', 'Beto'])
+        client = self.async_client_for(beto)
+        response = await client.get(reverse('core:results'))
+        self.assertRedirects(response, reverse('core:dashboard'), fetch_redirect_response=False)
+
+        await sync_to_async(self.publish)(room, [(ana, beto), (beto, ana)])
+        response = await client.get(reverse('core:results'))
+        self.assertContains(response, '<span class="text-green-600">Ana</span>')
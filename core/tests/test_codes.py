@@ -0,0 +1,31 @@
+import random
+
+from django.test import SimpleTestCase, TestCase
+
+from core import codes
+
+
+class PermuteTests(SimpleTestCase):
+    def test_permute_is_a_bijection(self):
+        def unpermute(value):
+            left, right = divmod(value, codes.HALF_SPACE)
+            for round_number in reversed(range(codes.FEISTEL_ROUNDS)):
+                left, right = (right - codes._round(round_number, left)) % codes.HALF_SPACE, left
+            return left * codes.HALF_SPACE + right
+
+        rng = random.Random(7)
+        sample = list(range(5000)) + [rng.randrange(codes.CODE_SPACE) for _ in range(5000)] + [codes.CODE_SPACE - 1]
+        permuted = [codes.permute(value) for value in sample]
+        for value, image in zip(sample, permuted):
+            self.assertTrue(0 <= image < codes.CODE_SPACE)
+            self.assertEqual(unpermute(image), value)
+        self.assertEqual(len(set(permuted)), len(set(sample)))
+
+
+class CreateRoomTests(TestCase):
+    def test_created_rooms_get_distinct_codes(self):
+        created = {codes.create_room().code for _ in range(50)}
+        self.assertEqual(len(created), 50)
+        for code in created:
+            self.assertEqual(len(code), codes.CODE_LENGTH)
+            self.assertTrue(set(code) <= set(codes.ALPHABET))
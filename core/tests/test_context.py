@@ -0,0 +1,75 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from core import context
+from core.models import Participant, Room
+from core.predictions import PredictionsLockedError, get_predictions_map, save_predictions
+
+from .utils import RoomTestMixin
+
+
+class ResolveTests(RoomTestMixin, TestCase):
+    def test_room_and_participant_are_read_once(self):
+        room, (ana,) = self.make_room(['Ana'])
+        with self.assertNumQueries(1):
+            resolved_room, participant = context.resolve(room.code, ana.id)
+        with self.assertNumQueries(0):
+            context.resolve(room.code, ana.id)
+        self.assertEqual((resolved_room.pk, participant.pk), (room.pk, ana.pk))
+
+    def test_requests_get_their_own_copies(self):
+        room, (ana,) = self.make_room(['Ana'])
+        resolved_room, _ = context.resolve(room.code, ana.id)
+        resolved_room.status = Room.STATUS_RESULTS
+        self.assertEqual(context.resolve(room.code, ana.id)[0].status, Room.STATUS_PREDICTING)
+
+    def test_saving_the_room_invalidates_it(self):
+        room, (ana,) = self.make_room(['Ana'])
+        context.resolve(room.code, ana.id)
+        room.status = Room.STATUS_LOCKED
+        room.save()
+        self.assertEqual(context.resolve(room.code, ana.id)[0].status, Room.STATUS_LOCKED)
+
+    def test_participant_of_another_room_is_rejected(self):
+        room, (ana,) = self.make_room(['Ana'])
+        other, (beto,) = self.make_room(['Beto'])
+        with self.assertRaises(Participant.DoesNotExist):
+            context.resolve(room.code, beto.id)
+
+
+class RoomRequiredTests(RoomTestMixin, TestCase):
+    def test_missing_participant_clears_the_session(self):
+        room, (ana, beto) = self.make_room(['Ana', 'Beto'])
+        client = self.client_for(beto)
+        beto.delete()
+
+        response = client.get(reverse('core:dashboard'))
+        self.assertRedirects(response, reverse('core:home'))
+        self.assertNotIn('room_code', client.session)
+
+    def test_admin_pages_reject_other_participants(self):
+        room, (ana, beto) = self.make_room(['Ana', 'Beto'])
+        self.assertEqual(self.client_for(ana).get(reverse('core:admin_dashboard')).status_code, 200)
+        self.assertRedirects(self.client_for(beto).get(reverse('core:admin_dashboard')), reverse('core:home'))
+
+
+class StaleRoomTests(RoomTestMixin, TestCase):
+    def test_saving_on_a_cached_predicting_room_fails_once_locked(self):
+        room, (ana, beto) = self.make_room(['Ana', 'Beto'])
+        cached_room, participant = context.resolve(room.code, ana.id)
+        # Another process locks the room without touching this process's cache
+        Room.objects.filter(pk=room.pk).update(status=Room.STATUS_LOCKED)
+
+        with self.assertRaises(PredictionsLockedError):
+            save_predictions(cached_room, participant, {beto: ana.id}, room.participants.in_bulk())
+        self.assertEqual(get_predictions_map(room, ana), {})
+
+    def test_prediction_view_redirects_once_locked(self):
+        room, (ana, beto) = self.make_room(['Ana', 'Beto'])
+        client = self.client_for(ana)
+        client.get(reverse('core:prediction'))
+        Room.objects.filter(pk=room.pk).update(status=Room.STATUS_LOCKED)
+
+        response = client.post(reverse('core:prediction'), {f'giver_for_{beto.id}': ana.id})
+        self.assertRedirects(response, reverse('core:dashboard'), fetch_redirect_response=False)
+        self.assertEqual(get_predictions_map(room, ana), {})
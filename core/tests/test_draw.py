@@ -0,0 +1,113 @@
+import random
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core import draw
+
+
+def _cycles(perm):
+    """Returns the number of cycles of the permutation."""
+    seen = [False] * len(perm)
+    cycles = 0
+    for start in range(len(perm)):
+        if not seen[start]:
+            cycles += 1
+            i = start
+            while not seen[i]:
+                seen[i] = True
+                i = perm[i]
+    return cycles
+
+
+class DrawTests(SimpleTestCase):
+    def assertValidDraw(self, perm, exclusions=None):
+        n = len(perm)
+        self.assertEqual(sorted(perm), list(range(n)))
+        for giver, receiver in enumerate(perm):
+            self.assertNotEqual(giver, receiver)
+            if exclusions:
+                self.assertNotIn(receiver, exclusions.get(giver, ()))
+
+    def test_random_derangement_has_no_fixed_points(self):
+        rng = random.Random(0)
+        for n in range(2, 60):
+            self.assertValidDraw(draw.random_derangement(n, rng))
+
+    def test_random_cycle_is_a_single_cycle(self):
+        rng = random.Random(1)
+        for n in range(2, 60):
+            perm = draw.random_cycle(n, rng)
+            self.assertValidDraw(perm)
+            self.assertEqual(_cycles(perm), 1)
+
+    def test_random_permutation_without_mutual_pairs(self):
+        rng = random.Random(2)
+        for n in range(3, 60):
+            perm = draw.random_permutation(n, draw.MODE_NO_MUTUAL, rng)
+            self.assertValidDraw(perm)
+            self.assertFalse(draw.has_mutual_pairs(perm))
+
+    def test_constrained_permutation_respects_exclusions(self):
+        rng = random.Random(3)
+        for n in range(6, 40):
+            # Every giver and every receiver keeps n - 3 options, which always allows a single chain
+            exclusions = {i: {(i + 1) % n, (i + 3) % n} for i in range(n)}
+            for mode, _ in draw.MODE_CHOICES:
+                perm = draw.constrained_permutation(n, exclusions, mode, rng)
+                self.assertValidDraw(perm, exclusions)
+                if mode == draw.MODE_NO_MUTUAL:
+                    self.assertFalse(draw.has_mutual_pairs(perm))
+                if mode == draw.MODE_SINGLE_CYCLE:
+                    self.assertEqual(_cycles(perm), 1)
+
+    def test_constrained_permutation_finds_the_only_single_chain(self):
+        rng = random.Random(4)
+        n = 8
+        # Only i -> i + 1 is allowed
+        exclusions = {i: set(range(n)) - {i, (i + 1) % n} for i in range(n)}
+        for mode, _ in draw.MODE_CHOICES:
+            self.assertEqual(draw.constrained_permutation(n, exclusions, mode, rng), [(i + 1) % n for i in range(n)])
+
+    def test_constrained_permutation_raises_when_infeasible(self):
+        with self.assertRaises(draw.DrawError) as raised:
+            draw.constrained_permutation(3, {0: {1, 2}}, draw.MODE_ANY, random.Random(5))
+        self.assertEqual(raised.exception.participant, 0)
+
+    def test_no_mutual_raises_when_every_draw_has_a_swap(self):
+        # 0 and 1 can only give to each other
+        exclusions = {0: {2, 3}, 1: {2, 3}}
+        self.assertEqual(draw.constrained_permutation(4, exclusions, draw.MODE_ANY, random.Random(6))[:2], [1, 0])
+        with self.assertRaises(draw.DrawError):
+            draw.constrained_permutation(4, exclusions, draw.MODE_NO_MUTUAL, random.Random(6))
+
+    def test_forced_swaps_are_rejected_before_searching(self):
+        n = 1000
+        by_giver = {0: set(range(2, n)), 1: set(range(2, n))}
+        # Only 1 can give to 0 and only 0 can give to 1
+        by_receiver = {giver: {0, 1} for giver in range(2, n)}
+        for exclusions in (by_giver, by_receiver):
+            for mode in (draw.MODE_NO_MUTUAL, draw.MODE_SINGLE_CYCLE):
+                with mock.patch.object(draw, '_single_chain') as single_chain, self.assertRaises(draw.DrawError) as raised:
+                    draw.constrained_permutation(n, exclusions, mode, random.Random(7))
+                single_chain.assert_not_called()
+                self.assertIn(raised.exception.participant, (0, 1))
+
+    def test_single_chain_across_closed_groups_is_rejected_before_searching(self):
+        n = 400
+        half = n // 2
+        # Nobody may give to the other half
+        exclusions = {i: set(range(half, n)) if i < half else set(range(half)) for i in range(n)}
+        with mock.patch.object(draw, '_search_cycle') as search_cycle, self.assertRaises(draw.DrawError):
+            draw.constrained_permutation(n, exclusions, draw.MODE_SINGLE_CYCLE, random.Random(8))
+        search_cycle.assert_not_called()
+
+    def test_single_chain_search_gives_up_after_the_time_limit(self):
+        n = 60
+        half = n // 2
+        # The halves only connect through 0 <-> half, so every chain would cross twice through them
+        exclusions = {i: set(range(half, n)) if i < half else set(range(half)) for i in range(n)}
+        exclusions[0].discard(half)
+        exclusions[half].discard(0)
+        with mock.patch.object(draw, 'MAX_CYCLE_SEARCH_SECONDS', 0.05), self.assertRaises(draw.DrawError):
+            draw.constrained_permutation(n, exclusions, draw.MODE_SINGLE_CYCLE, random.Random(9))
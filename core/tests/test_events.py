@@ -0,0 +1,69 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.security.websocket import OriginValidator
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.test import TestCase
+from django.urls import reverse
+
+from amigo_secreto.asgi import application
+from core.events import room_group_name
+
+from .utils import RoomTestMixin
+
+
+class RoomEventTests(RoomTestMixin, TestCase):
+    def listen(self, room):
+        """Returns a channel of the in-memory layer subscribed to the room's events."""
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(room_group_name(room.code), channel)
+        return lambda: async_to_sync(layer.receive)(channel)['payload']
+
+    def test_joins_are_sent_as_deltas(self):
+        room, (ana,) = self.make_room(['Ana'])
+        receive = self.listen(room)
+        session = self.client.session
+        session['room_code'] = room.code
+        session.save()
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('core:choose_name'), {'name': 'Beto'})
+        self.assertEqual(receive(), {'type': 'participant_update', 'participant': 'Beto', 'count': 2})
+
+    def test_status_changes_are_broadcast(self):
+        room, (ana, beto) = self.make_room(['Ana', 'Beto'])
+        receive = self.listen(room)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client_for(ana).post(reverse('core:admin_dashboard'), {'action': 'lock_predictions'})
+        self.assertEqual(receive()['status'], room.STATUS_LOCKED)
+
+
+class RoomSocketTests(RoomTestMixin, TestCase):
+    def connect(self, participant, room_code):
+        client = self.client_for(participant)
+        cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+        return WebsocketCommunicator(
+            application, f'/ws/room/{room_code}/', headers=[(b'cookie', cookie.encode()), (b'origin', b'http://testserver')],
+        )
+
+    async def test_sockets_only_join_their_own_room(self):
+        room, (ana,) = await self.amake_room(['Ana'])
+        other, _ = await self.amake_room(['Beto'])
+
+        communicator = self.connect(ana, other.code)
+        connected, _ = await communicator.connect()
+        self.assertFalse(connected)
+
+        communicator = self.connect(ana, room.code)
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        await get_channel_layer().group_send(
+            room_group_name(room.code), {'type': 'room.event', 'payload': {'type': 'results_ready'}},
+        )
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'results_ready'})
+        await communicator.disconnect()
+
+    def test_socket_origins_are_checked(self):
+        self.assertIsInstance(application.application_mapping['websocket'], OriginValidator)
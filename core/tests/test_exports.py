@@ -0,0 +1,56 @@
+import json
+
+from django.test import TestCase
+from django.urls import reverse
+
+from core.models import Room, Score
+
+from .utils import RoomTestMixin
+
+
+class ExportTests(RoomTestMixin, TestCase):
+    def export(self, client, kind, fmt='csv'):
+        response = client.get(reverse('core:export', args=[kind, fmt]))
+        if response.status_code != 200:
+            return response, None
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_only_the_admin_can_export(self):
+        room, (ana, beto) = self.make_room(['Ana', 'Beto'])
+        for client in (self.client, self.client_for(beto)):
+            response, _ = self.export(client, 'assignments')
+            self.assertRedirects(response, reverse('core:home'))
+        response, _ = self.export(self.client_for(ana), 'assignments')
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="{room.code}-assignments.csv"')
+
+    def test_unknown_exports_are_not_found(self):
+        room, (ana,) = self.make_room(['Ana'])
+        client = self.client_for(ana)
+        self.assertEqual(self.export(client, 'scores')[0].status_code, 404)
+        self.assertEqual(self.export(client, 'ranking', 'xml')[0].status_code, 404)
+
+    def test_ranking_export_does_not_score_the_room(self):
+        room, (ana, beto) = self.make_room(['Ana', 'Beto'])
+        version = Room.objects.get(pk=room.pk).version
+
+        _, content = self.export(self.client_for(ana), 'ranking')
+        self.assertEqual(content, 'rank,participant,score,winner\r\n')
+        self.assertFalse(Score.objects.filter(room=room).exists())
+        self.assertEqual(Room.objects.get(pk=room.pk).version, version)
+
+    def test_exports_stream_the_room_data(self):
+        room, (ana, beto, carla) = self.make_room(['Ana', 'Beto', 'Carla'])
+        self.predict(room, beto, {carla: beto, beto: ana})
+        self.publish(room, [(ana, beto), (beto, carla), (carla, ana)])
+        client = self.client_for(ana)
+
+        _, content = self.export(client, 'ranking')
+        self.assertEqual(content.splitlines(), [
+            'rank,participant,score,winner', '1,Beto,2,True', '2,Ana,0,False', '2,Carla,0,False',
+        ])
+        response, content = self.export(client, 'predictions', 'ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertCountEqual([json.loads(line) for line in content.splitlines()], [
+            {'participant': 'Beto', 'predicted_giver': 'Beto', 'predicted_receiver': 'Carla', 'correct': True},
+            {'participant': 'Beto', 'predicted_giver': 'Ana', 'predicted_receiver': 'Beto', 'correct': True},
+        ])
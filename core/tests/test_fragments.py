@@ -0,0 +1,35 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from core import draw
+from core.leaderboard import refresh_scores
+
+from .utils import RoomTestMixin
+
+
+class ResultsFragmentTests(RoomTestMixin, TestCase):
+    def test_repeat_views_only_check_the_version(self):
+        room, (ana, beto, carla) = self.make_room(['Ana', 'Beto', 'Carla'])
+        self.predict(room, beto, {ana: carla})
+        self.publish(room, [(ana, beto), (beto, carla), (carla, ana)])
+        client = self.client_for(ana)
+        client.get(reverse('core:results'))
+
+        with self.assertNumQueries(1):
+            response = client.get(reverse('core:results'))
+        self.assertContains(response, 'Beto')
+
+    def test_new_draws_render_new_fragments(self):
+        room, (ana, beto, carla) = self.make_room(['Ana', 'Beto', 'Carla'])
+        self.predict(room, beto, {beto: ana, carla: beto})
+        self.publish(room, [(ana, beto), (beto, carla), (carla, ana)])
+        client = self.client_for(ana)
+        response = client.get(reverse('core:results'))
+        self.assertContains(response, '¡El ganador es <span class="text-green-600">Beto</span>!')
+        self.assertContains(response, '<span class="font-semibold">Ana</span> le regala a <span class="font-semibold">Beto</span>')
+
+        draw.save_assignments(room, [(ana, carla), (carla, beto), (beto, ana)])
+        refresh_scores(room)
+        response = client.get(reverse('core:results'))
+        self.assertContains(response, 'Entre: <span class="text-green-600">Ana</span>')
+        self.assertContains(response, '<span class="font-semibold">Ana</span> le regala a <span class="font-semibold">Carla</span>')
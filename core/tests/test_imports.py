@@ -0,0 +1,69 @@
+from io import BytesIO
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from core import imports
+from core.models import Room
+
+from .utils import RoomTestMixin
+
+
+class ReadNamesTests(SimpleTestCase):
+    def test_plain_lists_skip_the_header_and_blank_lines(self):
+        stream = BytesIO(b'\xef\xbb\xbfNombre\nAna\n\n  Beto  \n')
+        self.assertEqual(list(imports.read_names(stream)), [(2, 'Ana'), (4, 'Beto')])
+
+    def test_csv_rows_use_the_first_column(self):
+        stream = BytesIO(b'name,email\n"Perez, Ana",ana@example.com\nBeto,beto@example.com\n')
+        self.assertEqual(list(imports.read_names(stream, csv_format=True)), [(2, 'Perez, Ana'), (3, 'Beto')])
+
+
+class ImportParticipantsTests(RoomTestMixin, TestCase):
+    def test_duplicates_are_rejected_with_their_reason(self):
+        room, (ana,) = self.make_room(['Ana'])
+        rows = [(1, 'Beto'), (2, 'Ana'), (3, 'Beto'), (4, 'x' * (imports.NAME_MAX_LENGTH + 1)), (5, 'Carla')]
+        report = imports.import_participants(room, rows)
+
+        self.assertEqual(report.created, 2)
+        self.assertEqual([(line, reason) for line, _, reason in report.rejected], [
+            (2, imports.REASON_EXISTS), (3, imports.REASON_DUPLICATE), (4, imports.REASON_TOO_LONG),
+        ])
+        self.assertEqual(list(room.participants.order_by('ordinal').values_list('name', 'ordinal')), [
+            ('Ana', 0), ('Beto', 1), ('Carla', 2),
+        ])
+        self.assertEqual(Room.objects.values_list('participant_count', flat=True).get(pk=room.pk), 3)
+
+    def test_names_are_inserted_in_batches(self):
+        room, (ana,) = self.make_room(['Ana'])
+        with mock.patch.object(imports, 'IMPORT_BATCH_SIZE', 2), \
+                mock.patch.object(imports.Participant.objects, 'bulk_create', wraps=imports.Participant.objects.bulk_create) as bulk_create:
+            report = imports.import_participants(room, enumerate([f'P{i}' for i in range(5)], start=1))
+        self.assertEqual(report.created, 5)
+        self.assertEqual([len(call.args[0]) for call in bulk_create.call_args_list], [2, 2, 1])
+        self.assertEqual(room.participants.count(), 6)
+
+
+class ImportViewTests(RoomTestMixin, TestCase):
+    def upload(self, client, content, name='nombres.txt'):
+        return client.post(reverse('core:admin_dashboard'), {
+            'action': 'import_participants',
+            'participants_file': SimpleUploadedFile(name, content),
+        })
+
+    def test_admin_gets_the_per_row_report(self):
+        room, (ana, beto) = self.make_room(['Ana', 'Beto'])
+        response = self.upload(self.client_for(ana), 'nombre,correo\nCarla,c@example.com\nBeto,b@example.com\n'.encode(), 'sala.csv')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['import_report'].created, 1)
+        self.assertContains(response, 'Línea 3: Beto')
+        self.assertContains(response, 'core/js/lazy_select.js')
+        self.assertEqual(sorted(room.participants.values_list('name', flat=True)), ['Ana', 'Beto', 'Carla'])
+
+    def test_participants_cannot_import(self):
+        room, (ana, beto) = self.make_room(['Ana', 'Beto'])
+        self.assertRedirects(self.upload(self.client_for(beto), b'Carla\n'), reverse('core:home'))
+        self.assertEqual(room.participants.count(), 2)
@@ -0,0 +1,60 @@
+from django.test import TestCase
+
+from core.leaderboard import get_results, refresh_scores
+from core.models import Room
+
+from .utils import RoomTestMixin
+
+
+class RefreshScoresTests(RoomTestMixin, TestCase):
+    def test_ranks_share_ties(self):
+        room, (ana, beto, carla, dani) = self.make_room(['Ana', 'Beto', 'Carla', 'Dani'])
+        scores = refresh_scores(room, hits={ana.id: 2, beto.id: 5, carla.id: 2})
+        ranks = {score.participant_id: (score.score, score.rank, score.is_winner) for score in scores}
+        self.assertEqual(ranks, {
+            beto.id: (5, 1, True),
+            ana.id: (2, 2, False),
+            carla.id: (2, 2, False),
+            dani.id: (0, 4, False),
+        })
+        self.assertEqual(room.scores.count(), 4)
+
+    def test_every_top_score_wins(self):
+        room, (ana, beto, carla) = self.make_room(['Ana', 'Beto', 'Carla'])
+        scores = refresh_scores(room, hits={ana.id: 1, beto.id: 1})
+        self.assertEqual({score.participant_id for score in scores if score.is_winner}, {ana.id, beto.id})
+        self.assertEqual([score.rank for score in scores], [1, 1, 3])
+
+    def test_scores_count_correct_predictions(self):
+        room, (ana, beto, carla) = self.make_room(['Ana', 'Beto', 'Carla'])
+        # Ana guesses the whole chain, Beto one pair, Carla nothing
+        self.predict(room, ana, {beto: ana, carla: beto, ana: carla})
+        self.predict(room, beto, {beto: ana, carla: ana})
+        self.predict(room, carla, {ana: beto})
+        version = Room.objects.get(pk=room.pk).version
+
+        self.publish(room, [(ana, beto), (beto, carla), (carla, ana)])
+
+        ranking = dict(room.scores.values_list('participant_id', 'rank'))
+        self.assertEqual(dict(room.scores.values_list('participant_id', 'score')), {ana.id: 3, beto.id: 1, carla.id: 0})
+        self.assertEqual(ranking, {ana.id: 1, beto.id: 2, carla.id: 3})
+        self.assertGreater(Room.objects.get(pk=room.pk).version, version)
+
+
+class GetResultsTests(RoomTestMixin, TestCase):
+    def test_results_read_the_stored_ranking(self):
+        room, (ana, beto) = self.make_room(['Ana', 'Beto'])
+        self.predict(room, ana, {beto: ana, ana: beto})
+        self.publish(room, [(ana, beto), (beto, ana)])
+
+        version = Room.objects.get(pk=room.pk).version
+        results = get_results(room)
+        self.assertEqual(Room.objects.get(pk=room.pk).version, version)
+        self.assertEqual(results['winners'], ['Ana'])
+        self.assertEqual([name for name, _ in results['ranking']], ['Ana', 'Beto'])
+        self.assertEqual(
+            [prediction['is_correct'] for prediction in results['ranking'][0][1]['predictions']], [True, True],
+        )
+        self.assertCountEqual(results['assignments'], [
+            {'giver': 'Ana', 'receiver': 'Beto'}, {'giver': 'Beto', 'receiver': 'Ana'},
+        ])
@@ -0,0 +1,56 @@
+import re
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics, middleware
+
+from .utils import RoomTestMixin
+
+
+class MetricsAccessTests(TestCase):
+    def test_metrics_are_hidden_without_a_token(self):
+        with mock.patch.object(metrics, 'METRICS_TOKEN', None):
+            self.assertEqual(self.client.get(reverse('core:metrics')).status_code, 403)
+            with override_settings(DEBUG=True):
+                self.assertEqual(self.client.get(reverse('core:metrics')).status_code, 200)
+
+    def test_metrics_require_the_bearer_token(self):
+        self.client.get(reverse('core:home'))
+        with mock.patch.object(metrics, 'METRICS_TOKEN', 's3cret'):
+            self.assertEqual(self.client.get(reverse('core:metrics')).status_code, 403)
+            self.assertEqual(
+                self.client.get(reverse('core:metrics'), HTTP_AUTHORIZATION='Bearer nope').status_code, 403,
+            )
+            response = self.client.get(reverse('core:metrics'), HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('amigo_request_duration_seconds_count{view="core:home"}', response.content.decode())
+
+
+class RequestMetricsTests(RoomTestMixin, TestCase):
+    def timing(self, response):
+        return dict(re.findall(r'(\w+);dur=([\d.]+)', response['Server-Timing']))
+
+    def test_responses_report_queries_and_template_time(self):
+        room, (ana,) = self.make_room(['Ana'])
+        response = self.client_for(ana).get(reverse('core:dashboard'))
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertGreater(float(self.timing(response)['tpl']), 0)
+
+        response = self.client.get(reverse('core:api_room'))
+        self.assertIn('desc="0 queries"', response['Server-Timing'])
+        self.assertEqual(float(self.timing(response)['tpl']), 0)
+
+    def test_observations_are_labelled_by_view(self):
+        before = metrics.query_count._series.get('core:dashboard', {}).get('count', 0)
+        room, (ana,) = self.make_room(['Ana'])
+        self.client_for(ana).get(reverse('core:dashboard'))
+        self.assertEqual(metrics.query_count._series['core:dashboard']['count'], before + 1)
+
+    def test_query_heavy_requests_are_logged(self):
+        room, (ana,) = self.make_room(['Ana'])
+        with mock.patch.object(middleware, 'QUERY_COUNT_WARNING_THRESHOLD', 0), \
+                self.assertLogs('core.middleware', 'WARNING') as logs:
+            self.client_for(ana).get(reverse('core:dashboard'))
+        self.assertIn('core:dashboard ran', logs.output[0])
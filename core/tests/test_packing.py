@@ -0,0 +1,51 @@
+from array import array
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from core import packing, predictions
+from core.models import Prediction, PredictionVector
+
+from .utils import RoomTestMixin
+
+
+class PackingTests(SimpleTestCase):
+    def test_pack_round_trip(self):
+        entries = array('I', [3, 0, 1, 70000, 0, 0])
+        self.assertEqual(packing.unpack(packing.pack(entries)), array('I', [3, 0, 1, 70000]))
+        self.assertEqual(packing.pack(array('I', [0, 0])), b'')
+
+    def test_encode_decode_round_trip(self):
+        ordinals_by_id = {101: 0, 102: 1, 103: 2, 104: 3}
+        ids_by_ordinal = {ordinal: participant_id for participant_id, ordinal in ordinals_by_id.items()}
+        predictions = {101: 103, 102: 101, 104: 104}
+        self.assertEqual(packing.decode(packing.encode(predictions, ordinals_by_id), ids_by_ordinal), predictions)
+        self.assertEqual(packing.decode(packing.encode({}, ordinals_by_id), ids_by_ordinal), {})
+
+    def test_decode_skips_deleted_participants(self):
+        data = packing.encode({101: 102, 102: 101}, {101: 0, 102: 1})
+        self.assertEqual(packing.decode(data, {0: 101}), {})
+
+
+class ConvertPredictionsTests(RoomTestMixin, TestCase):
+    def test_predictions_survive_packing_and_unpacking(self):
+        room, (ana, beto, carla) = self.make_room(['Ana', 'Beto', 'Carla'])
+        with mock.patch.object(predictions, 'STORAGE', predictions.STORAGE_ROWS):
+            self.predict(room, ana, {beto: carla, carla: ana})
+            self.predict(room, beto, {ana: carla})
+            stored = {user: predictions.get_predictions_map(room, user) for user in (ana, beto)}
+
+        call_command('pack_predictions', room.code.lower(), stdout=StringIO())
+        self.assertFalse(Prediction.objects.filter(room=room).exists())
+        self.assertEqual(PredictionVector.objects.filter(room=room).count(), 2)
+        with mock.patch.object(predictions, 'STORAGE', predictions.STORAGE_PACKED):
+            self.assertEqual({user: predictions.get_predictions_map(room, user) for user in (ana, beto)}, stored)
+
+        output = StringIO()
+        call_command('unpack_predictions', stdout=output)
+        self.assertIn('3 rows written', output.getvalue())
+        self.assertFalse(PredictionVector.objects.filter(room=room).exists())
+        with mock.patch.object(predictions, 'STORAGE', predictions.STORAGE_ROWS):
+            self.assertEqual({user: predictions.get_predictions_map(room, user) for user in (ana, beto)}, stored)
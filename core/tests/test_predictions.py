@@ -0,0 +1,50 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.predictions import get_predictions_map, save_predictions
+
+from .utils import RoomTestMixin
+
+
+class SavePredictionsTests(RoomTestMixin, TestCase):
+    def test_only_changed_predictions_are_written(self):
+        room, (ana, beto, carla) = self.make_room(['Ana', 'Beto', 'Carla'])
+        self.predict(room, ana, {beto: carla, carla: beto})
+        self.predict(room, ana, {beto: carla, carla: ana, ana: beto})
+
+        self.assertEqual(get_predictions_map(room, ana), {beto.id: carla.id, carla.id: ana.id, ana.id: beto.id})
+        ana.refresh_from_db()
+        self.assertEqual(ana.predictions_count, 3)
+
+    def test_invalid_givers_are_reported_per_receiver(self):
+        room, (ana, beto, carla) = self.make_room(['Ana', 'Beto', 'Carla'])
+        other, (stranger,) = self.make_room(['Dani'])
+        participants_by_id = room.participants.in_bulk()
+        choices = {ana: 'abc', beto: stranger.id, carla: carla.id}
+
+        self.assertEqual(save_predictions(room, ana, choices, participants_by_id), [ana, beto, carla])
+        self.assertEqual(get_predictions_map(room, ana), {})
+
+    def test_saving_costs_the_same_queries_for_any_room_size(self):
+        counts = []
+        for size in (4, 40):
+            room, participants = self.make_room([f'P{i}' for i in range(size)])
+            client = self.client_for(participants[0])
+            data = {f'giver_for_{receiver.id}': participants[i - 1].id for i, receiver in enumerate(participants)}
+            with CaptureQueriesContext(connection) as queries:
+                response = client.post(reverse('core:prediction'), data)
+            self.assertRedirects(response, reverse('core:prediction'), fetch_redirect_response=False)
+            self.assertEqual(len(get_predictions_map(room, participants[0])), size)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_prediction_view_reports_invalid_choices(self):
+        room, (ana, beto) = self.make_room(['Ana', 'Beto'])
+        response = self.client_for(ana).post(
+            reverse('core:prediction'), {f'giver_for_{beto.id}': 'nadie', f'giver_for_{ana.id}': beto.id}, follow=True,
+        )
+        messages = [str(message) for message in response.context['messages']]
+        self.assertIn("Error al procesar la predicción para Beto.", messages)
+        self.assertEqual(get_predictions_map(room, ana), {ana.id: beto.id})
@@ -0,0 +1,46 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Participant, Room
+
+from .utils import RoomTestMixin
+
+
+class ProgressCounterTests(RoomTestMixin, TestCase):
+    def participant_count(self, room):
+        return Room.objects.values_list('participant_count', flat=True).get(pk=room.pk)
+
+    def test_participant_count_follows_joins_and_removals(self):
+        room, (ana, beto, carla) = self.make_room(['Ana', 'Beto', 'Carla'])
+        self.assertEqual(self.participant_count(room), 3)
+        carla.delete()
+        self.assertEqual(self.participant_count(room), 2)
+        self.assertEqual(list(room.participants.order_by('ordinal').values_list('ordinal', flat=True)), [0, 1])
+
+    def test_predictions_count_follows_new_predictions_only(self):
+        room, (ana, beto, carla) = self.make_room(['Ana', 'Beto', 'Carla'])
+        self.predict(room, ana, {beto: carla, carla: ana})
+        self.predict(room, ana, {beto: ana})
+        self.assertEqual(Participant.objects.get(pk=ana.pk).predictions_count, 2)
+
+    def test_dashboard_shows_the_caller_progress(self):
+        room, (ana, beto) = self.make_room(['Ana', 'Beto'])
+        self.predict(room, ana, {beto: ana, ana: beto})
+        response = self.client_for(ana).get(reverse('core:dashboard'))
+        self.assertEqual(response.context['completed_predictions_count'], 2)
+        self.assertTrue(response.context['predictions_sent'])
+
+
+class AdminProgressTests(RoomTestMixin, TestCase):
+    def test_progress_board_costs_the_same_queries_for_any_room_size(self):
+        counts = []
+        for size in (3, 30):
+            room, participants = self.make_room([f'P{i:02}' for i in range(size)])
+            self.predict(room, participants[1], {participants[0]: participants[2]})
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client_for(participants[0]).get(reverse('core:admin_dashboard'))
+            self.assertContains(response, f'1 de {size}')
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
@@ -0,0 +1,62 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from core import context
+from core.models import (
+    Assignment, AssignmentSet, Exclusion, Participant, Prediction, PredictionVector, Room, Score,
+)
+
+from .utils import RoomTestMixin
+
+
+class PurgeRoomsTests(RoomTestMixin, TestCase):
+    def purge(self, *args, **options):
+        output = StringIO()
+        call_command('purge_rooms', *args, pause=0, stdout=output, **options)
+        return output.getvalue()
+
+    def finished_room(self, names):
+        room, participants = self.make_room(names)
+        self.predict(room, participants[0], {participants[1]: participants[0]})
+        Exclusion.objects.create(room=room, giver=participants[0], receiver=participants[1])
+        self.publish(room, list(zip(participants, participants[1:] + participants[:1])))
+        return room, participants
+
+    def test_rooms_are_deleted_with_every_child_row(self):
+        room, (ana, beto, carla) = self.finished_room(['Ana', 'Beto', 'Carla'])
+        kept, _ = self.make_room(['Dani', 'Eva'])
+        context.resolve(room.code, ana.id)
+
+        output = self.purge(status=[Room.STATUS_RESULTS], chunk_size=1)
+
+        self.assertIn(f"Room {room.code}:", output)
+        self.assertEqual(list(Room.objects.values_list('pk', flat=True)), [kept.pk])
+        for model in (Participant, Prediction, PredictionVector, Score, Assignment, AssignmentSet, Exclusion):
+            self.assertFalse(model.objects.filter(room_id=room.pk).exists(), model.__name__)
+        self.assertEqual(kept.participants.count(), 2)
+        with self.assertRaises(Participant.DoesNotExist):
+            context.resolve(room.code, ana.id)
+
+    def test_dry_run_only_lists_the_rooms(self):
+        room, _ = self.finished_room(['Ana', 'Beto'])
+        output = self.purge(status=[Room.STATUS_RESULTS], dry_run=True)
+        self.assertIn(f"Room {room.code}: 2 participants", output)
+        self.assertTrue(Room.objects.filter(pk=room.pk).exists())
+
+    def test_rooms_are_selected_by_age(self):
+        old, _ = self.make_room(['Ana'])
+        new, _ = self.make_room(['Beto'])
+        Room.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=40))
+
+        self.purge(older_than=30)
+        self.assertEqual(list(Room.objects.values_list('pk', flat=True)), [new.pk])
+
+    def test_a_retention_policy_is_required(self):
+        self.make_room(['Ana'])
+        with self.assertRaises(CommandError):
+            self.purge()
+        self.assertEqual(Room.objects.count(), 1)
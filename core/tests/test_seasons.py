@@ -0,0 +1,114 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from core import draw, seasons
+from core.leaderboard import refresh_scores
+from core.models import Participant, Room, SeasonEntry
+
+from .utils import RoomTestMixin
+
+
+class SeasonRollUpTests(RoomTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.season = seasons.get_or_create_season('Oficinas 2026')
+
+    def standings(self):
+        return {
+            standing.name: (standing.score, standing.rooms, standing.wins)
+            for standing in self.season.standings.all()
+        }
+
+    def test_room_counts_once_results_are_enabled(self):
+        room, (ana, beto) = self.make_room(['Ana', 'Beto'], season=self.season)
+        self.predict(room, ana, {beto: ana})
+        refresh_scores(room)
+        self.assertEqual(self.standings(), {})
+
+        self.publish(room, [(ana, beto), (beto, ana)])
+        self.assertEqual(self.standings(), {'Ana': (1, 1, 1), 'Beto': (0, 1, 0)})
+
+    def test_rescoring_applies_only_the_difference(self):
+        room, (ana, beto, carla) = self.make_room(['Ana', 'Beto', 'Carla'], season=self.season)
+        other, (dani, eva) = self.make_room(['Dani', 'Eva'], season=self.season)
+        self.predict(room, ana, {beto: ana, carla: beto})
+        self.publish(room, [(ana, beto), (beto, carla), (carla, ana)])
+        self.publish(other, [(dani, eva), (eva, dani)])
+        self.assertEqual(self.standings(), {
+            'Ana': (2, 1, 1), 'Beto': (0, 1, 0), 'Carla': (0, 1, 0), 'Dani': (0, 1, 1), 'Eva': (0, 1, 1),
+        })
+
+        # A new draw rescores the room: Ana loses both hits and everybody ties on zero
+        draw.save_assignments(room, [(ana, carla), (carla, beto), (beto, ana)])
+        refresh_scores(room)
+        self.assertEqual(self.standings(), {
+            'Ana': (0, 1, 1), 'Beto': (0, 1, 1), 'Carla': (0, 1, 1), 'Dani': (0, 1, 1), 'Eva': (0, 1, 1),
+        })
+        self.assertEqual(SeasonEntry.objects.filter(room=room).count(), 3)
+
+        # Leaving the season removes the room's contribution, and players without rooms disappear
+        seasons.set_room_season(room, None)
+        self.assertEqual(self.standings(), {'Dani': (0, 1, 1), 'Eva': (0, 1, 1)})
+
+    def test_players_are_matched_by_player_id(self):
+        room, (ana, beto) = self.make_room(['Ana', 'Beto'], season=self.season)
+        other, (namesake, renamed) = self.make_room(['Ana', 'Bea'], season=self.season)
+        Participant.objects.filter(pk=renamed.pk).update(player_id=beto.player_id)
+        self.predict(room, beto, {ana: beto})
+        self.predict(other, renamed, {namesake: renamed})
+        self.publish(room, [(ana, beto), (beto, ana)])
+        self.publish(other, [(namesake, renamed), (renamed, namesake)])
+
+        rows = sorted(self.season.standings.values_list('name', 'score', 'rooms'))
+        self.assertEqual(rows, [('Ana', 0, 1), ('Ana', 0, 1), ('Bea', 2, 2)])
+
+    def test_purged_rooms_keep_counting(self):
+        room, (ana, beto) = self.make_room(['Ana', 'Beto'], season=self.season)
+        self.predict(room, ana, {beto: ana})
+        self.publish(room, [(ana, beto), (beto, ana)])
+        before = self.standings()
+
+        call_command('purge_rooms', status=[Room.STATUS_RESULTS], pause=0, stdout=StringIO())
+
+        self.assertFalse(Room.objects.filter(pk=room.pk).exists())
+        self.assertEqual(self.standings(), before)
+        self.assertEqual(SeasonEntry.objects.filter(season=self.season, room__isnull=True).count(), 2)
+
+
+class SeasonLeaderboardTests(RoomTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.season = seasons.get_or_create_season('Oficinas 2026')
+        room, (ana, beto, carla) = self.make_room(['Ana', 'Beto', 'Carla'], season=self.season)
+        self.predict(room, ana, {beto: ana, carla: beto})
+        self.predict(room, beto, {beto: ana, carla: beto})
+        self.publish(room, [(ana, beto), (beto, carla), (carla, ana)])
+
+    def test_names_are_matched_by_slug(self):
+        self.assertEqual(seasons.get_or_create_season('  oficinas   2026 '), self.season)
+        with self.assertRaises(seasons.SeasonError):
+            seasons.get_or_create_season('¡!')
+
+    def test_ties_share_a_rank(self):
+        ranks = {standing.name: standing.rank for standing in seasons.get_standings(self.season)}
+        self.assertEqual(ranks, {'Ana': 1, 'Beto': 1, 'Carla': 3})
+        self.assertEqual(len(seasons.get_standings(self.season, limit=2)), 2)
+
+    def test_api_returns_the_top_players(self):
+        url = reverse('core:api_season', args=[self.season.slug])
+        response = self.client.get(url, {'limit': 1})
+        self.assertEqual(response.json()['season'], 'Oficinas 2026')
+        [top] = response.json()['standings']
+        self.assertIn(top.pop('name'), {'Ana', 'Beto'})
+        self.assertEqual(top, {'score': 2, 'rank': 1, 'rooms': 1, 'wins': 1})
+
+        self.assertEqual(self.client.get(url, {'limit': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('core:api_season', args=['ninguna'])).status_code, 404)
+
+    def test_page_is_public(self):
+        response = self.client.get(reverse('core:season', args=[self.season.slug]))
+        self.assertContains(response, 'Oficinas 2026')
+        self.assertContains(response, 'Carla')
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore as DatabaseSessionStore
+from django.contrib.sessions.models import Session
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .utils import RoomTestMixin
+
+
+@override_settings(SESSION_ENGINE='core.sessions')
+class SignedCookieSessionTests(RoomTestMixin, TestCase):
+    def test_database_sessions_are_adopted_once(self):
+        room, (ana, beto) = self.make_room(['Ana', 'Beto'])
+        legacy = DatabaseSessionStore()
+        legacy.update({'room_code': room.code, 'participant_id': beto.id, 'is_admin': False})
+        legacy.save()
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = legacy.session_key
+
+        response = self.client.get(reverse('core:dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['participant'].pk, beto.pk)
+        self.assertIn(':', response.cookies[settings.SESSION_COOKIE_NAME].value)
+        self.assertFalse(Session.objects.filter(session_key=legacy.session_key).exists())
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(reverse('core:dashboard')).status_code, 200)
+        self.assertFalse([query for query in queries if 'django_session' in query['sql']])
+
+    def test_edited_cookies_are_rejected(self):
+        room, (ana, beto) = self.make_room(['Ana', 'Beto'])
+        client = self.client_for(beto)
+        value = client.cookies[settings.SESSION_COOKIE_NAME].value
+        client.cookies[settings.SESSION_COOKIE_NAME] = 'x' + value
+
+        self.assertRedirects(client.get(reverse('core:dashboard')), reverse('core:home'))
+
+    def test_sessions_do_not_touch_the_session_table(self):
+        room, (ana,) = self.make_room(['Ana'])
+        self.client.post(reverse('core:home'), {'action': 'join_room', 'room_code': room.code})
+        self.client.post(reverse('core:choose_name'), {'name': 'Beto'})
+        self.assertEqual(self.client.get(reverse('core:dashboard')).context['participant'].name, 'Beto')
+        self.assertFalse(Session.objects.exists())
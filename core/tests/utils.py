@@ -0,0 +1,49 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.test import Client
+
+from core import context, draw
+from core.leaderboard import refresh_scores
+from core.models import Participant, Room
+from core.predictions import save_predictions
+
+
+class RoomTestMixin:
+    def setUp(self):
+        super().setUp()
+        # Room codes and ids repeat between tests, so nothing may be served from the previous one
+        context._rooms.clear()
+        context._participants.clear()
+        caches['fragments'].clear()
+
+    def make_room(self, names, **fields):
+        room = Room.objects.create(**fields)
+        participants = [Participant.objects.create(room=room, name=name, is_admin=i == 0) for i, name in enumerate(names)]
+        return room, participants
+
+    async def amake_room(self, names, **fields):
+        return await sync_to_async(self.make_room)(names, **fields)
+
+    def client_for(self, participant):
+        """Returns a test client whose session belongs to `participant`."""
+        client = Client()
+        session = client.session
+        session['room_code'] = participant.room.code
+        session['participant_id'] = participant.id
+        session['is_admin'] = participant.is_admin
+        session.save()
+        client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+        return client
+
+    def predict(self, room, user, predictions):
+        """Saves `predictions` as {receiver: giver} for `user`."""
+        participants_by_id = room.participants.in_bulk()
+        choices = {receiver: giver.id for receiver, giver in predictions.items()}
+        self.assertEqual(save_predictions(room, user, choices, participants_by_id), [])
+
+    def publish(self, room, pairs):
+        """Stores the draw and enables the results."""
+        draw.save_assignments(room, pairs)
+        Room.objects.filter(pk=room.pk).update(status=Room.STATUS_RESULTS)
+        return refresh_scores(room)
@@ -1,13 +1,28 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import analytics, api, async_views, exports, metrics, views
 
 app_name = 'core'
 
+# Hot views served by their async versions under ASGI
+hot_views = async_views if settings.ASYNC_VIEWS else views
+
 urlpatterns = [
     path('', views.home_view, name='home'),
     path('name/', views.choose_name_view, name='choose_name'),
-    path('dashboard/', views.dashboard_view, name='dashboard'),
-    path('predict/', views.prediction_view, name='prediction'),
+    path('dashboard/', hot_views.dashboard_view, name='dashboard'),
+    path('predict/', hot_views.prediction_view, name='prediction'),
     path('admin-panel/', views.admin_dashboard_view, name='admin_dashboard'),
-    path('results/', views.results_view, name='results'),
+    path('admin-panel/export/<str:kind>.<str:fmt>', exports.export_view, name='export'),
+    path('admin-panel/analytics/', analytics.analytics_view, name='analytics'),
+    path('admin-panel/analytics/heatmap.bin', analytics.heatmap_data_view, name='analytics_heatmap'),
+    path('results/', hot_views.results_view, name='results'),
+    path('seasons/<slug:slug>/', views.season_view, name='season'),
+    path('api/room/', api.room_status_view, name='api_room'),
+    path('api/roster/', api.roster_view, name='api_roster'),
+    path('api/predictions/', api.predictions_view, name='api_predictions'),
+    path('api/progress/', api.progress_view, name='api_progress'),
+    path('api/results/', api.results_view, name='api_results'),
+    path('api/seasons/<slug:slug>/', api.season_view, name='api_season'),
+    path('metrics', metrics.metrics_view, name='metrics'),
 ]
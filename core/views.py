@@ -1,9 +1,22 @@
-from django.shortcuts import render, redirect
+from django.shortcuts import get_object_or_404, render, redirect
 from django.urls import reverse
-from .models import Room, Participant, Prediction, generate_room_code, Assignment
+from .models import Room, Participant, Prediction, AssignmentSet, Exclusion, Season
+from .codes import create_room
+from .context import clear_room_session, get_player_id, get_room, room_required
+from . import draw, events, seasons
+from .imports import import_participants, read_names
+from .predictions import PredictionsLockedError, get_predictions_map, parse_prediction_form, save_predictions
+from .leaderboard import get_results, refresh_scores
 from django.contrib import messages
+from django.db import transaction
 from django.db.models import Count
-import random
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+# Rendered fragments are keyed by room version, so they never need to expire on their own
+FRAGMENT_CACHE_TIMEOUT = getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', None)
+# Number of previous draws listed in the admin panel for rollback
+ASSIGNMENT_SET_HISTORY = getattr(settings, 'ASSIGNMENT_SET_HISTORY', 10)
 
 def home_view(request):
     """
@@ -13,15 +26,15 @@ def home_view(request):
         action = request.POST.get('action')
 
         if action == 'create_room':
-            room_code = generate_room_code()
-            new_room = Room.objects.create(code=room_code)
+            new_room = create_room()
             
             # The user who creates the room is the admin and the first participant
             participant_name = request.POST.get('admin_name', 'Admin') # Default name for admin
             new_participant = Participant.objects.create(
                 room=new_room,
                 name=participant_name,
-                is_admin=True
+                is_admin=True,
+                player_id=get_player_id(request),
             )
 
             request.session['room_code'] = new_room.code
@@ -34,7 +47,7 @@ def home_view(request):
         elif action == 'join_room':
             room_code = request.POST.get('room_code', '').upper()
             try:
-                room = Room.objects.get(code=room_code)
+                room = get_room(room_code)
                 request.session['room_code'] = room.code
                 request.session['is_admin'] = False # Reset admin status for new joiners
                 # Redirect to choose name if room exists
@@ -54,7 +67,12 @@ def choose_name_view(request):
         messages.error(request, "No hay sala seleccionada. Por favor, únete a una sala primero.")
         return redirect(reverse('core:home'))
 
-    room = Room.objects.get(code=room_code)
+    try:
+        room = get_room(room_code)
+    except Room.DoesNotExist:
+        clear_room_session(request)
+        messages.error(request, "Código de sala no válido.")
+        return redirect(reverse('core:home'))
 
     if request.method == 'POST':
         participant_name = request.POST.get('name', '').strip()
@@ -63,7 +81,13 @@ def choose_name_view(request):
         elif Participant.objects.filter(room=room, name=participant_name).exists():
             messages.error(request, f"El nombre '{participant_name}' ya está en uso en esta sala. Elige otro.")
         else:
-            new_participant = Participant.objects.create(room=room, name=participant_name, is_admin=False)
+            new_participant = Participant.objects.create(
+                room=room, name=participant_name, is_admin=False, player_id=get_player_id(request)
+            )
+            if room.status == Room.STATUS_RESULTS:
+                # Late joiners still need a row in the materialized ranking
+                refresh_scores(room)
+            events.participant_joined(room, new_participant)
             request.session['participant_id'] = new_participant.id
             messages.success(request, f"¡Bienvenido, {participant_name}!")
             
@@ -71,41 +95,21 @@ def choose_name_view(request):
     
     return render(request, 'core/choose_name.html', {'room_code': room_code})
 
+@room_required
 def dashboard_view(request):
     """
     Displays the main dashboard for a participant in a room.
     """
-    room_code = request.session.get('room_code')
-    participant_id = request.session.get('participant_id')
-
-    if not room_code or not participant_id:
-        messages.error(request, "No estás en ninguna sala. Por favor, únete o crea una.")
-        return redirect(reverse('core:home'))
-
-    try:
-        room = Room.objects.get(code=room_code)
-        participant = Participant.objects.get(id=participant_id, room=room)
-    except (Room.DoesNotExist, Participant.DoesNotExist):
-        # Session data is invalid, clear it
-        if 'room_code' in request.session:
-            del request.session['room_code']
-        if 'participant_id' in request.session:
-            del request.session['participant_id']
-        if 'is_admin' in request.session:
-            del request.session['is_admin']
-        messages.error(request, "Tu sesión ha expirado o es inválida.")
-        return redirect(reverse('core:home'))
+    room = request.room
+    participant = request.participant
     
-    total_participants = room.participants.count()
+    # Both counters are maintained on write, so a single joined read replaces two COUNT queries
+    completed_predictions_count, total_participants = Participant.objects.filter(
+        pk=participant.pk
+    ).values_list('predictions_count', 'room__participant_count').get()
     # A user makes a prediction for each participant, including themselves (who gifts to me?)
     required_predictions_per_user = total_participants
 
-    # Count all predictions made by this user in this room
-    completed_predictions_count = Prediction.objects.filter(
-        room=room,
-        user=participant
-    ).count()
-
     # Determine if predictions are 'sent' by checking if all required predictions are made
     predictions_sent = completed_predictions_count == required_predictions_per_user
     
@@ -121,45 +125,18 @@ def dashboard_view(request):
     }
     return render(request, 'core/dashboard.html', context)
 
+@room_required
 def prediction_view(request):
     """
     Allows a participant to make predictions for who gives gifts to whom.
     """
-    room_code = request.session.get('room_code')
-    participant_id = request.session.get('participant_id')
-
-    if not room_code or not participant_id:
-        messages.error(request, "No estás en ninguna sala. Por favor, únete o crea una.")
-        return redirect(reverse('core:home'))
-
-    try:
-        room = Room.objects.get(code=room_code)
-        current_participant = Participant.objects.get(id=participant_id, room=room)
-    except (Room.DoesNotExist, Participant.DoesNotExist):
-        if 'room_code' in request.session: del request.session['room_code']
-        if 'participant_id' in request.session: del request.session['participant_id']
-        if 'is_admin' in request.session: del request.session['is_admin']
-        messages.error(request, "Tu sesión ha expirado o es inválida.")
-        return redirect(reverse('core:home'))
+    room = request.room
+    current_participant = request.participant
 
     if room.status != Room.STATUS_PREDICTING:
         messages.warning(request, "Las predicciones están bloqueadas o los resultados ya han sido revelados.")
         return redirect(reverse('core:dashboard'))
 
-    # Participants for whom the current user will make predictions (everyone, including themselves to predict their giver)
-    receivers_to_predict_for = room.participants.all().order_by('name')
-    # All participants to choose as givers
-    possible_givers = room.participants.order_by('name')
-
-    # Fetch existing predictions for the current user
-    user_predictions = Prediction.objects.filter(
-        room=room,
-        user=current_participant
-    ).select_related('predicted_giver', 'predicted_receiver')
-
-    # Organize existing predictions for easy template access
-    predictions_map = {p.predicted_receiver.id: p.predicted_giver.id for p in user_predictions}
-
     if request.method == 'POST':
         # Check if the "confirm_all" button was pressed
         if 'confirm_all' in request.POST:
@@ -168,275 +145,296 @@ def prediction_view(request):
             messages.success(request, "¡Tus predicciones han sido enviadas!")
             # Optionally change status of participant or add a flag
             return redirect(reverse('core:dashboard'))
-        
-        # Handle individual prediction submissions
-        for receiver in receivers_to_predict_for:
-            predicted_giver_id = request.POST.get(f'giver_for_{receiver.id}')
-            
-            if predicted_giver_id:
-                try:
-                    predicted_giver = Participant.objects.get(id=predicted_giver_id, room=room)
-                    
-                    # Ensure no one predicts themselves as giver for someone
-                    # This rule applies to the actual assignment, not necessarily prediction validation,
-                    # but good to guide user away from impossible choices.
-                    # For now, just save. More robust validation can be added.
-
-                    Prediction.objects.update_or_create(
-                        room=room,
-                        user=current_participant,
-                        predicted_receiver=receiver,
-                        defaults={'predicted_giver': predicted_giver}
-                    )
-                except Participant.DoesNotExist:
-                    messages.error(request, f"Error al procesar la predicción para {receiver.name}.")
-                    # Continue to try and save other valid predictions
+
+        # The page renders its cards lazily, so only the fields that were shown are submitted
+        submitted = parse_prediction_form(request.POST)
+
+        # Validate every submitted choice in memory and upsert the changed ones in one statement
+        participants_by_id = room.participants.in_bulk()
+        predictions_map = get_predictions_map(room, current_participant)
+        choices = {
+            participants_by_id[receiver_id]: predicted_giver_id
+            for receiver_id, predicted_giver_id in submitted.items()
+            if receiver_id in participants_by_id
+        }
+
+        try:
+            invalid_receivers = save_predictions(room, current_participant, choices, participants_by_id, predictions_map)
+        except PredictionsLockedError:
+            messages.warning(request, "Las predicciones están bloqueadas o los resultados ya han sido revelados.")
+            return redirect(reverse('core:dashboard'))
+        for receiver in invalid_receivers:
+            messages.error(request, f"Error al procesar la predicción para {receiver.name}.")
+
+        completed = predictions_map.keys() | {receiver.id for receiver in choices if receiver not in invalid_receivers}
+        events.prediction_progress(room, current_participant, len(completed), len(participants_by_id))
         messages.success(request, "Predicciones guardadas.")
         return redirect(reverse('core:prediction')) # Stay on prediction page to allow more edits or see updates
 
+    # The roster and the current predictions are fetched from the JSON API by the page itself
     context = {
         'room': room,
         'current_participant': current_participant,
-        'receivers_to_predict_for': receivers_to_predict_for,
-        'possible_givers': possible_givers,
-        'predictions_map': predictions_map,
     }
     return render(request, 'core/prediction.html', context)
 
 
+@room_required(admin=True)
 def admin_dashboard_view(request):
     """
     Admin panel for the room. Only accessible by the room admin.
     Allows generation of assignments, blocking predictions, and enabling results.
     """
-    room_code = request.session.get('room_code')
-    participant_id = request.session.get('participant_id')
-    is_admin = request.session.get('is_admin', False)
-
-    if not room_code or not participant_id or not is_admin:
-        messages.error(request, "Acceso denegado. Solo los administradores pueden ver este panel.")
-        return redirect(reverse('core:home'))
-
-    try:
-        room = Room.objects.get(code=room_code)
-        # Ensure the participant is indeed the admin of this room
-        participant = Participant.objects.get(id=participant_id, room=room, is_admin=True) 
-    except (Room.DoesNotExist, Participant.DoesNotExist):
-        # Session data is invalid, clear it
-        if 'room_code' in request.session: del request.session['room_code']
-        if 'participant_id' in request.session: del request.session['participant_id']
-        if 'is_admin' in request.session: del request.session['is_admin']
-        messages.error(request, "Tu sesión ha expirado o no tienes permisos de administrador.")
-        return redirect(reverse('core:home'))
+    room = request.room
+    participant = request.participant
+    import_report = None
     
     # Logic for admin actions (POST requests)
     if request.method == 'POST':
+        # Actions decide on the stored status and draw, as the request's room may come from the cache
+        room.status, room.active_assignment_set_id = (
+            Room.objects.filter(pk=room.pk).values_list('status', 'active_assignment_set').get()
+        )
         action = request.POST.get('action')
-        if action == 'generate_assignments':
+        if action == 'import_participants':
+            upload = request.FILES.get('participants_file')
+            if upload is None:
+                messages.error(request, "Selecciona un archivo con los nombres de los participantes.")
+            else:
+                rows = read_names(upload, csv_format=upload.name.lower().endswith('.csv'))
+                import_report = import_participants(room, rows)
+                if import_report.created:
+                    if room.status == Room.STATUS_RESULTS:
+                        # Imported participants still need rows in the materialized ranking
+                        refresh_scores(room)
+                    events.participant_joined(room)
+                messages.success(
+                    request,
+                    f"{import_report.created} participantes importados, {len(import_report.rejected)} rechazados "
+                    f"({import_report.rows_per_second:.0f} filas/s).",
+                )
+            # The per-row report is rendered below instead of redirecting, as it can be too long for a message
+        elif action == 'generate_assignments':
             participants_in_room = list(room.participants.all())
             if len(participants_in_room) < 2:
                 messages.error(request, "Necesitas al menos 2 participantes para generar el sorteo.")
             else:
-                # Clear existing assignments first
-                room.assignments.all().delete()
-
-                givers = list(participants_in_room)
-                receivers = list(participants_in_room)
-                random.shuffle(givers)
-                random.shuffle(receivers)
-
-                assignments = []
-                # Simple iterative assignment
-                for i in range(len(givers)):
-                    giver = givers[i]
-                    receiver = receivers[i]
-                    
-                    # Ensure no one gifts themselves, and try to prevent direct cycles in simple cases
-                    # This simplified logic might still lead to unsolvable cases or cycles in larger groups
-                    # but is a good start for a basic implementation.
-                    attempts = 0
-                    while giver == receiver or (len(givers) > 2 and Assignment.objects.filter(room=room, giver=receiver, receiver=giver).exists()):
-                        random.shuffle(receivers)
-                        receiver = receivers[i % len(receivers)] # Use modulo to stay within bounds
-                        attempts += 1
-                        if attempts > len(givers) * len(givers): # Limit attempts to prevent infinite loop
-                            messages.error(request, "No se pudo generar un sorteo válido. Intenta de nuevo o ajusta los participantes.")
-                            return redirect(reverse('core:admin_dashboard'))
-
-                    Assignment.objects.create(room=room, giver=giver, receiver=receiver)
-                messages.success(request, "¡Sorteo generado con éxito!")
+                draw_mode = request.POST.get('draw_mode', draw.MODE_NO_MUTUAL)
+                if draw_mode not in dict(draw.MODE_CHOICES):
+                    draw_mode = draw.MODE_NO_MUTUAL
+
+                # The whole draw is computed in memory and saved with one bulk insert
+                exclusions = room.exclusions.values_list('giver_id', 'receiver_id')
+                try:
+                    pairs = draw.draw_assignments(participants_in_room, mode=draw_mode, exclusions=exclusions)
+                except draw.DrawError as e:
+                    if e.participant is not None:
+                        messages.error(request, f"No se pudo generar un sorteo válido: revisa las exclusiones de {e.participant.name}.")
+                    else:
+                        messages.error(request, "No se pudo generar un sorteo válido con las exclusiones actuales. Ajusta las exclusiones o el tipo de sorteo.")
+                else:
+                    draw.save_assignments(room, pairs)
+                    refresh_scores(room)
+                    if room.status == Room.STATUS_RESULTS:
+                        events.results_ready(room)
+                    messages.success(request, "¡Sorteo generado con éxito!")
+
+        elif action == 'activate_assignment_set':
+            try:
+                assignment_set = room.assignment_sets.get(id=request.POST.get('assignment_set_id'))
+            except (AssignmentSet.DoesNotExist, ValueError):
+                messages.error(request, "Versión del sorteo no válida.")
+            else:
+                draw.activate_assignment_set(room, assignment_set)
+                refresh_scores(room)
+                if room.status == Room.STATUS_RESULTS:
+                    events.results_ready(room)
+                messages.success(request, f"Sorteo #{assignment_set.number} restaurado.")
+
+        elif action == 'set_season':
+            season_name = request.POST.get('season_name', '').strip()
+            if not season_name:
+                seasons.set_room_season(room, None)
+                messages.success(request, "La sala ya no forma parte de ninguna temporada.")
+            else:
+                try:
+                    season = seasons.get_or_create_season(season_name)
+                except seasons.SeasonError:
+                    messages.error(request, f"Nombre de temporada no válido (máximo {seasons.NAME_MAX_LENGTH} caracteres).")
+                else:
+                    seasons.set_room_season(room, season)
+                    messages.success(request, f"La sala ahora forma parte de la temporada {season.name}.")
+
+        elif action == 'add_exclusion':
+            try:
+                giver = Participant.objects.get(id=request.POST.get('exclusion_giver'), room=room)
+                receiver = Participant.objects.get(id=request.POST.get('exclusion_receiver'), room=room)
+            except (Participant.DoesNotExist, ValueError):
+                messages.error(request, "Selecciona dos participantes válidos para la exclusión.")
+            else:
+                if giver.id == receiver.id:
+                    messages.error(request, "Nadie puede regalarse a sí mismo, no hace falta excluirlo.")
+                else:
+                    new_exclusions = [Exclusion(room=room, giver=giver, receiver=receiver)]
+                    if request.POST.get('exclusion_mutual'):
+                        new_exclusions.append(Exclusion(room=room, giver=receiver, receiver=giver))
+                    Exclusion.objects.bulk_create(new_exclusions, ignore_conflicts=True)
+                    messages.success(request, f"Exclusión guardada: {giver.name} no le regalará a {receiver.name}.")
+
+        elif action == 'remove_exclusion':
+            try:
+                room.exclusions.filter(id=request.POST.get('exclusion_id')).delete()
+                messages.success(request, "Exclusión eliminada.")
+            except ValueError:
+                messages.error(request, "Exclusión no válida.")
 
         elif action == 'lock_predictions':
-            if room.status != Room.STATUS_PREDICTING:
+            # The status is checked in the update itself, so concurrent requests cannot both apply it
+            if not Room.objects.filter(pk=room.pk, status=Room.STATUS_PREDICTING).update(status=Room.STATUS_LOCKED):
                 messages.warning(request, "Las predicciones ya están bloqueadas o los resultados habilitados.")
             else:
                 room.status = Room.STATUS_LOCKED
-                room.save()
+                room.bump_version()
+                events.status_changed(room)
                 messages.success(request, "Predicciones bloqueadas.")
         elif action == 'enable_results':
             if room.status == Room.STATUS_RESULTS:
                 messages.warning(request, "Los resultados ya están habilitados.")
-            elif not room.assignments.exists():
+            elif room.active_assignment_set_id is None:
                 messages.error(request, "Primero debes generar el sorteo para habilitar los resultados.")
+            elif not (
+                Room.objects.filter(pk=room.pk, active_assignment_set__isnull=False)
+                .exclude(status=Room.STATUS_RESULTS)
+                .update(status=Room.STATUS_RESULTS)
+            ):
+                messages.warning(request, "Los resultados ya están habilitados.")
             else:
                 room.status = Room.STATUS_RESULTS
-                room.save()
+                refresh_scores(room)
+                events.status_changed(room)
+                events.results_ready(room)
                 messages.success(request, "Resultados habilitados.")
         elif action == 'manual_assign_givers':
-            participants_in_room = list(room.participants.all())
-            if len(participants_in_room) < 2:
+            # Everything is validated against one in-memory map of the room's participants
+            participants_by_id = room.participants.in_bulk()
+            if len(participants_by_id) < 2:
                 messages.error(request, "Necesitas al menos 2 participantes para realizar asignaciones manuales.")
                 return redirect(reverse('core:admin_dashboard'))
 
-            manual_assignments_data = {} # {receiver_id: giver_id}
-            for receiver in participants_in_room:
+            pairs = [] # [(giver, receiver)]
+            for receiver in participants_by_id.values():
                 giver_id = request.POST.get(f'giver_for_manual_{receiver.id}')
                 if not giver_id:
                     messages.error(request, f"Debes seleccionar un amigo secreto para {receiver.name}.")
                     return redirect(reverse('core:admin_dashboard'))
-                
+
                 try:
-                    giver = Participant.objects.get(id=giver_id, room=room)
-                    manual_assignments_data[receiver.id] = giver.id
-                except Participant.DoesNotExist:
+                    giver = participants_by_id.get(int(giver_id))
+                except ValueError:
+                    giver = None
+                if giver is None:
                     messages.error(request, f"Amigo secreto seleccionado para {receiver.name} no es válido.")
                     return redirect(reverse('core:admin_dashboard'))
-            
+                pairs.append((giver, receiver))
+
             # --- Validation for manual assignments ---
-            assigned_givers = set(manual_assignments_data.values())
-            if len(assigned_givers) != len(participants_in_room):
+            if len({giver.id for giver, _ in pairs}) != len(participants_by_id):
                 messages.error(request, "Cada participante debe dar un regalo a una persona diferente, y cada persona debe recibir solo de una persona.")
                 return redirect(reverse('core:admin_dashboard'))
 
-            for receiver_id, giver_id in manual_assignments_data.items():
-                if receiver_id == giver_id:
-                    receiver_name = Participant.objects.get(id=receiver_id).name
-                    messages.error(request, f"{receiver_name} no puede regalarse a sí mismo.")
+            for giver, receiver in pairs:
+                if giver.id == receiver.id:
+                    messages.error(request, f"{receiver.name} no puede regalarse a sí mismo.")
                     return redirect(reverse('core:admin_dashboard'))
-            
-            # Clear existing assignments before creating new ones
-            room.assignments.all().delete()
-            
-            # Create new assignments based on manual input
-            for receiver_id, giver_id in manual_assignments_data.items():
-                receiver = Participant.objects.get(id=receiver_id, room=room)
-                giver = Participant.objects.get(id=giver_id, room=room)
-                Assignment.objects.create(room=room, giver=giver, receiver=receiver)
-            
-            # Set room status to results if it's not already
-            if room.status != Room.STATUS_RESULTS:
-                room.status = Room.STATUS_RESULTS
-                room.save()
+
+            # The new draw is published with the status change, so results never show a partial draw
+            with transaction.atomic():
+                draw.save_assignments(room, pairs, source=AssignmentSet.SOURCE_MANUAL)
+                # Set room status to results if it's not already
+                if room.status != Room.STATUS_RESULTS:
+                    room.status = Room.STATUS_RESULTS
+                    room.save(update_fields=['status'])
+                    events.status_changed(room)
+            refresh_scores(room)
+            events.results_ready(room)
 
             messages.success(request, "¡Asignaciones manuales guardadas con éxito! Los resultados están habilitados.")
             return redirect(reverse('core:admin_dashboard'))
 
 
-    # Prepare actual assignments for pre-selection in the manual assignment form
-    actual_assignments_display = []
-    current_assignments = room.assignments.all()
-    for assign in current_assignments:
-        actual_assignments_display.append({
-            'giver_id': assign.giver.id,
-            'receiver_id': assign.receiver.id,
-        })
+    all_participants = list(room.participants.order_by('name'))
+    # Fresh version for the fragment cache keys (the request's room may come from the cache)
+    room.version, room.participant_count, room.active_assignment_set_id, room.season_id = (
+        Room.objects.filter(pk=room.pk).values_list('version', 'participant_count', 'active_assignment_set', 'season').get()
+    )
+
+    # Prepare actual assignments for pre-selection in the manual assignment form as {receiver_id: giver_id},
+    # only loaded when the cached form fragment has to be rendered again
+    actual_assignments_display = SimpleLazyObject(
+        lambda: dict(room.active_assignments().values_list('receiver_id', 'giver_id'))
+    )
 
     context = {
         'room': room,
         'participant': participant, # This is the admin participant
-        'all_participants': room.participants.all().order_by('name'), # All participants for display
+        'all_participants': all_participants, # All participants for display, with their prediction progress
+        'total_participants': len(all_participants),
         'room_status_display': room.get_status_display(),
-        'assignments_exist': room.assignments.exists(),
+        'assignments_exist': room.active_assignment_set_id is not None,
+        'assignment_sets': room.assignment_sets.order_by('-number')[:ASSIGNMENT_SET_HISTORY],
         'actual_assignments_display': actual_assignments_display, # Pass to template for pre-selection
+        'participant_names': {p.id: p.name for p in all_participants},
+        'manual_assignment_roster': [{'id': p.id, 'name': p.name} for p in all_participants],
+        'exclusions': room.exclusions.select_related('giver', 'receiver').order_by('giver__name', 'receiver__name'),
+        'draw_mode_choices': draw.MODE_CHOICES,
+        'default_draw_mode': draw.MODE_NO_MUTUAL,
+        'fragment_cache_timeout': FRAGMENT_CACHE_TIMEOUT,
+        'import_report': import_report,
     }
     return render(request, 'core/admin_dashboard.html', context)
 
 
+@room_required
 def results_view(request):
     """
     Displays the results of the Secret Santa draw and the prediction ranking.
     """
-    room_code = request.session.get('room_code')
-    participant_id = request.session.get('participant_id')
+    room = request.room
+    current_participant = request.participant
 
-    if not room_code or not participant_id:
-        messages.error(request, "No estás en ninguna sala. Por favor, únete o crea una.")
-        return redirect(reverse('core:home'))
+    # Version check: the only query when every fragment is already cached
+    room.status, room.version = Room.objects.filter(pk=room.pk).values_list('status', 'version').get()
 
-    try:
-        room = Room.objects.get(code=room_code)
-        current_participant = Participant.objects.get(id=participant_id, room=room)
-    except (Room.DoesNotExist, Participant.DoesNotExist):
-        if 'room_code' in request.session: del request.session['room_code']
-        if 'participant_id' in request.session: del request.session['participant_id']
-        if 'is_admin' in request.session: del request.session['is_admin']
-        messages.error(request, "Tu sesión ha expirado o es inválida.")
-        return redirect(reverse('core:home'))
-    
     if room.status != Room.STATUS_RESULTS:
         messages.warning(request, "Los resultados aún no han sido habilitados por el administrador.")
         return redirect(reverse('core:dashboard'))
 
-    # --- Winner Calculation Logic ---
-    participants_in_room = room.participants.all()
-    all_assignments = Assignment.objects.filter(room=room).select_related('giver', 'receiver')
-    all_predictions = Prediction.objects.filter(room=room).select_related('user', 'predicted_giver', 'predicted_receiver')
-
-    # Build a map of actual assignments: {giver_id: receiver_id}
-    assignment_map = {assignment.giver.id: assignment.receiver.id for assignment in all_assignments}
-
-    # Initialize scores for all participants
-    scores = {p.name: {'score': 0, 'predictions': []} for p in participants_in_room}
-
-    # Calculate scores
-    for prediction in all_predictions:
-        # Check if the predicted assignment matches the actual assignment
-        # A prediction is correct if:
-        # 1. The predicted receiver is actually receiving from the predicted giver
-        # 2. AND the user made a prediction for *this specific* receiver
-        
-        # Does this predicted receiver exist in the actual assignments?
-        actual_receiver_for_predicted_giver = assignment_map.get(prediction.predicted_giver.id)
-
-        is_correct_prediction = (
-            actual_receiver_for_predicted_giver == prediction.predicted_receiver.id
-        )
-
-        if is_correct_prediction:
-            scores[prediction.user.name]['score'] += 1
-        
-        scores[prediction.user.name]['predictions'].append({
-            'predicted_giver': prediction.predicted_giver.name,
-            'predicted_receiver': prediction.predicted_receiver.name,
-            'is_correct': is_correct_prediction,
-        })
-    
-    # Sort participants by score (descending)
-    ranking = sorted(scores.items(), key=lambda item: item[1]['score'], reverse=True)
-
-    # Determine winner(s)
-    winners = []
-    if ranking:
-        max_score = ranking[0][1]['score']
-        for name, data in ranking:
-            if data['score'] == max_score:
-                winners.append(name)
-
-    # Prepare actual assignments for display (if admin)
-    actual_assignments_display = []
-    for assign in all_assignments:
-        actual_assignments_display.append({
-            'giver': assign.giver.name,
-            'receiver': assign.receiver.name,
-        })
-
+    # --- Ranking ---
+    # Scores are materialized when results are enabled or assignments change,
+    # and the rendered fragments are cached per room version, so the results
+    # are only built when a fragment for the current version is missing.
+    results = SimpleLazyObject(lambda: get_results(room))
 
     context = {
         'room': room,
         'current_participant': current_participant,
-        'ranking': ranking,
-        'winners': winners,
-        'actual_assignments': actual_assignments_display if current_participant.is_admin else [],
+        'ranking': SimpleLazyObject(lambda: results['ranking']),
+        'winners': SimpleLazyObject(lambda: results['winners']),
+        'actual_assignments': SimpleLazyObject(lambda: results['assignments']) if current_participant.is_admin else [],
         'show_actual_assignments': current_participant.is_admin,
+        'fragment_cache_timeout': FRAGMENT_CACHE_TIMEOUT,
+    }
+    return render(request, 'core/results.html', context)
+
+
+def season_view(request, slug):
+    """
+    Displays the season's leaderboard over all of its rooms. Public, so
+    players of every room can follow it.
+    """
+    season = get_object_or_404(Season, slug=slug)
+    context = {
+        'season': season,
+        'standings': seasons.get_standings(season),
     }
-    return render(request, 'core/results.html', context)
\ No newline at end of file
+    return render(request, 'core/season.html', context)
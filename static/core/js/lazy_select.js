@@ -0,0 +1,42 @@
+/*
+ * Selects whose options are only inserted when they are first opened.
+ *
+ * Rendering every participant into every select makes a page grow with the
+ * square of the room size, so the options markup is built once from the
+ * roster and copied into each select the user actually opens. Used by the
+ * prediction page and the manual assignment form of the admin panel.
+ */
+window.LazySelect = (function () {
+    function escapeHtml(text) {
+        const div = document.createElement('div');
+        div.textContent = text;
+        return div.innerHTML;
+    }
+
+    // Returns fillOptions(select) for the roster returned by getRoster(), read on first use
+    function optionsFiller(getRoster) {
+        let optionsHtml = null;
+        return function fillOptions(select) {
+            if (select.dataset.loaded) return;
+            // The options markup is built once and shared by every select
+            if (optionsHtml === null) {
+                optionsHtml = getRoster().map(p => `<option value="${p.id}">${escapeHtml(p.name)}</option>`).join('');
+            }
+            const current = select.value;
+            // Drop the placeholder copy of the current choice added at render time
+            select.querySelectorAll('option[data-current]').forEach(option => option.remove());
+            select.insertAdjacentHTML('beforeend', optionsHtml);
+            const own = select.querySelector(`option[value="${select.dataset.receiver}"]`);
+            if (own) own.remove(); // A person cannot gift to themselves
+            select.value = current;
+            select.dataset.loaded = '1';
+        };
+    }
+
+    function bind(select, fillOptions) {
+        select.addEventListener('focus', () => fillOptions(select));
+        select.addEventListener('mousedown', () => fillOptions(select));
+    }
+
+    return { escapeHtml, optionsFiller, bind };
+})();